@@ -42,8 +42,9 @@ class Analysis:
             return 0, 0
         frequency1 = self.app.data21[location1].freq
         frequency2 = self.app.data21[location2].freq
-        gain1 = self.app.data21[location1].gain
-        gain2 = self.app.data21[location2].gain
+        gain = self.app.data21.gain
+        gain1 = gain[location1]
+        gain2 = gain[location2]
         frequency_factor = frequency2 / frequency1
         if frequency_factor < 1:
             frequency_factor = 1 / frequency_factor
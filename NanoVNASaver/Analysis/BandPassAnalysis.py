@@ -117,13 +117,15 @@ class BandPassAnalysis(Analysis):
                 f"Please place {self.app.markers[0].name} in the passband.")
             return
 
-        pass_band_db = self.app.data21[pass_band_location].gain
+        gain = self.app.data21.gain
+
+        pass_band_db = gain[pass_band_location]
 
         logger.debug("Initial passband gain: %d", pass_band_db)
 
         initial_lower_cutoff_location = -1
         for i in range(pass_band_location, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 3:
+            if (pass_band_db - gain[i]) > 3:
                 # We found a cutoff location
                 initial_lower_cutoff_location = i
                 break
@@ -138,7 +140,7 @@ class BandPassAnalysis(Analysis):
 
         initial_upper_cutoff_location = -1
         for i in range(pass_band_location, len(self.app.data21), 1):
-            if (pass_band_db - self.app.data21[i].gain) > 3:
+            if (pass_band_db - gain[i]) > 3:
                 # We found a cutoff location
                 initial_upper_cutoff_location = i
                 break
@@ -152,9 +154,9 @@ class BandPassAnalysis(Analysis):
         logger.debug("Found initial upper cutoff frequency at %d", initial_upper_cutoff_frequency)
 
         peak_location = -1
-        peak_db = self.app.data21[initial_lower_cutoff_location].gain
+        peak_db = gain[initial_lower_cutoff_location]
         for i in range(initial_lower_cutoff_location, initial_upper_cutoff_location, 1):
-            db = self.app.data21[i].gain
+            db = gain[i]
             if db > peak_db:
                 peak_db = db
                 peak_location = i
@@ -164,13 +166,13 @@ class BandPassAnalysis(Analysis):
         lower_cutoff_location = -1
         pass_band_db = peak_db
         for i in range(peak_location, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 3:
+            if (pass_band_db - gain[i]) > 3:
                 # We found the cutoff location
                 lower_cutoff_location = i
                 break
 
         lower_cutoff_frequency = self.app.data21[lower_cutoff_location].freq
-        lower_cutoff_gain = self.app.data21[lower_cutoff_location].gain - pass_band_db
+        lower_cutoff_gain = gain[lower_cutoff_location] - pass_band_db
 
         if lower_cutoff_gain < -4:
             logger.debug("Lower cutoff frequency found at %f dB"
@@ -187,13 +189,13 @@ class BandPassAnalysis(Analysis):
         upper_cutoff_location = -1
         pass_band_db = peak_db
         for i in range(peak_location, len(self.app.data21), 1):
-            if (pass_band_db - self.app.data21[i].gain) > 3:
+            if (pass_band_db - gain[i]) > 3:
                 # We found the cutoff location
                 upper_cutoff_location = i
                 break
 
         upper_cutoff_frequency = self.app.data21[upper_cutoff_location].freq
-        upper_cutoff_gain = self.app.data21[upper_cutoff_location].gain - pass_band_db
+        upper_cutoff_gain = gain[upper_cutoff_location] - pass_band_db
         if upper_cutoff_gain < -4:
             logger.debug("Upper cutoff frequency found at %f dB"
                          " - insufficient data points for true -3 dB point.",
@@ -222,7 +224,7 @@ class BandPassAnalysis(Analysis):
 
         lower_six_db_location = -1
         for i in range(lower_cutoff_location, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 6:
+            if (pass_band_db - gain[i]) > 6:
                 # We found 6dB location
                 lower_six_db_location = i
                 break
@@ -235,21 +237,21 @@ class BandPassAnalysis(Analysis):
 
         ten_db_location = -1
         for i in range(lower_cutoff_location, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 10:
+            if (pass_band_db - gain[i]) > 10:
                 # We found 6dB location
                 ten_db_location = i
                 break
 
         twenty_db_location = -1
         for i in range(lower_cutoff_location, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 20:
+            if (pass_band_db - gain[i]) > 20:
                 # We found 6dB location
                 twenty_db_location = i
                 break
 
         sixty_db_location = -1
         for i in range(lower_six_db_location, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 60:
+            if (pass_band_db - gain[i]) > 60:
                 # We found 60dB location! Wow.
                 sixty_db_location = i
                 break
@@ -284,7 +286,7 @@ class BandPassAnalysis(Analysis):
 
         upper_six_db_location = -1
         for i in range(upper_cutoff_location, len(self.app.data21), 1):
-            if (pass_band_db - self.app.data21[i].gain) > 6:
+            if (pass_band_db - gain[i]) > 6:
                 # We found 6dB location
                 upper_six_db_location = i
                 break
@@ -301,21 +303,21 @@ class BandPassAnalysis(Analysis):
 
         ten_db_location = -1
         for i in range(upper_cutoff_location, len(self.app.data21), 1):
-            if (pass_band_db - self.app.data21[i].gain) > 10:
+            if (pass_band_db - gain[i]) > 10:
                 # We found 6dB location
                 ten_db_location = i
                 break
 
         twenty_db_location = -1
         for i in range(upper_cutoff_location, len(self.app.data21), 1):
-            if (pass_band_db - self.app.data21[i].gain) > 20:
+            if (pass_band_db - gain[i]) > 20:
                 # We found 6dB location
                 twenty_db_location = i
                 break
 
         sixty_db_location = -1
         for i in range(upper_six_db_location, len(self.app.data21), 1):
-            if (pass_band_db - self.app.data21[i].gain) > 60:
+            if (pass_band_db - gain[i]) > 60:
                 # We found 60dB location! Wow.
                 sixty_db_location = i
                 break
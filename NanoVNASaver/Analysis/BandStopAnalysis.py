@@ -105,9 +105,10 @@ class BandStopAnalysis(Analysis):
             return
 
         peak_location = -1
-        peak_db = self.app.data21[0].gain
+        gain = self.app.data21.gain
+        peak_db = gain[0]
         for i in range(len(self.app.data21)):
-            db = self.app.data21[i].gain
+            db = gain[i]
             if db > peak_db:
                 peak_db = db
                 peak_location = i
@@ -117,13 +118,13 @@ class BandStopAnalysis(Analysis):
         lower_cutoff_location = -1
         pass_band_db = peak_db
         for i in range(len(self.app.data21)):
-            if (pass_band_db - self.app.data21[i].gain) > 3:
+            if (pass_band_db - gain[i]) > 3:
                 # We found the cutoff location
                 lower_cutoff_location = i
                 break
 
         lower_cutoff_frequency = self.app.data21[lower_cutoff_location].freq
-        lower_cutoff_gain = self.app.data21[lower_cutoff_location].gain - pass_band_db
+        lower_cutoff_gain = gain[lower_cutoff_location] - pass_band_db
 
         if lower_cutoff_gain < -4:
             logger.debug("Lower cutoff frequency found at %f dB"
@@ -140,13 +141,13 @@ class BandStopAnalysis(Analysis):
 
         upper_cutoff_location = -1
         for i in range(len(self.app.data21)-1, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 3:
+            if (pass_band_db - gain[i]) > 3:
                 # We found the cutoff location
                 upper_cutoff_location = i
                 break
 
         upper_cutoff_frequency = self.app.data21[upper_cutoff_location].freq
-        upper_cutoff_gain = self.app.data21[upper_cutoff_location].gain - pass_band_db
+        upper_cutoff_gain = gain[upper_cutoff_location] - pass_band_db
         if upper_cutoff_gain < -4:
             logger.debug("Upper cutoff frequency found at %f dB"
                          " - insufficient data points for true -3 dB point.",
@@ -174,7 +175,7 @@ class BandStopAnalysis(Analysis):
 
         lower_six_db_location = -1
         for i in range(lower_cutoff_location, len(self.app.data21)):
-            if (pass_band_db - self.app.data21[i].gain) > 6:
+            if (pass_band_db - gain[i]) > 6:
                 # We found 6dB location
                 lower_six_db_location = i
                 break
@@ -187,21 +188,21 @@ class BandStopAnalysis(Analysis):
 
         ten_db_location = -1
         for i in range(lower_cutoff_location, len(self.app.data21)):
-            if (pass_band_db - self.app.data21[i].gain) > 10:
+            if (pass_band_db - gain[i]) > 10:
                 # We found 6dB location
                 ten_db_location = i
                 break
 
         twenty_db_location = -1
         for i in range(lower_cutoff_location, len(self.app.data21)):
-            if (pass_band_db - self.app.data21[i].gain) > 20:
+            if (pass_band_db - gain[i]) > 20:
                 # We found 6dB location
                 twenty_db_location = i
                 break
 
         sixty_db_location = -1
         for i in range(lower_six_db_location, len(self.app.data21)):
-            if (pass_band_db - self.app.data21[i].gain) > 60:
+            if (pass_band_db - gain[i]) > 60:
                 # We found 60dB location! Wow.
                 sixty_db_location = i
                 break
@@ -237,7 +238,7 @@ class BandStopAnalysis(Analysis):
 
         upper_six_db_location = -1
         for i in range(upper_cutoff_location, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 6:
+            if (pass_band_db - gain[i]) > 6:
                 # We found 6dB location
                 upper_six_db_location = i
                 break
@@ -254,21 +255,21 @@ class BandStopAnalysis(Analysis):
 
         ten_db_location = -1
         for i in range(upper_cutoff_location, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 10:
+            if (pass_band_db - gain[i]) > 10:
                 # We found 6dB location
                 ten_db_location = i
                 break
 
         twenty_db_location = -1
         for i in range(upper_cutoff_location, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 20:
+            if (pass_band_db - gain[i]) > 20:
                 # We found 6dB location
                 twenty_db_location = i
                 break
 
         sixty_db_location = -1
         for i in range(upper_six_db_location, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 60:
+            if (pass_band_db - gain[i]) > 60:
                 # We found 60dB location! Wow.
                 sixty_db_location = i
                 break
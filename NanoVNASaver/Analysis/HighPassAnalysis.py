@@ -75,13 +75,15 @@ class HighPassAnalysis(Analysis):
                 f"Please place {self.app.markers[0].name } in the passband.")
             return
 
-        pass_band_db = self.app.data21[pass_band_location].gain
+        gain = self.app.data21.gain
+
+        pass_band_db = gain[pass_band_location]
 
         logger.debug("Initial passband gain: %d", pass_band_db)
 
         initial_cutoff_location = -1
         for i in range(pass_band_location, -1, -1):
-            db = self.app.data21[i].gain
+            db = gain[i]
             if (pass_band_db - db) > 3:
                 # We found a cutoff location
                 initial_cutoff_location = i
@@ -96,9 +98,9 @@ class HighPassAnalysis(Analysis):
         logger.debug("Found initial cutoff frequency at %d", initial_cutoff_frequency)
 
         peak_location = -1
-        peak_db = self.app.data21[initial_cutoff_location].gain
+        peak_db = gain[initial_cutoff_location]
         for i in range(len(self.app.data21) - 1, initial_cutoff_location - 1, -1):
-            if self.app.data21[i].gain > peak_db:
+            if gain[i] > peak_db:
                 peak_db = db
                 peak_location = i
 
@@ -110,13 +112,13 @@ class HighPassAnalysis(Analysis):
         cutoff_location = -1
         pass_band_db = peak_db
         for i in range(peak_location, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 3:
+            if (pass_band_db - gain[i]) > 3:
                 # We found the cutoff location
                 cutoff_location = i
                 break
 
         cutoff_frequency = self.app.data21[cutoff_location].freq
-        cutoff_gain = self.app.data21[cutoff_location].gain - pass_band_db
+        cutoff_gain = gain[cutoff_location] - pass_band_db
         if cutoff_gain < -4:
             logger.debug("Cutoff frequency found at %f dB"
                          " - insufficient data points for true -3 dB point.",
@@ -130,7 +132,7 @@ class HighPassAnalysis(Analysis):
 
         six_db_location = -1
         for i in range(cutoff_location, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 6:
+            if (pass_band_db - gain[i]) > 6:
                 # We found 6dB location
                 six_db_location = i
                 break
@@ -143,21 +145,21 @@ class HighPassAnalysis(Analysis):
 
         ten_db_location = -1
         for i in range(cutoff_location, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 10:
+            if (pass_band_db - gain[i]) > 10:
                 # We found 6dB location
                 ten_db_location = i
                 break
 
         twenty_db_location = -1
         for i in range(cutoff_location, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 20:
+            if (pass_band_db - gain[i]) > 20:
                 # We found 6dB location
                 twenty_db_location = i
                 break
 
         sixty_db_location = -1
         for i in range(six_db_location, -1, -1):
-            if (pass_band_db - self.app.data21[i].gain) > 60:
+            if (pass_band_db - gain[i]) > 60:
                 # We found 60dB location! Wow.
                 sixty_db_location = i
                 break
@@ -77,13 +77,15 @@ class LowPassAnalysis(Analysis):
                 f"Please place {self.app.markers[0].name} in the passband.")
             return
 
-        pass_band_db = self.app.data21[pass_band_location].gain
+        gain = self.app.data21.gain
+
+        pass_band_db = gain[pass_band_location]
 
         logger.debug("Initial passband gain: %d", pass_band_db)
 
         initial_cutoff_location = -1
         for i in range(pass_band_location, len(self.app.data21)):
-            db = self.app.data21[i].gain
+            db = gain[i]
             if (pass_band_db - db) > 3:
                 # We found a cutoff location
                 initial_cutoff_location = i
@@ -98,9 +100,9 @@ class LowPassAnalysis(Analysis):
         logger.debug("Found initial cutoff frequency at %d", initial_cutoff_frequency)
 
         peak_location = -1
-        peak_db = self.app.data21[initial_cutoff_location].gain
+        peak_db = gain[initial_cutoff_location]
         for i in range(0, initial_cutoff_location):
-            db = self.app.data21[i].gain
+            db = gain[i]
             if db > peak_db:
                 peak_db = db
                 peak_location = i
@@ -113,14 +115,14 @@ class LowPassAnalysis(Analysis):
         cutoff_location = -1
         pass_band_db = peak_db
         for i in range(peak_location, len(self.app.data21)):
-            db = self.app.data21[i].gain
+            db = gain[i]
             if (pass_band_db - db) > 3:
                 # We found the cutoff location
                 cutoff_location = i
                 break
 
         cutoff_frequency = self.app.data21[cutoff_location].freq
-        cutoff_gain = self.app.data21[cutoff_location].gain - pass_band_db
+        cutoff_gain = gain[cutoff_location] - pass_band_db
         if cutoff_gain < -4:
             logger.debug(
                 "Cutoff frequency found at %f dB"
@@ -135,7 +137,7 @@ class LowPassAnalysis(Analysis):
 
         six_db_location = -1
         for i in range(cutoff_location, len(self.app.data21)):
-            db = self.app.data21[i].gain
+            db = gain[i]
             if (pass_band_db - db) > 6:
                 # We found 6dB location
                 six_db_location = i
@@ -149,7 +151,7 @@ class LowPassAnalysis(Analysis):
 
         ten_db_location = -1
         for i in range(cutoff_location, len(self.app.data21)):
-            db = self.app.data21[i].gain
+            db = gain[i]
             if (pass_band_db - db) > 10:
                 # We found 6dB location
                 ten_db_location = i
@@ -157,7 +159,7 @@ class LowPassAnalysis(Analysis):
 
         twenty_db_location = -1
         for i in range(cutoff_location, len(self.app.data21)):
-            db = self.app.data21[i].gain
+            db = gain[i]
             if (pass_band_db - db) > 20:
                 # We found 6dB location
                 twenty_db_location = i
@@ -165,7 +167,7 @@ class LowPassAnalysis(Analysis):
 
         sixty_db_location = -1
         for i in range(six_db_location, len(self.app.data21)):
-            db = self.app.data21[i].gain
+            db = gain[i]
             if (pass_band_db - db) > 60:
                 # We found 60dB location! Wow.
                 sixty_db_location = i
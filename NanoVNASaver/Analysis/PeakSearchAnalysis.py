@@ -87,13 +87,9 @@ class PeakSearchAnalysis(Analysis):
     def runAnalysis(self):
         count = self.input_number_of_peaks.value()
         if self.rbtn_data_vswr.isChecked():
-            data = []
-            for d in self.app.data:
-                data.append(d.vswr)
+            data = self.app.data.vswr
         elif self.rbtn_data_s21_gain.isChecked():
-            data = []
-            for d in self.app.data21:
-                data.append(d.gain)
+            data = self.app.data21.gain
         else:
             logger.warning("Searching for peaks on unknown data")
             return
@@ -78,24 +78,16 @@ class SimplePeakSearchAnalysis(Analysis):
     def runAnalysis(self):
         if self.rbtn_data_vswr.isChecked():
             suffix = ""
-            data = []
-            for d in self.app.data:
-                data.append(d.vswr)
+            data = self.app.data.vswr
         elif self.rbtn_data_resistance.isChecked():
             suffix = " \N{OHM SIGN}"
-            data = []
-            for d in self.app.data:
-                data.append(d.impedance().real)
+            data = self.app.data.impedance().real
         elif self.rbtn_data_reactance.isChecked():
             suffix = " \N{OHM SIGN}"
-            data = []
-            for d in self.app.data:
-                data.append(d.impedance().imag)
+            data = self.app.data.impedance().imag
         elif self.rbtn_data_s21_gain.isChecked():
             suffix = " dB"
-            data = []
-            for d in self.app.data21:
-                data.append(d.gain)
+            data = self.app.data21.gain
         else:
             logger.warning("Searching for peaks on unknown data")
             return
@@ -55,9 +55,7 @@ class VSWRAnalysis(Analysis):
 
     def runAnalysis(self):
         max_dips_shown = 3
-        data = []
-        for d in self.app.data:
-            data.append(d.vswr)
+        data = self.app.data.vswr.tolist()
         # min_idx = np.argmin(data)
         #
         # logger.debug("Minimum at %d", min_idx)
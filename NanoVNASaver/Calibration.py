@@ -20,8 +20,10 @@ import os
 from typing import List
 
 import numpy as np
+from scipy.interpolate import CubicSpline
 
 from .RFTools import Datapoint
+from .SweepData import SweepSeries
 
 logger = logging.getLogger(__name__)
 
@@ -34,18 +36,26 @@ class Calibration:
     s21through: List[Datapoint] = []
     s21isolation: List[Datapoint] = []
 
-    frequencies = []
+    frequencies = np.empty(0, dtype=np.int64)
 
     # 1-port
-    e00 = []     # Directivity
-    e11 = []     # Port match
-    deltaE = []  # Tracking
+    e00 = np.empty(0, dtype=np.complex128)     # Directivity
+    e11 = np.empty(0, dtype=np.complex128)     # Port match
+    deltaE = np.empty(0, dtype=np.complex128)  # Tracking
 
     # 2-port
-    e30 = []     # Port match
-    e10e32 = []  # Transmission
+    e30 = np.empty(0, dtype=np.complex128)     # Port match
+    e10e32 = np.empty(0, dtype=np.complex128)  # Transmission
 
-    shortIdeal = np.complex(-1, 0)
+    # Points where short, open and load can not be told apart
+    degenerate = np.empty(0, dtype=bool)
+
+    # Error term lookup between calibration points
+    INTERPOLATIONS = ("nearest", "linear", "cubic")
+    interpolation = "nearest"
+    _splines = {}
+
+    shortIdeal = complex(-1, 0)
     useIdealShort = True
     shortL0 = 5.7 * 10E-12
     shortL1 = -8960 * 10E-24
@@ -55,7 +65,7 @@ class Calibration:
     # These numbers look very large, considering what Keysight suggests their numbers are.
 
     useIdealOpen = True
-    openIdeal = np.complex(1, 0)
+    openIdeal = complex(1, 0)
     openC0 = 2.1 * 10E-14  # Subtract 50fF for the nanoVNA calibration if nanoVNA is calibrated?
     openC1 = 5.67 * 10E-23
     openC2 = -2.39 * 10E-31
@@ -67,7 +77,7 @@ class Calibration:
     loadL = 0
     loadC = 0
     loadLength = 0
-    loadIdeal = np.complex(0, 0)
+    loadIdeal = complex(0, 0)
 
     useIdealThrough = True
     throughLength = 0
@@ -94,152 +104,212 @@ class Calibration:
                         "All of short, open and load calibration steps"
                         "must be completed for calibration to be applied.")
             return False, "All calibration data sets must be the same size."
-        self.frequencies = [int] * len(self.s11short)
-        self.e00 = [np.complex] * len(self.s11short)
-        self.e11 = [np.complex] * len(self.s11short)
-        self.deltaE = [np.complex] * len(self.s11short)
-        self.e30 = [np.complex] * len(self.s11short)
-        self.e10e32 = [np.complex] * len(self.s11short)
         logger.debug("Calculating calibration for %d points.", len(self.s11short))
         if self.useIdealShort:
             logger.debug("Using ideal values.")
         else:
             logger.debug("Using calibration set values.")
-        if self.isValid2Port():
+        is_2port = self.isValid2Port()
+        if is_2port:
             logger.debug("Calculating 2-port calibration.")
         else:
             logger.debug("Calculating 1-port calibration.")
-        for i in range(len(self.s11short)):
-            self.frequencies[i] = self.s11short[i].freq
-            f = self.s11short[i].freq
-            pi = math.pi
-
-            if self.useIdealShort:
-                g1 = self.shortIdeal
-            else:
-                Zsp = np.complex(0, 1) * 2 * pi * f * (self.shortL0 +
-                                                       self.shortL1 * f +
-                                                       self.shortL2 * f**2 +
-                                                       self.shortL3 * f**3)
-                gammaShort = ((Zsp/50) - 1) / ((Zsp/50) + 1)
-                # (lower case) gamma = 2*pi*f
-                # e^j*2*gamma*length
-                # Referencing https://arxiv.org/pdf/1606.02446.pdf (18) - (21)
-                g1 = gammaShort * np.exp(
-                    np.complex(0, 1) * 2 * 2 * math.pi * f * self.shortLength * -1)
-
-            if self.useIdealOpen:
-                g2 = self.openIdeal
-            else:
-                divisor = (
-                    2 * pi * f * (
-                        self.openC0 + self.openC1 * f +
-                        self.openC2 * f**2 + self.openC3 * f**3)
-                    )
-                if divisor != 0:
-                    Zop = np.complex(0, -1) / divisor
-                    gammaOpen = ((Zop/50) - 1) / ((Zop/50) + 1)
-                    g2 = gammaOpen * np.exp(
-                        np.complex(0, 1) * 2 * 2 * math.pi * f * self.openLength * -1)
-                else:
-                    g2 = self.openIdeal
-            if self.useIdealLoad:
-                g3 = self.loadIdeal
-            else:
-                Zl = self.loadR + (np.complex(0, 1) * 2 * math.pi * f * self.loadL)
-                g3 = ((Zl/50)-1) / ((Zl/50)+1)
-                g3 = g3 * np.exp(
-                    np.complex(0, 1) * 2 * 2 * math.pi * f * self.loadLength * -1)
-
-            gm1 = np.complex(self.s11short[i].re, self.s11short[i].im)
-            gm2 = np.complex(self.s11open[i].re, self.s11open[i].im)
-            gm3 = np.complex(self.s11load[i].re, self.s11load[i].im)
-
-            try:
-                denominator = (
-                    g1 * (g2 - g3) * gm1 +
-                    g2 * g3 * gm2 -
-                    g2 * g3 * gm3 -
-                    (g2 * gm2 - g3 * gm3) * g1)
-                self.e00[i] = - (
-                    (g2 * gm3 - g3 * gm3) * g1 * gm2 -
-                    (g2 * g3 * gm2 - g2 * g3 * gm3 -
-                     (g3 * gm2 - g2 * gm3) * g1) * gm1
-                    ) / denominator
-                self.e11[i] = (
-                    (g2 - g3) * gm1 - g1 * (gm2 - gm3) +
-                    g3 * gm2 - g2 * gm3
-                    ) / denominator
-                self.deltaE[i] = - (
-                    (g1 * (gm2 - gm3) - g2 * gm2 + g3 * gm3) * gm1 +
-                    (g2 * gm3 - g3 * gm3) * gm2
-                    ) / denominator
-            except ZeroDivisionError:
-                self.isCalculated = False
-                logger.error(
-                    "Division error - did you use the same measurement"
-                    " for two of short, open and load?")
-                logger.debug(
-                    "Division error at index %d"
-                    " Short == Load: %s"
-                    " Short == Open: %s"
-                    " Open == Load: %s",
-                    i,
-                    self.s11short[i] == self.s11load[i],
-                    self.s11short[i] == self.s11open[i],
-                    self.s11open[i] == self.s11load[i])
-                return (self.isCalculated,
-                        f"Two of short, open and load returned the same"
-                        f" values at frequency {self.s11open[i].freq}Hz.")
-
-            if self.isValid2Port():
-                self.e30[i] = np.complex(
-                    self.s21isolation[i].re, self.s21isolation[i].im)
-                s21m = np.complex(self.s21through[i].re, self.s21through[i].im)
-                if not self.useIdealThrough:
-                    gammaThrough = np.exp(
-                        np.complex(0, 1) * 2 * math.pi * self.throughLength * f * -1)
-                    s21m = s21m / gammaThrough
-                self.e10e32[i] = (s21m - self.e30[i]) * (1 - (self.e11[i]*self.e11[i]))
+
+        short = SweepSeries.from_datapoints(self.s11short)
+        f = short.freq
+        g1 = self.gammaShort(f)
+        g2 = self.gammaOpen(f)
+        g3 = self.gammaLoad(f)
+
+        gm1 = short.z
+        gm2 = SweepSeries.from_datapoints(self.s11open).z
+        gm3 = SweepSeries.from_datapoints(self.s11load).z
+
+        denominator = (
+            g1 * (g2 - g3) * gm1 +
+            g2 * g3 * gm2 -
+            g2 * g3 * gm3 -
+            (g2 * gm2 - g3 * gm3) * g1)
+        # Points where two of the standards measured the same cannot be solved
+        self.degenerate = ~np.isfinite(denominator) | (denominator == 0)
+        bad = np.flatnonzero(self.degenerate)
+        if len(bad):
+            logger.warning(
+                "Division error - did you use the same measurement"
+                " for two of short, open and load?")
+            logger.debug(
+                "Division error at %d points, first at index %d"
+                " Short == Load: %s"
+                " Short == Open: %s"
+                " Open == Load: %s",
+                len(bad), bad[0],
+                gm1[bad[0]] == gm3[bad[0]],
+                gm1[bad[0]] == gm2[bad[0]],
+                gm2[bad[0]] == gm3[bad[0]])
+        if len(bad) == len(f):
+            self.isCalculated = False
+            return (self.isCalculated,
+                    "Two of short, open and load returned the same"
+                    " values at all points.")
+
+        # Keep the error terms ordered by frequency for the lookup,
+        # which bridges the degenerate points from their neighbours
+        order = np.argsort(f, kind="stable")
+        order = order[~self.degenerate[order]]
+        f = f[order]
+        g1, g2, g3 = g1[order], g2[order], g3[order]
+        gm1, gm2, gm3 = gm1[order], gm2[order], gm3[order]
+        denominator = denominator[order]
+        self._splines = {}
+
+        self.frequencies = f
+        self.e00 = - (
+            (g2 * gm3 - g3 * gm3) * g1 * gm2 -
+            (g2 * g3 * gm2 - g2 * g3 * gm3 -
+             (g3 * gm2 - g2 * gm3) * g1) * gm1
+            ) / denominator
+        self.e11 = (
+            (g2 - g3) * gm1 - g1 * (gm2 - gm3) +
+            g3 * gm2 - g2 * gm3
+            ) / denominator
+        self.deltaE = - (
+            (g1 * (gm2 - gm3) - g2 * gm2 + g3 * gm3) * gm1 +
+            (g2 * gm3 - g3 * gm3) * gm2
+            ) / denominator
+
+        if is_2port:
+            self.e30 = SweepSeries.from_datapoints(self.s21isolation).z[order]
+            s21m = SweepSeries.from_datapoints(self.s21through).z[order]
+            if not self.useIdealThrough:
+                gammaThrough = np.exp(
+                    -1j * 2 * math.pi * self.throughLength * f)
+                s21m = s21m / gammaThrough
+            self.e10e32 = (s21m - self.e30) * (1 - (self.e11 * self.e11))
+        else:
+            self.e30 = np.empty(0, dtype=np.complex128)
+            self.e10e32 = np.empty(0, dtype=np.complex128)
 
         self.isCalculated = True
+        if len(bad):
+            return (self.isCalculated,
+                    f"Two of short, open and load returned the same"
+                    f" values at {len(bad)} points,"
+                    f" first at frequency {short.freq[bad[0]]}Hz."
+                    f" The corrections there are taken from the"
+                    f" neighbouring points.")
         logger.debug("Calibration correctly calculated.")
         return self.isCalculated, "Calibration successful."
 
+    def gammaShort(self, freq: np.ndarray) -> np.ndarray:
+        """Reflection of the short standard at the given frequencies"""
+        f = np.asarray(freq, dtype=np.float64)
+        if self.useIdealShort:
+            return np.full(len(f), self.shortIdeal, dtype=np.complex128)
+        Zsp = 1j * 2 * math.pi * f * (self.shortL0 +
+                                      self.shortL1 * f +
+                                      self.shortL2 * f**2 +
+                                      self.shortL3 * f**3)
+        gammaShort = ((Zsp/50) - 1) / ((Zsp/50) + 1)
+        # (lower case) gamma = 2*pi*f
+        # e^j*2*gamma*length
+        # Referencing https://arxiv.org/pdf/1606.02446.pdf (18) - (21)
+        return gammaShort * np.exp(-1j * 2 * 2 * math.pi * f * self.shortLength)
+
+    def gammaOpen(self, freq: np.ndarray) -> np.ndarray:
+        """Reflection of the open standard at the given frequencies"""
+        f = np.asarray(freq, dtype=np.float64)
+        if self.useIdealOpen:
+            return np.full(len(f), self.openIdeal, dtype=np.complex128)
+        divisor = (
+            2 * math.pi * f * (
+                self.openC0 + self.openC1 * f +
+                self.openC2 * f**2 + self.openC3 * f**3)
+            )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            Zop = -1j / divisor
+            gammaOpen = ((Zop/50) - 1) / ((Zop/50) + 1)
+            g2 = gammaOpen * np.exp(-1j * 2 * 2 * math.pi * f * self.openLength)
+        return np.where(divisor != 0, g2, self.openIdeal)
+
+    def gammaLoad(self, freq: np.ndarray) -> np.ndarray:
+        """Reflection of the load standard at the given frequencies"""
+        f = np.asarray(freq, dtype=np.float64)
+        if self.useIdealLoad:
+            return np.full(len(f), self.loadIdeal, dtype=np.complex128)
+        Zl = self.loadR + (1j * 2 * math.pi * f * self.loadL)
+        g3 = ((Zl/50)-1) / ((Zl/50)+1)
+        return g3 * np.exp(-1j * 2 * 2 * math.pi * f * self.loadLength)
+
+    def errorTerms(self, freq: np.ndarray, names: List[str]) -> List[np.ndarray]:
+        """Look up the named error terms at the given frequencies
+
+        Uses the nearest calibration point or interpolates between
+        calibration points, depending on self.interpolation. Frequencies
+        outside the calibrated span get the values of the closest edge.
+        """
+        freq = np.asarray(freq, dtype=np.float64)
+        terms = [getattr(self, name) for name in names]
+        cal_freq = self.frequencies
+        if self.interpolation == "nearest" or len(cal_freq) < 2:
+            right = np.clip(np.searchsorted(cal_freq, freq), 0, len(cal_freq) - 1)
+            left = np.clip(right - 1, 0, len(cal_freq) - 1)
+            index = np.where(np.abs(freq - cal_freq[left]) <= np.abs(cal_freq[right] - freq),
+                             left, right)
+            return [t[index] for t in terms]
+        # Interpolation needs strictly increasing frequencies
+        cal_freq, unique = np.unique(cal_freq, return_index=True)
+        if self.interpolation == "linear" or len(cal_freq) < 3:
+            return [np.interp(freq, cal_freq, t[unique]) for t in terms]
+        freq = np.clip(freq, cal_freq[0], cal_freq[-1])
+        for name, t in zip(names, terms):
+            if name not in self._splines:
+                self._splines[name] = CubicSpline(cal_freq, t[unique])
+        return [self._splines[name](freq) for name in names]
+
+    def correct(self, frequencies: np.ndarray,
+                s11: np.ndarray,
+                s21: np.ndarray = None) -> (np.ndarray, np.ndarray):
+        """Apply the error correction to arrays of measured S11 and S21"""
+        frequencies = np.asarray(frequencies)
+        s11m = np.asarray(s11, dtype=np.complex128)
+        e00, e11, deltaE = self.errorTerms(
+            frequencies, ["e00", "e11", "deltaE"])
+        s11 = (s11m - e00) / ((s11m * e11) - deltaE)
+        if s21 is None or len(self.e10e32) == 0:
+            return s11, s21
+        s21m = np.asarray(s21, dtype=np.complex128)
+        e30, e10e32 = self.errorTerms(frequencies, ["e30", "e10e32"])
+        s21 = (s21m - e30) / e10e32
+        return s11, s21
+
     def correct11(self, re, im, freq):
-        s11m = np.complex(re, im)
-        distance = 10**10
-        index = 0
-        for i in range(len(self.s11short)):
-            if abs(self.s11short[i].freq - freq) < distance:
-                index = i
-                distance = abs(self.s11short[i].freq - freq)
-        # TODO: Interpolate with the adjacent data point to get better corrections?
-
-        s11 = (s11m - self.e00[index]) / ((s11m * self.e11[index]) - self.deltaE[index])
-        return s11.real, s11.imag
+        s11, _ = self.correct([freq], [complex(re, im)])
+        return s11[0].real, s11[0].imag
 
     def correct21(self, re, im, freq):
-        s21m = np.complex(re, im)
-        distance = 10**10
-        index = 0
-        for i in range(len(self.s21through)):
-            if abs(self.s21through[i].freq - freq) < distance:
-                index = i
-                distance = abs(self.s21through[i].freq - freq)
-        s21 = (s21m - self.e30[index]) / self.e10e32[index]
-        return s21.real, s21.imag
+        _, s21 = self.correct([freq], [0], [complex(re, im)])
+        return s21[0].real, s21[0].imag
+
+    @staticmethod
+    def correctDelay(frequencies: np.ndarray, s11: np.ndarray,
+                     s21: np.ndarray, delay) -> (np.ndarray, np.ndarray):
+        """Remove the offset delay from arrays of S11 and S21"""
+        phase = -1j * 2 * math.pi * np.asarray(frequencies) * delay
+        s11 = np.asarray(s11) * np.exp(2 * phase)
+        if len(s21):
+            s21 = np.asarray(s21) * np.exp(phase)
+        return s11, s21
 
     @staticmethod
     def correctDelay11(d: Datapoint, delay):
-        input_val = np.complex(d.re, d.im)
-        output = input_val * np.exp(np.complex(0, 1) * 2 * 2 * math.pi * d.freq * delay * -1)
+        input_val = complex(d.re, d.im)
+        output = input_val * np.exp(1j * 2 * 2 * math.pi * d.freq * delay * -1)
         return Datapoint(d.freq, output.real, output.imag)
 
     @staticmethod
     def correctDelay21(d: Datapoint, delay):
-        input_val = np.complex(d.re, d.im)
-        output = input_val * np.exp(np.complex(0, 1) * 2 * math.pi * d.freq * delay * -1)
+        input_val = complex(d.re, d.im)
+        output = input_val * np.exp(1j * 2 * math.pi * d.freq * delay * -1)
         return Datapoint(d.freq, output.real, output.imag)
 
     def saveCalibration(self, filename):
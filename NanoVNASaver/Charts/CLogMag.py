@@ -18,9 +18,11 @@ import math
 import logging
 from typing import List
 
+import numpy as np
 from PyQt5 import QtWidgets, QtGui
 
 from NanoVNASaver.RFTools import Datapoint
+from NanoVNASaver.SweepData import SweepSeries
 from .Frequency import FrequencyChart
 from .LogMag import LogMagChart
 
@@ -60,7 +62,12 @@ class CombinedLogMagChart(FrequencyChart):
     def setCombinedData(self, data11, data21):
         self.data11 = data11
         self.data21 = data21
-        self.update()
+        self.markDirty(0, len(data11))
+
+    def updateCombinedData(self, data11, data21, start: int, stop: int):
+        self.data11 = data11
+        self.data21 = data21
+        self.markDirty(start, stop)
 
     def setCombinedReference(self, data11, data21):
         self.reference11 = data11
@@ -121,45 +128,10 @@ class CombinedLogMagChart(FrequencyChart):
             self.minValue = minValue
         else:
             # Find scaling
-            minValue = 100
-            maxValue = 0
-            for d in self.data11:
-                logmag = self.logMag(d)
-                if math.isinf(logmag):
-                    continue
-                if logmag > maxValue:
-                    maxValue = logmag
-                if logmag < minValue:
-                    minValue = logmag
-            for d in self.data21:
-                logmag = self.logMag(d)
-                if math.isinf(logmag):
-                    continue
-                if logmag > maxValue:
-                    maxValue = logmag
-                if logmag < minValue:
-                    minValue = logmag
-
-            for d in self.reference11:
-                if d.freq < self.fstart or d.freq > self.fstop:
-                    continue
-                logmag = self.logMag(d)
-                if math.isinf(logmag):
-                    continue
-                if logmag > maxValue:
-                    maxValue = logmag
-                if logmag < minValue:
-                    minValue = logmag
-            for d in self.reference21:
-                if d.freq < self.fstart or d.freq > self.fstop:
-                    continue
-                logmag = self.logMag(d)
-                if math.isinf(logmag):
-                    continue
-                if logmag > maxValue:
-                    maxValue = logmag
-                if logmag < minValue:
-                    minValue = logmag
+            minValue, maxValue = self.dataRange(
+                self.logMags, 100, 0, self.data11, self.reference11)
+            minValue, maxValue = self.dataRange(
+                self.logMags, minValue, maxValue, self.data21, self.reference21)
 
             minValue = 10*math.floor(minValue/10)
             self.minValue = minValue
@@ -291,6 +263,12 @@ class CombinedLogMagChart(FrequencyChart):
             return None
         return self.topMargin + round((self.maxValue - logMag) / self.span * self.chartHeight)
 
+    def yPositions(self, data, y_function) -> np.ndarray:
+        if y_function != self.getYPosition:
+            return super().yPositions(data, y_function)
+        logMag = self.logMags(SweepSeries.from_datapoints(data))
+        return self.topMargin + np.round((self.maxValue - logMag) / self.span * self.chartHeight)
+
     def valueAtPosition(self, y) -> List[float]:
         absy = y - self.topMargin
         val = -1 * ((absy / self.chartHeight * self.span) - self.maxValue)
@@ -301,6 +279,9 @@ class CombinedLogMagChart(FrequencyChart):
             return -p.gain
         return p.gain
 
+    def logMags(self, series: SweepSeries) -> np.ndarray:
+        return series.returnLoss if self.isInverted else series.gain
+
     def copy(self):
         new_chart: LogMagChart = super().copy()
         new_chart.isInverted = self.isInverted
@@ -18,10 +18,12 @@ import math
 import logging
 from typing import List
 
+import numpy as np
 from PyQt5 import QtWidgets, QtGui
 
 from NanoVNASaver.RFTools import Datapoint
-from NanoVNASaver.SITools import Format, Value
+from NanoVNASaver.SITools import Format, format_value
+from NanoVNASaver.SweepData import SweepSeries
 from .Frequency import FrequencyChart
 
 logger = logging.getLogger(__name__)
@@ -91,22 +93,8 @@ class CapacitanceChart(FrequencyChart):
             self.minValue = minValue
         else:
             # Find scaling
-            minValue = 1
-            maxValue = -1
-            for d in self.data:
-                val = d.capacitiveEquivalent()
-                if val > maxValue:
-                    maxValue = val
-                if val < minValue:
-                    minValue = val
-            for d in self.reference:  # Also check min/max for the reference sweep
-                if d.freq < self.fstart or d.freq > self.fstop:
-                    continue
-                val = d.capacitiveEquivalent()
-                if val > maxValue:
-                    maxValue = val
-                if val < minValue:
-                    minValue = val
+            minValue, maxValue = self.dataRange(
+                lambda series: series.capacitiveEquivalent(), 1, -1)
             self.maxValue = maxValue
             self.minValue = minValue
 
@@ -123,7 +111,7 @@ class CapacitanceChart(FrequencyChart):
             y = self.topMargin + round((self.maxValue - val) / self.span * self.chartHeight)
             qp.setPen(self.textColor)
             if val != minValue:
-                valstr = str(Value(val, fmt=fmt))
+                valstr = format_value(val, fmt=fmt)
                 qp.drawText(3, y + 3, valstr)
             qp.setPen(QtGui.QPen(self.foregroundColor))
             qp.drawLine(self.leftMargin - 5, y, self.leftMargin + self.chartWidth, y)
@@ -132,8 +120,8 @@ class CapacitanceChart(FrequencyChart):
         qp.drawLine(self.leftMargin - 5, self.topMargin,
                     self.leftMargin + self.chartWidth, self.topMargin)
         qp.setPen(self.textColor)
-        qp.drawText(3, self.topMargin + 4, str(Value(maxValue, fmt=fmt)))
-        qp.drawText(3, self.chartHeight+self.topMargin, str(Value(minValue, fmt=fmt)))
+        qp.drawText(3, self.topMargin + 4, format_value(maxValue, fmt=fmt))
+        qp.drawText(3, self.chartHeight+self.topMargin, format_value(minValue, fmt=fmt))
         self.drawFrequencyTicks(qp)
 
         self.drawData(qp, self.data, self.sweepColor)
@@ -146,6 +134,12 @@ class CapacitanceChart(FrequencyChart):
             round((self.maxValue - d.capacitiveEquivalent()) /
                   self.span * self.chartHeight))
 
+    def yPositions(self, data, y_function) -> np.ndarray:
+        if y_function != self.getYPosition:
+            return super().yPositions(data, y_function)
+        values = SweepSeries.from_datapoints(data).capacitiveEquivalent()
+        return self.topMargin + np.round((self.maxValue - values) / self.span * self.chartHeight)
+
     def valueAtPosition(self, y) -> List[float]:
         absy = y - self.topMargin
         val = -1 * ((absy / self.chartHeight * self.span) - self.maxValue)
@@ -221,22 +215,8 @@ class InductanceChart(FrequencyChart):
             self.minValue = minValue
         else:
             # Find scaling
-            minValue = 1
-            maxValue = -1
-            for d in self.data:
-                val = d.inductiveEquivalent()
-                if val > maxValue:
-                    maxValue = val
-                if val < minValue:
-                    minValue = val
-            for d in self.reference:  # Also check min/max for the reference sweep
-                if d.freq < self.fstart or d.freq > self.fstop:
-                    continue
-                val = d.inductiveEquivalent()
-                if val > maxValue:
-                    maxValue = val
-                if val < minValue:
-                    minValue = val
+            minValue, maxValue = self.dataRange(
+                lambda series: series.inductiveEquivalent(), 1, -1)
             self.maxValue = maxValue
             self.minValue = minValue
 
@@ -253,7 +233,7 @@ class InductanceChart(FrequencyChart):
             y = self.topMargin + round((self.maxValue - val) / self.span * self.chartHeight)
             qp.setPen(self.textColor)
             if val != minValue:
-                valstr = str(Value(val, fmt=fmt))
+                valstr = format_value(val, fmt=fmt)
                 qp.drawText(3, y + 3, valstr)
             qp.setPen(QtGui.QPen(self.foregroundColor))
             qp.drawLine(self.leftMargin - 5, y, self.leftMargin + self.chartWidth, y)
@@ -262,8 +242,8 @@ class InductanceChart(FrequencyChart):
         qp.drawLine(self.leftMargin - 5, self.topMargin,
                     self.leftMargin + self.chartWidth, self.topMargin)
         qp.setPen(self.textColor)
-        qp.drawText(3, self.topMargin + 4, str(Value(maxValue, fmt=fmt)))
-        qp.drawText(3, self.chartHeight+self.topMargin, str(Value(minValue, fmt=fmt)))
+        qp.drawText(3, self.topMargin + 4, format_value(maxValue, fmt=fmt))
+        qp.drawText(3, self.chartHeight+self.topMargin, format_value(minValue, fmt=fmt))
         self.drawFrequencyTicks(qp)
 
         self.drawData(qp, self.data, self.sweepColor)
@@ -275,6 +255,12 @@ class InductanceChart(FrequencyChart):
                 round((self.maxValue - d.inductiveEquivalent()) /
                       self.span * self.chartHeight))
 
+    def yPositions(self, data, y_function) -> np.ndarray:
+        if y_function != self.getYPosition:
+            return super().yPositions(data, y_function)
+        values = SweepSeries.from_datapoints(data).inductiveEquivalent()
+        return self.topMargin + np.round((self.maxValue - values) / self.span * self.chartHeight)
+
     def valueAtPosition(self, y) -> List[float]:
         absy = y - self.topMargin
         val = -1 * ((absy / self.chartHeight * self.span) - self.maxValue)
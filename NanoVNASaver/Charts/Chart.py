@@ -15,9 +15,10 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import math
-from typing import List, Set
+from typing import List, Set, Tuple
 import logging
 
+import numpy as np
 from PyQt5 import QtWidgets, QtGui, QtCore
 from PyQt5.QtCore import pyqtSignal
 
@@ -26,6 +27,68 @@ from NanoVNASaver.Marker import Marker
 logger = logging.getLogger(__name__)
 
 
+class RenderSnapshot:
+    """What a chart draws, recorded for rasterising on another thread
+
+    The chart's drawing code runs on the GUI thread against a QPicture,
+    which keeps the painter commands along with copies of the polygons,
+    pens and texts they use. render() only plays them back into an
+    image and never touches the chart.
+    """
+    def __init__(self, chart: "Chart"):
+        self.size = chart.size()
+        self.ratio = chart.devicePixelRatioF()
+        self.background = chart.palette().color(chart.backgroundRole())
+        self.picture = QtGui.QPicture()
+        qp = QtGui.QPainter(self.picture)
+        # Start from the state a painter on the widget would have
+        qp.setFont(chart.font())
+        qp.setPen(chart.palette().color(chart.foregroundRole()))
+        qp.setBackground(chart.palette().brush(chart.backgroundRole()))
+        try:
+            chart.drawContents(qp)
+        finally:
+            qp.end()
+
+    def render(self) -> QtGui.QImage:
+        """Rasterise the recording into an image the size of the chart"""
+        image = QtGui.QImage(
+            int(self.size.width() * self.ratio),
+            int(self.size.height() * self.ratio),
+            QtGui.QImage.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(self.ratio)
+        image.fill(self.background)
+        qp = QtGui.QPainter(image)
+        try:
+            qp.drawPicture(0, 0, self.picture)
+        finally:
+            qp.end()
+        return image
+
+
+class RenderSignals(QtCore.QObject):
+    finished = pyqtSignal(object, QtGui.QImage)
+
+
+class ChartRenderer(QtCore.QRunnable):
+    """Rasterises a chart snapshot into a QImage on a thread pool thread"""
+    def __init__(self, snapshot: RenderSnapshot, name: str, key: tuple):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.snapshot = snapshot
+        self.name = name
+        self.key = key
+        self.signals = RenderSignals()
+
+    def run(self):
+        try:
+            image = self.snapshot.render()
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.exception("Rendering %s failed: %s", self.name, exc)
+            image = QtGui.QImage()
+        self.signals.finished.emit(self.key, image)
+
+
 class Chart(QtWidgets.QWidget):
     sweepColor = QtCore.Qt.darkYellow
     secondarySweepColor = QtCore.Qt.darkMagenta
@@ -62,6 +125,18 @@ class Chart(QtWidgets.QWidget):
     draggedBoxCurrent = (-1, -1)
     moveStartX = -1
     moveStartY = -1
+    # Range of data points changed since derived values were calculated
+    dirtyRange: Tuple[int, int] = None
+    # Changes whenever the data is modified, in place or not
+    dataVersion = 0
+    # Draw into an image on a worker thread and only blit it when painting
+    backgroundRendering = False
+    renderPool: QtCore.QThreadPool = None
+    renderGeneration = 0
+    renderedKey: tuple = None
+    renderedImage: QtGui.QImage = None
+    renderJob: ChartRenderer = None
+    renderRunning = False
 
     isPopout = False
     popoutRequested = pyqtSignal(object)
@@ -121,8 +196,96 @@ class Chart(QtWidgets.QWidget):
 
     def setData(self, data):
         self.data = data
+        self.markDirty(0, len(data))
+
+    def updateData(self, data, start: int, stop: int):
+        """Like setData, for a sweep of which only points start to stop changed"""
+        self.data = data
+        self.markDirty(start, stop)
+
+    def markDirty(self, start: int, stop: int):
+        """Recalculate the changed range now, or when shown if hidden"""
+        if self.dirtyRange is not None:
+            start = min(start, self.dirtyRange[0])
+            stop = max(stop, self.dirtyRange[1])
+        self.dirtyRange = (start, stop)
+        self.dataVersion += 1
+        if self.isVisible():
+            self.refresh()
+
+    def refresh(self):
+        self.recalculateDirty()
+        self.update()
+
+    def recalculateDirty(self):
+        if self.dirtyRange is not None:
+            start, stop = self.dirtyRange
+            self.dirtyRange = None
+            self.recalculate(start, stop)
+
+    def recalculate(self, start: int, stop: int):
+        """Update values derived from the data points start to stop"""
+
+    def showEvent(self, event: QtGui.QShowEvent):
+        super().showEvent(event)
+        if self.dirtyRange is not None:
+            self.refresh()
+
+    def update(self, *args):
+        # Anything asking for a repaint may have changed what is drawn
+        self.renderGeneration += 1
+        super().update(*args)
+
+    def setBackgroundRendering(self, background_rendering: bool):
+        self.backgroundRendering = background_rendering
+        self.renderedImage = None
+        self.renderedKey = None
         self.update()
 
+    def paintEvent(self, a0: QtGui.QPaintEvent) -> None:
+        qp = QtGui.QPainter(self)
+        if self.backgroundRendering:
+            self.drawRendered(qp)
+        else:
+            self.drawContents(qp)
+        self.drawOverlay(qp)
+        qp.end()
+
+    def drawContents(self, qp: QtGui.QPainter):
+        """Draw the chart with its data and markers"""
+
+    def drawOverlay(self, qp: QtGui.QPainter):
+        """Draw what follows the mouse, never part of a rendered image"""
+
+    def drawRendered(self, qp: QtGui.QPainter):
+        """Blit the last rendered image, starting a new render if it is stale"""
+        key = (self.renderGeneration, self.width(), self.height())
+        if key != self.renderedKey and not self.renderRunning:
+            self.startRender(key)
+        if self.renderedImage is not None and not self.renderedImage.isNull():
+            qp.drawImage(0, 0, self.renderedImage)
+
+    def startRender(self, key: tuple):
+        # Drawing is recorded here, the worker only rasterises
+        snapshot = RenderSnapshot(self)
+        if Chart.renderPool is None:
+            Chart.renderPool = QtCore.QThreadPool()
+        # The job stays referenced, the pool may still hold it after finished
+        self.renderRunning = True
+        self.renderJob = ChartRenderer(snapshot, self.name, key)
+        self.renderJob.signals.finished.connect(self.renderFinished)
+        Chart.renderPool.start(self.renderJob)
+
+    def renderFinished(self, key: tuple, image: QtGui.QImage):
+        self.renderRunning = False
+        if not self.backgroundRendering:
+            return
+        self.renderedKey = key
+        self.renderedImage = image
+        # Repaint without invalidating the image, a newer one is
+        # started from there if something changed while rendering
+        QtWidgets.QWidget.update(self)
+
     def setMarkers(self, markers):
         self.markers = markers
 
@@ -193,6 +356,18 @@ class Chart(QtWidgets.QWidget):
         self.filledMarkers = filled_markers
         self.update()
 
+    @staticmethod
+    def polygon(x: np.ndarray, y: np.ndarray) -> QtGui.QPolygonF:
+        """Build a QPolygonF from coordinate arrays without a Python loop"""
+        polygon = QtGui.QPolygonF(len(x))
+        if len(x) > 0:
+            buffer = polygon.data()
+            buffer.setsize(2 * len(x) * np.dtype(np.float64).itemsize)
+            points = np.frombuffer(buffer, dtype=np.float64).reshape(-1, 2)
+            points[:, 0] = x
+            points[:, 1] = y
+        return polygon
+
     @staticmethod
     def shortenFrequency(frequency: int) -> str:
         if frequency < 50000:
@@ -248,6 +423,7 @@ class Chart(QtWidgets.QWidget):
     def copy(self):
         new_chart = self.__class__(self.name)
         new_chart.data = self.data
+        new_chart.dirtyRange = self.dirtyRange
         new_chart.reference = self.reference
         new_chart.sweepColor = self.sweepColor
         new_chart.secondarySweepColor = self.secondarySweepColor
@@ -268,6 +444,7 @@ class Chart(QtWidgets.QWidget):
         new_chart.resize(self.width(), self.height())
         new_chart.setPointSize(self.pointSize)
         new_chart.setLineThickness(self.lineThickness)
+        new_chart.setBackgroundRendering(self.backgroundRendering)
         return new_chart
 
     def addSWRMarker(self, swr: float):
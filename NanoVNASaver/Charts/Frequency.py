@@ -16,17 +16,32 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import math
 import logging
-from typing import List
+from typing import Callable, List, Tuple
 
 import numpy as np
 from PyQt5 import QtWidgets, QtGui, QtCore
 
 from NanoVNASaver.RFTools import Datapoint, RFTools
+from NanoVNASaver.SweepData import SweepSeries
 from .Chart import Chart
 
 logger = logging.getLogger(__name__)
 
 
+def envelope(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Indices of the first, lowest, highest and last point of every pixel column
+
+    A polyline through only these points draws the same pixels as one
+    through all of them, as long as x is rounded and never decreases.
+    """
+    columns = np.flatnonzero(np.diff(x)) + 1
+    starts = np.concatenate(([0], columns))
+    ends = np.concatenate((columns, [len(x)]))
+    group = np.repeat(np.arange(len(starts)), ends - starts)
+    order = np.lexsort((y, group))
+    return np.unique(np.concatenate((starts, order[starts], order[ends - 1], ends - 1)))
+
+
 class FrequencyChart(Chart):
     fstart = 0
     fstop = 0
@@ -47,8 +62,16 @@ class FrequencyChart(Chart):
     bottomMargin = 20
     topMargin = 30
 
+    # Attributes the Y position of a value depends on, besides the size
+    yAxisAttributes = ("minValue", "maxValue", "span", "isInverted", "logarithmicY",
+                       "maxVSWR", "maxQ", "maxAngle", "unwrap", "maxDelay",
+                       "max", "max_real", "max_imag", "span_real", "span_imag")
+    # Number of drawn series to keep the screen coordinates of
+    drawCacheSize = 8
+
     def __init__(self, name):
         super().__init__(name)
+        self.drawCache = {}
 
         self.setContextMenuPolicy(QtCore.Qt.DefaultContextMenu)
         mode_group = QtWidgets.QActionGroup(self)
@@ -248,6 +271,96 @@ class FrequencyChart(Chart):
             return self.leftMargin + round(self.chartWidth * (d.freq - self.fstart) / span)
         return math.floor(self.width()/2)
 
+    def xPositions(self, freq: np.ndarray) -> np.ndarray:
+        """getXPosition for an array of frequencies"""
+        span = self.fstop - self.fstart
+        if span <= 0:
+            return np.full(len(freq), math.floor(self.width()/2), dtype=np.float64)
+        if self.logarithmicX:
+            span = math.log(self.fstop) - math.log(self.fstart)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                position = (np.log(freq) - math.log(self.fstart)) / span
+        else:
+            position = (freq - self.fstart) / span
+        return self.leftMargin + np.round(self.chartWidth * position)
+
+    def yPositions(self, data, y_function) -> np.ndarray:
+        """y_function for every point of data, NaN where it has no position
+
+        Charts override this to calculate their Y positions vectorised.
+        """
+        return np.fromiter(
+            (math.nan if y is None else y for y in map(y_function, data)),
+            dtype=np.float64, count=len(data))
+
+    def dataRange(self, values: Callable[[SweepSeries], np.ndarray],
+                  minimum: float, maximum: float,
+                  data=None, reference=None) -> Tuple[float, float]:
+        """minimum and maximum widened to cover values of the data
+
+        values maps a series to the plotted quantity, usually one of the
+        derived series it caches. data and reference default to the
+        chart's, the reference only counts within the shown span. NaN
+        and infinite values are ignored.
+        """
+        data = self.data if data is None else data
+        reference = self.reference if reference is None else reference
+        ranges = [values(SweepSeries.from_datapoints(data))]
+        if len(reference) > 0:
+            ref = SweepSeries.from_datapoints(reference)
+            in_span = (ref.freq >= self.fstart) & (ref.freq <= self.fstop)
+            ranges.append(values(ref)[in_span])
+        for vals in ranges:
+            vals = vals[np.isfinite(vals)]
+            if len(vals) > 0:
+                minimum = min(minimum, float(vals.min()))
+                maximum = max(maximum, float(vals.max()))
+        return minimum, maximum
+
+    def dataPolygons(self, data, y_function) -> Tuple[QtGui.QPolygonF, List[QtGui.QPolygonF]]:
+        """Screen coordinates of data as plotable points and line strips
+
+        Sweeps with more points than the chart has pixel columns are
+        reduced to the distinct pixels and per-column envelopes, so the
+        cost of painting depends on the width rather than the sweep.
+        The result is cached until the data, the size or the axes change.
+        """
+        key = (id(data), len(data), self.dataVersion, y_function,
+               self.fstart, self.fstop, self.logarithmicX,
+               self.leftMargin, self.topMargin, self.chartWidth, self.chartHeight,
+               tuple(getattr(self, name, None) for name in self.yAxisAttributes))
+        cached = self.drawCache.get(key)
+        if cached is not None and cached[0] is data:
+            return cached[1], cached[2]
+
+        series = SweepSeries.from_datapoints(data)
+        x = self.xPositions(series.freq)
+        y = self.yPositions(data, y_function)
+        valid = np.isfinite(x) & np.isfinite(y)
+        plotable = (valid &
+                    (x >= self.leftMargin) & (x <= self.leftMargin + self.chartWidth) &
+                    (y >= self.topMargin) & (y <= self.topMargin + self.chartHeight))
+        x_points, y_points = x[plotable], y[plotable]
+        if len(x_points) > self.chartWidth:
+            x_points, y_points = np.unique(np.column_stack((x_points, y_points)), axis=0).T
+        points = self.polygon(x_points, y_points)
+        # Lines are broken where a point has no position
+        lines = []
+        bounds = np.flatnonzero(np.diff(np.concatenate(([0], valid.view(np.int8), [0]))))
+        for start, stop in zip(bounds[::2], bounds[1::2]):
+            if stop - start < 2:
+                continue
+            x_line, y_line = x[start:stop], y[start:stop]
+            if len(x_line) > 2 * self.chartWidth and np.all(np.diff(x_line) >= 0):
+                keep = envelope(x_line, y_line)
+                x_line, y_line = x_line[keep], y_line[keep]
+            lines.append(self.polygon(x_line, y_line))
+
+        if len(self.drawCache) >= self.drawCacheSize:
+            self.drawCache.clear()
+        self.drawCache[key] = (data, points, lines)
+        return points, lines
+
     def frequencyAtPosition(self, x, limit=True) -> int:
         """
         Calculates the frequency at a given X-position
@@ -403,10 +516,10 @@ class FrequencyChart(Chart):
     def resizeEvent(self, a0: QtGui.QResizeEvent) -> None:
         self.chartWidth = a0.size().width()-self.rightMargin-self.leftMargin
         self.chartHeight = a0.size().height() - self.bottomMargin - self.topMargin
+        self.drawCache.clear()
         self.update()
 
-    def paintEvent(self, a0: QtGui.QPaintEvent) -> None:
-        qp = QtGui.QPainter(self)
+    def drawContents(self, qp: QtGui.QPainter):
         self.drawChart(qp)
         self.drawValues(qp)
         if (len(self.data) > 0 and
@@ -423,6 +536,8 @@ class FrequencyChart(Chart):
             qp.drawText(self.leftMargin + self.chartWidth/2 - 70,
                         self.topMargin + self.chartHeight/2 - 20,
                         "Data outside frequency span")
+
+    def drawOverlay(self, qp: QtGui.QPainter):
         if self.draggedBox and self.draggedBoxCurrent[0] != -1:
             dashed_pen = QtGui.QPen(self.foregroundColor, 1, QtCore.Qt.DashLine)
             qp.setPen(dashed_pen)
@@ -430,7 +545,6 @@ class FrequencyChart(Chart):
             bottom_right = QtCore.QPoint(self.draggedBoxCurrent[0], self.draggedBoxCurrent[1])
             rect = QtCore.QRect(top_left, bottom_right)
             qp.drawRect(rect)
-        qp.end()
 
     def drawChart(self, qp: QtGui.QPainter):
         qp.setPen(QtGui.QPen(self.textColor))
@@ -497,33 +611,23 @@ class FrequencyChart(Chart):
                  color: QtGui.QColor, y_function=None):
         if y_function is None:
             y_function = self.getYPosition
+        if len(data) == 0:
+            return
+        points, lines = self.dataPolygons(data, y_function)
+        if self.drawLines:
+            line_pen = QtGui.QPen(color)
+            line_pen.setWidth(self.lineThickness)
+            qp.save()
+            qp.setPen(line_pen)
+            qp.setClipRect(self.leftMargin, self.topMargin,
+                           self.chartWidth + 1, self.chartHeight + 1)
+            for line in lines:
+                qp.drawPolyline(line)
+            qp.restore()
         pen = QtGui.QPen(color)
         pen.setWidth(self.pointSize)
-        line_pen = QtGui.QPen(color)
-        line_pen.setWidth(self.lineThickness)
         qp.setPen(pen)
-        for i, d in enumerate(data):
-            x = self.getXPosition(d)
-            y = y_function(d)
-            if y is None:
-                continue
-            if self.isPlotable(x, y):
-                qp.drawPoint(int(x), int(y))
-            if self.drawLines and i > 0:
-                prevx = self.getXPosition(data[i - 1])
-                prevy = y_function(data[i - 1])
-                if prevy is None:
-                    continue
-                qp.setPen(line_pen)
-                if self.isPlotable(x, y) and self.isPlotable(prevx, prevy):
-                    qp.drawLine(x, y, prevx, prevy)
-                elif self.isPlotable(x, y) and not self.isPlotable(prevx, prevy):
-                    new_x, new_y = self.getPlotable(x, y, prevx, prevy)
-                    qp.drawLine(x, y, new_x, new_y)
-                elif not self.isPlotable(x, y) and self.isPlotable(prevx, prevy):
-                    new_x, new_y = self.getPlotable(prevx, prevy, x, y)
-                    qp.drawLine(prevx, prevy, new_x, new_y)
-                qp.setPen(pen)
+        qp.drawPoints(points)
 
     def drawMarkers(self, qp, data=None, y_function=None):
         if data is None:
@@ -23,6 +23,7 @@ import numpy as np
 from PyQt5 import QtWidgets, QtGui
 
 from NanoVNASaver.RFTools import Datapoint
+from NanoVNASaver.SweepData import SweepSeries
 from .Frequency import FrequencyChart
 logger = logging.getLogger(__name__)
 
@@ -41,8 +42,8 @@ class GroupDelayChart(FrequencyChart):
 
         self.reflective = reflective
 
-        self.groupDelay = []
-        self.groupDelayReference = []
+        self.groupDelay = np.empty(0)
+        self.groupDelayReference = np.empty(0)
 
         self.minDisplayValue = -180
         self.maxDisplayValue = 180
@@ -60,69 +61,40 @@ class GroupDelayChart(FrequencyChart):
         new_chart: GroupDelayChart = super().copy()
         new_chart.reflective = self.reflective
         new_chart.groupDelay = self.groupDelay.copy()
-        new_chart.groupDelayReference = self.groupDelay.copy()
+        new_chart.groupDelayReference = self.groupDelayReference.copy()
         return new_chart
 
     def setReference(self, data):
         self.reference = data
-
-        self.calculateGroupDelay()
-
-    def setData(self, data):
-        self.data = data
-
-        self.calculateGroupDelay()
-
-    def calculateGroupDelay(self):
-        rawData = []
-        for d in self.data:
-            rawData.append(d.phase)
-
-        rawReference = []
-        for d in self.reference:
-            rawReference.append(d.phase)
-
-        if len(self.data) > 1:
-            unwrappedData = np.degrees(np.unwrap(rawData))
-            self.groupDelay = []
-            for i in range(len(self.data)):
-                # TODO: Replace with call to RFTools.groupDelay
-                if i == 0:
-                    phase_change = unwrappedData[1] - unwrappedData[0]
-                    freq_change = self.data[1].freq - self.data[0].freq
-                elif i == len(self.data)-1:
-                    idx = len(self.data)-1
-                    phase_change = unwrappedData[idx] - unwrappedData[idx-1]
-                    freq_change = self.data[idx].freq - self.data[idx-1].freq
-                else:
-                    phase_change = unwrappedData[i+1] - unwrappedData[i-1]
-                    freq_change = self.data[i+1].freq - self.data[i-1].freq
-                delay = (-phase_change / (freq_change * 360)) * 10e8
-                if not self.reflective:
-                    delay /= 2
-                self.groupDelay.append(delay)
-
-        if len(self.reference) > 1:
-            unwrappedReference = np.degrees(np.unwrap(rawReference))
-            self.groupDelayReference = []
-            for i in range(len(self.reference)):
-                if i == 0:
-                    phase_change = unwrappedReference[1] - unwrappedReference[0]
-                    freq_change = self.reference[1].freq - self.reference[0].freq
-                elif i == len(self.reference)-1:
-                    idx = len(self.reference)-1
-                    phase_change = unwrappedReference[idx] - unwrappedReference[idx-1]
-                    freq_change = self.reference[idx].freq - self.reference[idx-1].freq
-                else:
-                    phase_change = unwrappedReference[i+1] - unwrappedReference[i-1]
-                    freq_change = self.reference[i+1].freq - self.reference[i-1].freq
-                delay = (-phase_change / (freq_change * 360)) * 10e8
-                if not self.reflective:
-                    delay /= 2
-                self.groupDelayReference.append(delay)
-
+        self.groupDelayReference = self.calculateGroupDelay(self.reference)
         self.update()
 
+    def recalculate(self, start: int, stop: int):
+        count = len(self.data)
+        if len(self.groupDelay) != count or (start == 0 and stop >= count):
+            # New data, shared with the markers and the other charts
+            self.groupDelay = self.calculateGroupDelay(self.data)
+            return
+        if not self.groupDelay.flags.writeable:
+            self.groupDelay = self.groupDelay.copy()
+        # The delay of a point depends on its neighbours
+        low = max(0, start - 1)
+        high = min(count, stop + 1)
+        window = max(0, low - 1)
+        delay = self.calculateGroupDelay(self.data[window:min(count, high + 1)])
+        self.groupDelay[low:high] = delay[low - window:high - window]
+
+    def calculateGroupDelay(self, data) -> np.ndarray:
+        """Group delay in ns of every point of data"""
+        series = SweepSeries.from_datapoints(data)
+
+        def delay_ns() -> np.ndarray:
+            delay = series.groupDelay() * 1e9
+            if not self.reflective:
+                delay /= 2
+            return delay
+        return series.cached(("groupDelayNs", self.reflective), delay_ns)
+
     def drawChart(self, qp: QtGui.QPainter):
         qp.setPen(QtGui.QPen(self.textColor))
         qp.drawText(3, 15, self.name + " (ns)")
@@ -135,6 +107,8 @@ class GroupDelayChart(FrequencyChart):
     def drawValues(self, qp: QtGui.QPainter):
         if len(self.data) == 0 and len(self.reference) == 0:
             return
+        # Hidden charts can still be rendered, e.g. into a screenshot
+        self.recalculateDirty()
         pen = QtGui.QPen(self.sweepColor)
         pen.setWidth(self.pointSize)
         line_pen = QtGui.QPen(self.sweepColor)
@@ -202,56 +176,8 @@ class GroupDelayChart(FrequencyChart):
 
         self.drawFrequencyTicks(qp)
 
-        color = self.sweepColor
-        pen = QtGui.QPen(color)
-        pen.setWidth(self.pointSize)
-        line_pen = QtGui.QPen(color)
-        line_pen.setWidth(self.lineThickness)
-        qp.setPen(pen)
-        for i in range(len(self.data)):
-            x = self.getXPosition(self.data[i])
-            y = self.getYPositionFromDelay(self.groupDelay[i])
-            if self.isPlotable(x, y):
-                qp.drawPoint(int(x), int(y))
-            if self.drawLines and i > 0:
-                prevx = self.getXPosition(self.data[i - 1])
-                prevy = self.getYPositionFromDelay(self.groupDelay[i - 1])
-                qp.setPen(line_pen)
-                if self.isPlotable(x, y) and self.isPlotable(prevx, prevy):
-                    qp.drawLine(x, y, prevx, prevy)
-                elif self.isPlotable(x, y) and not self.isPlotable(prevx, prevy):
-                    new_x, new_y = self.getPlotable(x, y, prevx, prevy)
-                    qp.drawLine(x, y, new_x, new_y)
-                elif not self.isPlotable(x, y) and self.isPlotable(prevx, prevy):
-                    new_x, new_y = self.getPlotable(prevx, prevy, x, y)
-                    qp.drawLine(prevx, prevy, new_x, new_y)
-                qp.setPen(pen)
-
-        color = self.referenceColor
-        pen = QtGui.QPen(color)
-        pen.setWidth(self.pointSize)
-        line_pen = QtGui.QPen(color)
-        line_pen.setWidth(self.lineThickness)
-        qp.setPen(pen)
-        for i in range(len(self.reference)):
-            x = self.getXPosition(self.reference[i])
-            y = self.getYPositionFromDelay(self.groupDelayReference[i])
-            if self.isPlotable(x, y):
-                qp.drawPoint(int(x), int(y))
-            if self.drawLines and i > 0:
-                prevx = self.getXPosition(self.reference[i - 1])
-                prevy = self.getYPositionFromDelay(self.groupDelayReference[i - 1])
-                qp.setPen(line_pen)
-                if self.isPlotable(x, y) and self.isPlotable(prevx, prevy):
-                    qp.drawLine(x, y, prevx, prevy)
-                elif self.isPlotable(x, y) and not self.isPlotable(prevx, prevy):
-                    new_x, new_y = self.getPlotable(x, y, prevx, prevy)
-                    qp.drawLine(x, y, new_x, new_y)
-                elif not self.isPlotable(x, y) and self.isPlotable(prevx, prevy):
-                    new_x, new_y = self.getPlotable(prevx, prevy, x, y)
-                    qp.drawLine(prevx, prevy, new_x, new_y)
-                qp.setPen(pen)
-
+        self.drawData(qp, self.data, self.sweepColor)
+        self.drawData(qp, self.reference, self.referenceColor)
         self.drawMarkers(qp)
 
     def getYPosition(self, d: Datapoint) -> int:
@@ -264,6 +190,17 @@ class GroupDelayChart(FrequencyChart):
             delay = 0
         return self.getYPositionFromDelay(delay)
 
+    def yPositions(self, data, y_function) -> np.ndarray:
+        if y_function != self.getYPosition:
+            return super().yPositions(data, y_function)
+        if data is self.data:
+            delay = self.groupDelay
+        elif data is self.reference:
+            delay = self.groupDelayReference
+        else:
+            delay = np.zeros(len(data))
+        return self.topMargin + np.round((self.maxDelay - delay) / self.span * self.chartHeight)
+
     def getYPositionFromDelay(self, delay: float):
         return self.topMargin + round((self.maxDelay - delay) / self.span * self.chartHeight)
 
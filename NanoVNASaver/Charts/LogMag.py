@@ -18,9 +18,11 @@ import math
 import logging
 from typing import List
 
+import numpy as np
 from PyQt5 import QtWidgets, QtGui
 
 from NanoVNASaver.RFTools import Datapoint
+from NanoVNASaver.SweepData import SweepSeries
 from .Frequency import FrequencyChart
 
 logger = logging.getLogger(__name__)
@@ -93,26 +95,7 @@ class LogMagChart(FrequencyChart):
             self.minValue = minValue
         else:
             # Find scaling
-            minValue = 100
-            maxValue = -100
-            for d in self.data:
-                logmag = self.logMag(d)
-                if math.isinf(logmag):
-                    continue
-                if logmag > maxValue:
-                    maxValue = logmag
-                if logmag < minValue:
-                    minValue = logmag
-            for d in self.reference:  # Also check min/max for the reference sweep
-                if d.freq < self.fstart or d.freq > self.fstop:
-                    continue
-                logmag = self.logMag(d)
-                if math.isinf(logmag):
-                    continue
-                if logmag > maxValue:
-                    maxValue = logmag
-                if logmag < minValue:
-                    minValue = logmag
+            minValue, maxValue = self.dataRange(self.logMags, 100, -100)
 
             minValue = 10*math.floor(minValue/10)
             self.minValue = minValue
@@ -209,6 +192,12 @@ class LogMagChart(FrequencyChart):
             return None
         return self.topMargin + round((self.maxValue - logMag) / self.span * self.chartHeight)
 
+    def yPositions(self, data, y_function) -> np.ndarray:
+        if y_function != self.getYPosition:
+            return super().yPositions(data, y_function)
+        logMag = self.logMags(SweepSeries.from_datapoints(data))
+        return self.topMargin + np.round((self.maxValue - logMag) / self.span * self.chartHeight)
+
     def valueAtPosition(self, y) -> List[float]:
         absy = y - self.topMargin
         val = -1 * ((absy / self.chartHeight * self.span) - self.maxValue)
@@ -219,6 +208,9 @@ class LogMagChart(FrequencyChart):
             return -p.gain
         return p.gain
 
+    def logMags(self, series: SweepSeries) -> np.ndarray:
+        return series.returnLoss if self.isInverted else series.gain
+
     def copy(self):
         new_chart: LogMagChart = super().copy()
         new_chart.isInverted = self.isInverted
@@ -18,10 +18,12 @@ import math
 import logging
 from typing import List, Set
 
+import numpy as np
 from PyQt5 import QtWidgets, QtGui
 
 from NanoVNASaver.RFTools import Datapoint, RFTools
 from NanoVNASaver.SITools import Format, Value
+from NanoVNASaver.SweepData import SweepSeries
 from .Frequency import FrequencyChart
 logger = logging.getLogger(__name__)
 
@@ -85,22 +87,7 @@ class MagnitudeChart(FrequencyChart):
             self.minValue = minValue
         else:
             # Find scaling
-            minValue = 100
-            maxValue = 0
-            for d in self.data:
-                mag = self.magnitude(d)
-                if mag > maxValue:
-                    maxValue = mag
-                if mag < minValue:
-                    minValue = mag
-            for d in self.reference:  # Also check min/max for the reference sweep
-                if d.freq < self.fstart or d.freq > self.fstop:
-                    continue
-                mag = self.magnitude(d)
-                if mag > maxValue:
-                    maxValue = mag
-                if mag < minValue:
-                    minValue = mag
+            minValue, maxValue = self.dataRange(self.magnitudes, 100, 0)
 
             minValue = 10*math.floor(minValue/10)
             self.minValue = minValue
@@ -153,6 +140,12 @@ class MagnitudeChart(FrequencyChart):
         mag = self.magnitude(d)
         return self.topMargin + round((self.maxValue - mag) / self.span * self.chartHeight)
 
+    def yPositions(self, data, y_function) -> np.ndarray:
+        if y_function != self.getYPosition:
+            return super().yPositions(data, y_function)
+        mag = self.magnitudes(SweepSeries.from_datapoints(data))
+        return self.topMargin + np.round((self.maxValue - mag) / self.span * self.chartHeight)
+
     def valueAtPosition(self, y) -> List[float]:
         absy = y - self.topMargin
         val = -1 * ((absy / self.chartHeight * self.span) - self.maxValue)
@@ -162,6 +155,11 @@ class MagnitudeChart(FrequencyChart):
     def magnitude(p: Datapoint) -> float:
         return math.sqrt(p.re**2 + p.im**2)
 
+    @staticmethod
+    def magnitudes(series: SweepSeries) -> np.ndarray:
+        return series.cached(("magnitude",),
+                             lambda: np.sqrt(series.re**2 + series.im**2))
+
     def copy(self):
         new_chart: LogMagChart = super().copy()
         new_chart.span = self.span
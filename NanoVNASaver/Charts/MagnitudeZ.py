@@ -18,9 +18,11 @@ import math
 import logging
 from typing import List
 
+import numpy as np
 from PyQt5 import QtWidgets, QtGui
 
 from NanoVNASaver.RFTools import Datapoint
+from NanoVNASaver.SweepData import SweepSeries
 from .Frequency import FrequencyChart
 from .LogMag import LogMagChart
 
@@ -83,22 +85,7 @@ class MagnitudeZChart(FrequencyChart):
             self.minValue = minValue
         else:
             # Find scaling
-            minValue = 100
-            maxValue = 0
-            for d in self.data:
-                mag = self.magnitude(d)
-                if mag > maxValue:
-                    maxValue = mag
-                if mag < minValue:
-                    minValue = mag
-            for d in self.reference:  # Also check min/max for the reference sweep
-                if d.freq < self.fstart or d.freq > self.fstop:
-                    continue
-                mag = self.magnitude(d)
-                if mag > maxValue:
-                    maxValue = mag
-                if mag < minValue:
-                    minValue = mag
+            minValue, maxValue = self.dataRange(self.magnitudes, 100, 0)
 
             minValue = 10*math.floor(minValue/10)
             self.minValue = minValue
@@ -142,6 +129,12 @@ class MagnitudeZChart(FrequencyChart):
         mag = self.magnitude(d)
         return self.topMargin + round((self.maxValue - mag) / self.span * self.chartHeight)
 
+    def yPositions(self, data, y_function) -> np.ndarray:
+        if y_function != self.getYPosition:
+            return super().yPositions(data, y_function)
+        mag = self.magnitudes(SweepSeries.from_datapoints(data))
+        return self.topMargin + np.round((self.maxValue - mag) / self.span * self.chartHeight)
+
     def valueAtPosition(self, y) -> List[float]:
         absy = y - self.topMargin
         val = -1 * ((absy / self.chartHeight * self.span) - self.maxValue)
@@ -151,6 +144,10 @@ class MagnitudeZChart(FrequencyChart):
     def magnitude(p: Datapoint) -> float:
         return abs(p.impedance())
 
+    @staticmethod
+    def magnitudes(series: SweepSeries) -> np.ndarray:
+        return series.cached(("magnitudeZ",), lambda: np.abs(series.impedance()))
+
     def copy(self):
         new_chart: LogMagChart = super().copy()
         new_chart.span = self.span
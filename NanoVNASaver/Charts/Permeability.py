@@ -18,11 +18,13 @@ import math
 import logging
 from typing import List
 
+import numpy as np
 from PyQt5 import QtWidgets, QtGui
 
 from NanoVNASaver.Marker import Marker
 from NanoVNASaver.RFTools import Datapoint
-from NanoVNASaver.SITools import Format, Value
+from NanoVNASaver.SITools import Format, format_value
+from NanoVNASaver.SweepData import SweepSeries
 from .Frequency import FrequencyChart
 logger = logging.getLogger(__name__)
 
@@ -95,12 +97,6 @@ class PermeabilityChart(FrequencyChart):
     def drawValues(self, qp: QtGui.QPainter):
         if len(self.data) == 0 and len(self.reference) == 0:
             return
-        pen = QtGui.QPen(self.sweepColor)
-        pen.setWidth(self.pointSize)
-        line_pen = QtGui.QPen(self.sweepColor)
-        line_pen.setWidth(self.lineThickness)
-        highlighter = QtGui.QPen(QtGui.QColor(20, 0, 255))
-        highlighter.setWidth(1)
         if self.fixedSpan:
             fstart = self.minFrequency
             fstop = self.maxFrequency
@@ -123,36 +119,10 @@ class PermeabilityChart(FrequencyChart):
             min_val = self.minDisplayValue
             max_val = self.maxDisplayValue
         else:
-            min_val = 1000
-            max_val = -1000
-            for d in self.data:
-                imp = d.impedance()
-                re, im = imp.real, imp.imag
-                re = re * 10e6 / d.freq
-                im = im * 10e6 / d.freq
-                if re > max_val:
-                    max_val = re
-                if re < min_val:
-                    min_val = re
-                if im > max_val:
-                    max_val = im
-                if im < min_val:
-                    min_val = im
-            for d in self.reference:  # Also check min/max for the reference sweep
-                if d.freq < fstart or d.freq > fstop:
-                    continue
-                imp = d.impedance()
-                re, im = imp.real, imp.imag
-                re = re * 10e6 / d.freq
-                im = im * 10e6 / d.freq
-                if re > max_val:
-                    max_val = re
-                if re < min_val:
-                    min_val = re
-                if im > max_val:
-                    max_val = im
-                if im < min_val:
-                    min_val = im
+            min_val, max_val = self.dataRange(
+                lambda series: self.permeabilities(series).real, 1000, -1000)
+            min_val, max_val = self.dataRange(
+                lambda series: self.permeabilities(series).imag, min_val, max_val)
 
         if self.logarithmicY:
             min_val = max(0.01, min_val)
@@ -173,17 +143,15 @@ class PermeabilityChart(FrequencyChart):
             qp.drawLine(self.leftMargin - 5, y,
                         self.leftMargin + self.chartWidth + 5, y)
             qp.setPen(QtGui.QPen(self.textColor))
-            val = Value(self.valueAtPosition(y)[0], fmt=fmt)
-            qp.drawText(3, y + 4, str(val))
+            qp.drawText(3, y + 4,
+                        format_value(self.valueAtPosition(y)[0], fmt=fmt))
 
         qp.drawText(3,
                     self.chartHeight + self.topMargin,
-                    str(Value(min_val, fmt=fmt)))
+                    format_value(min_val, fmt=fmt))
 
         self.drawFrequencyTicks(qp)
 
-        primary_pen = pen
-        secondary_pen = QtGui.QPen(self.secondarySweepColor)
         if len(self.data) > 0:
             c = QtGui.QColor(self.sweepColor)
             c.setAlpha(255)
@@ -199,53 +167,6 @@ class PermeabilityChart(FrequencyChart):
                 self.leftMargin + self.chartWidth, 9,
                 self.leftMargin + self.chartWidth + 5, 9)
 
-        primary_pen.setWidth(self.pointSize)
-        secondary_pen.setWidth(self.pointSize)
-        line_pen.setWidth(self.lineThickness)
-
-        for i in range(len(self.data)):
-            x = self.getXPosition(self.data[i])
-            y_re = self.getReYPosition(self.data[i])
-            y_im = self.getImYPosition(self.data[i])
-            qp.setPen(primary_pen)
-            if self.isPlotable(x, y_re):
-                qp.drawPoint(x, y_re)
-            qp.setPen(secondary_pen)
-            if self.isPlotable(x, y_im):
-                qp.drawPoint(x, y_im)
-            if self.drawLines and i > 0:
-                prev_x = self.getXPosition(self.data[i - 1])
-                prev_y_re = self.getReYPosition(self.data[i-1])
-                prev_y_im = self.getImYPosition(self.data[i-1])
-
-                # Real part first
-                line_pen.setColor(self.sweepColor)
-                qp.setPen(line_pen)
-                if self.isPlotable(x, y_re) and self.isPlotable(prev_x, prev_y_re):
-                    qp.drawLine(x, y_re, prev_x, prev_y_re)
-                elif self.isPlotable(x, y_re) and not self.isPlotable(prev_x, prev_y_re):
-                    new_x, new_y = self.getPlotable(x, y_re, prev_x, prev_y_re)
-                    qp.drawLine(x, y_re, new_x, new_y)
-                elif not self.isPlotable(x, y_re) and self.isPlotable(prev_x, prev_y_re):
-                    new_x, new_y = self.getPlotable(prev_x, prev_y_re, x, y_re)
-                    qp.drawLine(prev_x, prev_y_re, new_x, new_y)
-
-                # Imag part second
-                line_pen.setColor(self.secondarySweepColor)
-                qp.setPen(line_pen)
-                if self.isPlotable(x, y_im) and self.isPlotable(prev_x, prev_y_im):
-                    qp.drawLine(x, y_im, prev_x, prev_y_im)
-                elif self.isPlotable(x, y_im) and not self.isPlotable(prev_x, prev_y_im):
-                    new_x, new_y = self.getPlotable(x, y_im, prev_x, prev_y_im)
-                    qp.drawLine(x, y_im, new_x, new_y)
-                elif not self.isPlotable(x, y_im) and self.isPlotable(prev_x, prev_y_im):
-                    new_x, new_y = self.getPlotable(prev_x, prev_y_im, x, y_im)
-                    qp.drawLine(prev_x, prev_y_im, new_x, new_y)
-
-        primary_pen.setColor(self.referenceColor)
-        line_pen.setColor(self.referenceColor)
-        secondary_pen.setColor(self.secondaryReferenceColor)
-        qp.setPen(primary_pen)
         if len(self.reference) > 0:
             c = QtGui.QColor(self.referenceColor)
             c.setAlpha(255)
@@ -261,56 +182,12 @@ class PermeabilityChart(FrequencyChart):
             qp.drawLine(self.leftMargin + self.chartWidth, 14,
                         self.leftMargin + self.chartWidth + 5, 14)
 
-        for i in range(len(self.reference)):
-            if self.reference[i].freq < fstart or self.reference[i].freq > fstop:
-                continue
-            x = self.getXPosition(self.reference[i])
-            y_re = self.getReYPosition(self.reference[i])
-            y_im = self.getImYPosition(self.reference[i])
-            qp.setPen(primary_pen)
-            if self.isPlotable(x, y_re):
-                qp.drawPoint(x, y_re)
-            qp.setPen(secondary_pen)
-            if self.isPlotable(x, y_im):
-                qp.drawPoint(x, y_im)
-            if self.drawLines and i > 0:
-                prev_x = self.getXPosition(self.reference[i - 1])
-                prev_y_re = self.getReYPosition(self.reference[i-1])
-                prev_y_im = self.getImYPosition(self.reference[i-1])
-
-                line_pen.setColor(self.referenceColor)
-                qp.setPen(line_pen)
-                # Real part first
-                if self.isPlotable(x, y_re) and self.isPlotable(prev_x, prev_y_re):
-                    qp.drawLine(x, y_re, prev_x, prev_y_re)
-                elif self.isPlotable(x, y_re) and not self.isPlotable(prev_x, prev_y_re):
-                    new_x, new_y = self.getPlotable(x, y_re, prev_x, prev_y_re)
-                    qp.drawLine(x, y_re, new_x, new_y)
-                elif not self.isPlotable(x, y_re) and self.isPlotable(prev_x, prev_y_re):
-                    new_x, new_y = self.getPlotable(prev_x, prev_y_re, x, y_re)
-                    qp.drawLine(prev_x, prev_y_re, new_x, new_y)
-
-                line_pen.setColor(self.secondaryReferenceColor)
-                qp.setPen(line_pen)
-                # Imag part second
-                if self.isPlotable(x, y_im) and self.isPlotable(prev_x, prev_y_im):
-                    qp.drawLine(x, y_im, prev_x, prev_y_im)
-                elif self.isPlotable(x, y_im) and not self.isPlotable(prev_x, prev_y_im):
-                    new_x, new_y = self.getPlotable(x, y_im, prev_x, prev_y_im)
-                    qp.drawLine(x, y_im, new_x, new_y)
-                elif not self.isPlotable(x, y_im) and self.isPlotable(prev_x, prev_y_im):
-                    new_x, new_y = self.getPlotable(prev_x, prev_y_im, x, y_im)
-                    qp.drawLine(prev_x, prev_y_im, new_x, new_y)
-
-        # Now draw the markers
-        for m in self.markers:
-            if m.location != -1:
-                x = self.getXPosition(self.data[m.location])
-                y_re = self.getReYPosition(self.data[m.location])
-                y_im = self.getImYPosition(self.data[m.location])
-
-                self.drawMarker(x, y_re, qp, m.color, self.markers.index(m)+1)
-                self.drawMarker(x, y_im, qp, m.color, self.markers.index(m)+1)
+        self.drawData(qp, self.data, self.sweepColor, self.getReYPosition)
+        self.drawData(qp, self.data, self.secondarySweepColor, self.getImYPosition)
+        self.drawData(qp, self.reference, self.referenceColor, self.getReYPosition)
+        self.drawData(qp, self.reference, self.secondaryReferenceColor, self.getImYPosition)
+        self.drawMarkers(qp, y_function=self.getReYPosition)
+        self.drawMarkers(qp, y_function=self.getImYPosition)
 
     def getImYPosition(self, d: Datapoint) -> int:
         im = d.impedance().imag
@@ -342,6 +219,36 @@ class PermeabilityChart(FrequencyChart):
         return self.topMargin + round(
             (self.max - re) / self.span * self.chartHeight)
 
+    def yPositions(self, data, y_function) -> np.ndarray:
+        mu = self.permeabilities(SweepSeries.from_datapoints(data))
+        if y_function == self.getReYPosition:
+            values = mu.real
+        elif y_function == self.getImYPosition:
+            values = mu.imag
+        else:
+            return super().yPositions(data, y_function)
+        if not self.logarithmicY:
+            return self.topMargin + np.round((self.max - values) / self.span * self.chartHeight)
+        min_val = self.max - self.span
+        if not (self.max > 0 and min_val > 0):
+            return np.full(len(values), -1.0)
+        span = math.log(self.max) - math.log(min_val)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            y = self.topMargin + np.round(
+                (math.log(self.max) - np.log(values)) / span * self.chartHeight)
+        return np.where(values > 0, y, -1.0)
+
+    @staticmethod
+    def permeabilities(series: SweepSeries) -> np.ndarray:
+        """Impedance scaled by 10e6 / frequency, as plotted by the chart"""
+        def calculate() -> np.ndarray:
+            imp = series.impedance()
+            mu = np.empty(len(series), dtype=np.complex128)
+            mu.real = imp.real * 10e6 / series.freq
+            mu.imag = imp.imag * 10e6 / series.freq
+            return mu
+        return series.cached(("permeability",), calculate)
+
     def valueAtPosition(self, y) -> List[float]:
         absy = y - self.topMargin
         if self.logarithmicY:
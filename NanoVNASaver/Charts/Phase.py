@@ -22,6 +22,7 @@ import numpy as np
 from PyQt5 import QtWidgets, QtGui
 
 from NanoVNASaver.RFTools import Datapoint
+from NanoVNASaver.SweepData import SweepSeries
 from .Frequency import FrequencyChart
 
 logger = logging.getLogger(__name__)
@@ -80,16 +81,10 @@ class PhaseChart(FrequencyChart):
         line_pen.setWidth(self.lineThickness)
 
         if self.unwrap:
-            rawData = []
-            for d in self.data:
-                rawData.append(d.phase)
-
-            rawReference = []
-            for d in self.reference:
-                rawReference.append(d.phase)
-
-            self.unwrappedData = np.degrees(np.unwrap(rawData))
-            self.unwrappedReference = np.degrees(np.unwrap(rawReference))
+            self.unwrappedData = self.unwrappedDegrees(
+                SweepSeries.from_datapoints(self.data))
+            self.unwrappedReference = self.unwrappedDegrees(
+                SweepSeries.from_datapoints(self.reference))
 
         if self.fixedValues:
             minAngle = self.minDisplayValue
@@ -172,6 +167,23 @@ class PhaseChart(FrequencyChart):
             angle = math.degrees(d.phase)
         return self.topMargin + round((self.maxAngle - angle) / self.span * self.chartHeight)
 
+    @staticmethod
+    def unwrappedDegrees(series: SweepSeries) -> np.ndarray:
+        return series.cached(("unwrappedPhaseDegrees",),
+                             lambda: np.degrees(series.unwrappedPhase))
+
+    def yPositions(self, data, y_function) -> np.ndarray:
+        if y_function != self.getYPosition:
+            return super().yPositions(data, y_function)
+        if self.unwrap and data is self.data:
+            angle = self.unwrappedData
+        elif self.unwrap and data is self.reference:
+            angle = self.unwrappedReference
+        else:
+            series = SweepSeries.from_datapoints(data)
+            angle = series.cached(("phaseDegrees",), lambda: np.degrees(series.phase))
+        return self.topMargin + np.round((self.maxAngle - angle) / self.span * self.chartHeight)
+
     def valueAtPosition(self, y) -> List[float]:
         absy = y - self.topMargin
         val = -1 * ((absy / self.chartHeight * self.span) - self.maxAngle)
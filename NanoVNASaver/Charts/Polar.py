@@ -36,11 +36,9 @@ class PolarChart(SquareChart):
         self.setPalette(pal)
         self.setAutoFillBackground(True)
 
-    def paintEvent(self, a0: QtGui.QPaintEvent) -> None:
-        qp = QtGui.QPainter(self)
+    def drawContents(self, qp: QtGui.QPainter):
         self.drawChart(qp)
         self.drawValues(qp)
-        qp.end()
 
     def drawChart(self, qp: QtGui.QPainter):
         centerX = int(self.width()/2)
@@ -141,15 +139,9 @@ class PolarChart(SquareChart):
             target = self.data
         else:
             target = self.reference
-        positions = []
-        for d in target:
-            thisx = self.width() / 2 + d.re * self.chartWidth / 2
-            thisy = self.height() / 2 + d.im * -1 * self.chartHeight / 2
-            positions.append(math.sqrt((x - thisx)**2 + (y - thisy)**2))
-
-        minimum_position = positions.index(min(positions))
+        minimum_position = self.nearestPoint(target, x, y)
         m = self.getActiveMarker()
-        if m is not None:
+        if m is not None and minimum_position >= 0:
             m.setFrequency(str(round(target[minimum_position].freq)))
             m.frequencyInput.setText(str(round(target[minimum_position].freq)))
         return
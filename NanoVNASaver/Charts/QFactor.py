@@ -18,9 +18,11 @@ import math
 import logging
 from typing import List
 
+import numpy as np
 from PyQt5 import QtWidgets, QtGui
 
 from NanoVNASaver.RFTools import Datapoint
+from NanoVNASaver.SweepData import SweepSeries
 from .Frequency import FrequencyChart
 
 logger = logging.getLogger(__name__)
@@ -58,11 +60,8 @@ class QualityFactorChart(FrequencyChart):
             minQ = self.minDisplayValue
         else:
             minQ = 0
-            maxQ = 0
-            for d in self.data:
-                Q = d.qFactor()
-                if Q > maxQ:
-                    maxQ = Q
+            _, maxQ = self.dataRange(
+                lambda series: series.qFactor(), 0, 0, reference=())
             scale = 0
             if maxQ > 0:
                 scale = max(scale, math.floor(math.log10(maxQ)))
@@ -137,6 +136,12 @@ class QualityFactorChart(FrequencyChart):
         Q = d.qFactor()
         return self.topMargin + round((self.maxQ - Q) / self.span * self.chartHeight)
 
+    def yPositions(self, data, y_function) -> np.ndarray:
+        if y_function != self.getYPosition:
+            return super().yPositions(data, y_function)
+        Q = SweepSeries.from_datapoints(data).qFactor()
+        return self.topMargin + np.round((self.maxQ - Q) / self.span * self.chartHeight)
+
     def valueAtPosition(self, y) -> List[float]:
         absy = y - self.topMargin
         val = -1 * ((absy / self.chartHeight * self.span) - self.maxQ)
@@ -18,10 +18,12 @@ import math
 import logging
 from typing import List
 
+import numpy as np
 from PyQt5 import QtWidgets, QtGui
 
 from NanoVNASaver.Marker import Marker
 from NanoVNASaver.RFTools import Datapoint
+from NanoVNASaver.SweepData import SweepSeries
 
 from .Chart import Chart
 from .Frequency import FrequencyChart
@@ -141,12 +143,6 @@ class RealImaginaryChart(FrequencyChart):
     def drawValues(self, qp: QtGui.QPainter):
         if len(self.data) == 0 and len(self.reference) == 0:
             return
-        pen = QtGui.QPen(self.sweepColor)
-        pen.setWidth(self.pointSize)
-        line_pen = QtGui.QPen(self.sweepColor)
-        line_pen.setWidth(self.lineThickness)
-        highlighter = QtGui.QPen(QtGui.QColor(20, 0, 255))
-        highlighter.setWidth(1)
         if self.fixedSpan:
             fstart = self.minFrequency
             fstop = self.maxFrequency
@@ -171,34 +167,10 @@ class RealImaginaryChart(FrequencyChart):
             min_imag = self.minDisplayImag
             max_imag = self.maxDisplayImag
         else:
-            min_real = 1000
-            min_imag = 1000
-            max_real = 0
-            max_imag = -1000
-            for d in self.data:
-                imp = d.impedance()
-                re, im = imp.real, imp.imag
-                if re > max_real:
-                    max_real = re
-                if re < min_real:
-                    min_real = re
-                if im > max_imag:
-                    max_imag = im
-                if im < min_imag:
-                    min_imag = im
-            for d in self.reference:  # Also check min/max for the reference sweep
-                if d.freq < fstart or d.freq > fstop:
-                    continue
-                imp = d.impedance()
-                re, im = imp.real, imp.imag
-                if re > max_real:
-                    max_real = re
-                if re < min_real:
-                    min_real = re
-                if im > max_imag:
-                    max_imag = im
-                if im < min_imag:
-                    min_imag = im
+            min_real, max_real = self.dataRange(
+                lambda series: series.impedance().real, 1000, 0)
+            min_imag, max_imag = self.dataRange(
+                lambda series: series.impedance().imag, 1000, -1000)
 
             # Always have at least 8 numbered horizontal lines
             max_real = max(8, math.ceil(max_real))
@@ -265,8 +237,6 @@ class RealImaginaryChart(FrequencyChart):
 
         self.drawFrequencyTicks(qp)
 
-        primary_pen = pen
-        secondary_pen = QtGui.QPen(self.secondarySweepColor)
         if len(self.data) > 0:
             c = QtGui.QColor(self.sweepColor)
             c.setAlpha(255)
@@ -281,53 +251,6 @@ class RealImaginaryChart(FrequencyChart):
             qp.drawLine(self.leftMargin + self.chartWidth, 9,
                         self.leftMargin + self.chartWidth + 5, 9)
 
-        primary_pen.setWidth(self.pointSize)
-        secondary_pen.setWidth(self.pointSize)
-        line_pen.setWidth(self.lineThickness)
-
-        for i in range(len(self.data)):
-            x = self.getXPosition(self.data[i])
-            y_re = self.getReYPosition(self.data[i])
-            y_im = self.getImYPosition(self.data[i])
-            qp.setPen(primary_pen)
-            if self.isPlotable(x, y_re):
-                qp.drawPoint(x, y_re)
-            qp.setPen(secondary_pen)
-            if self.isPlotable(x, y_im):
-                qp.drawPoint(x, y_im)
-            if self.drawLines and i > 0:
-                prev_x = self.getXPosition(self.data[i - 1])
-                prev_y_re = self.getReYPosition(self.data[i-1])
-                prev_y_im = self.getImYPosition(self.data[i-1])
-
-                # Real part first
-                line_pen.setColor(self.sweepColor)
-                qp.setPen(line_pen)
-                if self.isPlotable(x, y_re) and self.isPlotable(prev_x, prev_y_re):
-                    qp.drawLine(x, y_re, prev_x, prev_y_re)
-                elif self.isPlotable(x, y_re) and not self.isPlotable(prev_x, prev_y_re):
-                    new_x, new_y = self.getPlotable(x, y_re, prev_x, prev_y_re)
-                    qp.drawLine(x, y_re, new_x, new_y)
-                elif not self.isPlotable(x, y_re) and self.isPlotable(prev_x, prev_y_re):
-                    new_x, new_y = self.getPlotable(prev_x, prev_y_re, x, y_re)
-                    qp.drawLine(prev_x, prev_y_re, new_x, new_y)
-
-                # Imag part second
-                line_pen.setColor(self.secondarySweepColor)
-                qp.setPen(line_pen)
-                if self.isPlotable(x, y_im) and self.isPlotable(prev_x, prev_y_im):
-                    qp.drawLine(x, y_im, prev_x, prev_y_im)
-                elif self.isPlotable(x, y_im) and not self.isPlotable(prev_x, prev_y_im):
-                    new_x, new_y = self.getPlotable(x, y_im, prev_x, prev_y_im)
-                    qp.drawLine(x, y_im, new_x, new_y)
-                elif not self.isPlotable(x, y_im) and self.isPlotable(prev_x, prev_y_im):
-                    new_x, new_y = self.getPlotable(prev_x, prev_y_im, x, y_im)
-                    qp.drawLine(prev_x, prev_y_im, new_x, new_y)
-
-        primary_pen.setColor(self.referenceColor)
-        line_pen.setColor(self.referenceColor)
-        secondary_pen.setColor(self.secondaryReferenceColor)
-        qp.setPen(primary_pen)
         if len(self.reference) > 0:
             c = QtGui.QColor(self.referenceColor)
             c.setAlpha(255)
@@ -343,56 +266,12 @@ class RealImaginaryChart(FrequencyChart):
             qp.drawLine(self.leftMargin + self.chartWidth, 14,
                         self.leftMargin + self.chartWidth + 5, 14)
 
-        for i in range(len(self.reference)):
-            if self.reference[i].freq < fstart or self.reference[i].freq > fstop:
-                continue
-            x = self.getXPosition(self.reference[i])
-            y_re = self.getReYPosition(self.reference[i])
-            y_im = self.getImYPosition(self.reference[i])
-            qp.setPen(primary_pen)
-            if self.isPlotable(x, y_re):
-                qp.drawPoint(x, y_re)
-            qp.setPen(secondary_pen)
-            if self.isPlotable(x, y_im):
-                qp.drawPoint(x, y_im)
-            if self.drawLines and i > 0:
-                prev_x = self.getXPosition(self.reference[i - 1])
-                prev_y_re = self.getReYPosition(self.reference[i-1])
-                prev_y_im = self.getImYPosition(self.reference[i-1])
-
-                line_pen.setColor(self.referenceColor)
-                qp.setPen(line_pen)
-                # Real part first
-                if self.isPlotable(x, y_re) and self.isPlotable(prev_x, prev_y_re):
-                    qp.drawLine(x, y_re, prev_x, prev_y_re)
-                elif self.isPlotable(x, y_re) and not self.isPlotable(prev_x, prev_y_re):
-                    new_x, new_y = self.getPlotable(x, y_re, prev_x, prev_y_re)
-                    qp.drawLine(x, y_re, new_x, new_y)
-                elif not self.isPlotable(x, y_re) and self.isPlotable(prev_x, prev_y_re):
-                    new_x, new_y = self.getPlotable(prev_x, prev_y_re, x, y_re)
-                    qp.drawLine(prev_x, prev_y_re, new_x, new_y)
-
-                line_pen.setColor(self.secondaryReferenceColor)
-                qp.setPen(line_pen)
-                # Imag part second
-                if self.isPlotable(x, y_im) and self.isPlotable(prev_x, prev_y_im):
-                    qp.drawLine(x, y_im, prev_x, prev_y_im)
-                elif self.isPlotable(x, y_im) and not self.isPlotable(prev_x, prev_y_im):
-                    new_x, new_y = self.getPlotable(x, y_im, prev_x, prev_y_im)
-                    qp.drawLine(x, y_im, new_x, new_y)
-                elif not self.isPlotable(x, y_im) and self.isPlotable(prev_x, prev_y_im):
-                    new_x, new_y = self.getPlotable(prev_x, prev_y_im, x, y_im)
-                    qp.drawLine(prev_x, prev_y_im, new_x, new_y)
-
-        # Now draw the markers
-        for m in self.markers:
-            if m.location != -1:
-                x = self.getXPosition(self.data[m.location])
-                y_re = self.getReYPosition(self.data[m.location])
-                y_im = self.getImYPosition(self.data[m.location])
-
-                self.drawMarker(x, y_re, qp, m.color, self.markers.index(m)+1)
-                self.drawMarker(x, y_im, qp, m.color, self.markers.index(m)+1)
+        self.drawData(qp, self.data, self.sweepColor, self.getReYPosition)
+        self.drawData(qp, self.data, self.secondarySweepColor, self.getImYPosition)
+        self.drawData(qp, self.reference, self.referenceColor, self.getReYPosition)
+        self.drawData(qp, self.reference, self.secondaryReferenceColor, self.getImYPosition)
+        self.drawMarkers(qp, y_function=self.getReYPosition)
+        self.drawMarkers(qp, y_function=self.getImYPosition)
 
     def getImYPosition(self, d: Datapoint) -> int:
         im = d.impedance().imag
@@ -402,6 +281,16 @@ class RealImaginaryChart(FrequencyChart):
         re = d.impedance().real
         return self.topMargin + round((self.max_real - re) / self.span_real * self.chartHeight)
 
+    def yPositions(self, data, y_function) -> np.ndarray:
+        imp = SweepSeries.from_datapoints(data).impedance()
+        if y_function == self.getReYPosition:
+            return self.topMargin + np.round(
+                (self.max_real - imp.real) / self.span_real * self.chartHeight)
+        if y_function == self.getImYPosition:
+            return self.topMargin + np.round(
+                (self.max_imag - imp.imag) / self.span_imag * self.chartHeight)
+        return super().yPositions(data, y_function)
+
     def valueAtPosition(self, y) -> List[float]:
         absy = y - self.topMargin
         valRe = -1 * ((absy / self.chartHeight * self.span_real) - self.max_real)
@@ -18,9 +18,11 @@ import math
 import logging
 from typing import List
 
+import numpy as np
 from PyQt5 import QtWidgets, QtGui
 
 from NanoVNASaver.RFTools import Datapoint
+from NanoVNASaver.SweepData import SweepSeries
 from .Frequency import FrequencyChart
 from .LogMag import LogMagChart
 
@@ -164,6 +166,16 @@ class SParameterChart(FrequencyChart):
     def getImYPosition(self, d: Datapoint) -> int:
         return self.topMargin + round((self.maxValue - d.im) / self.span * self.chartHeight)
 
+    def yPositions(self, data, y_function) -> np.ndarray:
+        series = SweepSeries.from_datapoints(data)
+        if y_function in (self.getYPosition, self.getReYPosition):
+            values = series.re
+        elif y_function == self.getImYPosition:
+            values = series.im
+        else:
+            return super().yPositions(data, y_function)
+        return self.topMargin + np.round((self.maxValue - values) / self.span * self.chartHeight)
+
     def valueAtPosition(self, y) -> List[float]:
         absy = y - self.topMargin
         val = -1 * ((absy / self.chartHeight * self.span) - self.maxValue)
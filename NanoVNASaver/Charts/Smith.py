@@ -14,7 +14,6 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
-import math
 import logging
 
 from PyQt5 import QtGui, QtCore
@@ -37,12 +36,38 @@ class SmithChart(SquareChart):
         self.setPalette(pal)
         self.setAutoFillBackground(True)
 
-    def paintEvent(self, a0: QtGui.QPaintEvent) -> None:
-        qp = QtGui.QPainter(self)
-        #qp.begin(self)  # Apparently not needed?
-        self.drawSmithChart(qp)
+        self.gridImage: QtGui.QImage = None
+        self.gridKey: tuple = None
+
+    def drawContents(self, qp: QtGui.QPainter):
+        self.drawGrid(qp)
         self.drawValues(qp)
-        qp.end()
+
+    def drawGrid(self, qp: QtGui.QPainter):
+        """Draw the grid and SWR circles, redrawn only when they change"""
+        key = (self.width(), self.height(), self.chartWidth, self.chartHeight,
+               self.devicePixelRatioF(), self.font().key(), self.name,
+               self.sweepTitle, QtGui.QColor(self.textColor).rgba(),
+               QtGui.QColor(self.foregroundColor).rgba(),
+               QtGui.QColor(self.swrColor).rgba(), frozenset(self.swrMarkers))
+        if key != self.gridKey:
+            # An image rather than a pixmap, as charts may be rendered
+            # outside the GUI thread
+            ratio = self.devicePixelRatioF()
+            image = QtGui.QImage(
+                int(self.width() * ratio), int(self.height() * ratio),
+                QtGui.QImage.Format_ARGB32_Premultiplied)
+            image.setDevicePixelRatio(ratio)
+            image.fill(QtCore.Qt.transparent)
+            painter = QtGui.QPainter(image)
+            painter.setFont(self.font())
+            try:
+                self.drawSmithChart(painter)
+            finally:
+                painter.end()
+            self.gridImage = image
+            self.gridKey = key
+        qp.drawImage(0, 0, self.gridImage)
 
     def drawSmithChart(self, qp: QtGui.QPainter):
         centerX = int(self.width()/2)
@@ -189,15 +214,9 @@ class SmithChart(SquareChart):
             target = self.data
         else:
             target = self.reference
-        positions = []
-        for d in target:
-            thisx = self.width() / 2 + d.re * self.chartWidth / 2
-            thisy = self.height() / 2 + d.im * -1 * self.chartHeight / 2
-            positions.append(math.sqrt((x - thisx)**2 + (y - thisy)**2))
-
-        minimum_position = positions.index(min(positions))
+        minimum_position = self.nearestPoint(target, x, y)
         m = self.getActiveMarker()
-        if m is not None:
+        if m is not None and minimum_position >= 0:
             m.setFrequency(str(round(target[minimum_position].freq)))
             m.frequencyInput.setText(str(round(target[minimum_position].freq)))
         return
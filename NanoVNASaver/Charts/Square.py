@@ -15,10 +15,15 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import logging
+from typing import List
 
+import numpy as np
 from PyQt5 import QtWidgets, QtGui
+from scipy.spatial import cKDTree
 
 from NanoVNASaver.Charts.Chart import Chart
+from NanoVNASaver.RFTools import Datapoint
+from NanoVNASaver.SweepData import SweepSeries
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +36,11 @@ class SquareChart(Chart):
         self.setSizePolicy(sizepolicy)
         self.chartWidth = self.width()-40
         self.chartHeight = self.height()-40
+        # Screen positions of the points, rebuilt when data or size change
+        self.pointIndex: cKDTree = None
+        self.pointIndexKey: tuple = None
+        self.pointIndexData: List[Datapoint] = None
+        self.pointIndexMap: np.ndarray = None
 
     def resizeEvent(self, a0: QtGui.QResizeEvent) -> None:
         if not self.isPopout:
@@ -41,3 +51,22 @@ class SquareChart(Chart):
             min_dimension = min(a0.size().height(), a0.size().width())
             self.chartWidth = self.chartHeight = min_dimension - 40
         self.update()
+
+    def nearestPoint(self, data: List[Datapoint], x: int, y: int) -> int:
+        """Index of the point of data drawn closest to x, y, or -1"""
+        key = (len(data), self.dataVersion, self.width(), self.height(),
+               self.chartWidth, self.chartHeight)
+        if data is not self.pointIndexData or key != self.pointIndexKey:
+            series = SweepSeries.from_datapoints(data)
+            points = np.column_stack((
+                self.width() / 2 + series.re * self.chartWidth / 2,
+                self.height() / 2 - series.im * self.chartHeight / 2))
+            valid = np.isfinite(points).all(axis=1)
+            self.pointIndexMap = np.flatnonzero(valid)
+            self.pointIndex = cKDTree(points[valid]) if valid.any() else None
+            self.pointIndexData = data
+            self.pointIndexKey = key
+        if self.pointIndex is None:
+            return -1
+        _, index = self.pointIndex.query((x, y))
+        return int(self.pointIndexMap[index])
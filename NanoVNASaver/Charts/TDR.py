@@ -209,6 +209,11 @@ class TDRChart(Chart):
         if self.fixedValues:
             self.update()
 
+    def showEvent(self, event: QtGui.QShowEvent):
+        super().showEvent(event)
+        if self.tdrWindow is not None:
+            self.tdrWindow.refreshTDR()
+
     def copy(self):
         new_chart: TDRChart = super().copy()
         new_chart.tdrWindow = self.tdrWindow
@@ -266,8 +271,7 @@ class TDRChart(Chart):
             self.update()
         return
 
-    def paintEvent(self, a0: QtGui.QPaintEvent) -> None:
-        qp = QtGui.QPainter(self)
+    def drawContents(self, qp: QtGui.QPainter):
         qp.setPen(QtGui.QPen(self.textColor))
         qp.drawText(3, 15, self.name)
 
@@ -399,6 +403,7 @@ class TDRChart(Chart):
                     str(round(self.tdrWindow.distance_axis[self.markerLocation] / 2,
                               2)) + "m")
 
+    def drawOverlay(self, qp: QtGui.QPainter):
         if self.draggedBox and self.draggedBoxCurrent[0] != -1:
             dashed_pen = QtGui.QPen(self.foregroundColor, 1, QtCore.Qt.DashLine)
             qp.setPen(dashed_pen)
@@ -407,8 +412,6 @@ class TDRChart(Chart):
             rect = QtCore.QRect(top_left, bottom_right)
             qp.drawRect(rect)
 
-        qp.end()
-
     def valueAtPosition(self, y):
         if len(self.tdrWindow.td) > 0:
             height = self.height() - self.topMargin - self.bottomMargin
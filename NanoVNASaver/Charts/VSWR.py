@@ -17,9 +17,11 @@ import math
 import logging
 from typing import List
 
+import numpy as np
 from PyQt5 import QtWidgets, QtGui
 
 from NanoVNASaver.RFTools import Datapoint
+from NanoVNASaver.SweepData import SweepSeries
 from .Frequency import FrequencyChart
 
 logger = logging.getLogger(__name__)
@@ -102,11 +104,8 @@ class VSWRChart(FrequencyChart):
             maxVSWR = self.maxDisplayValue
         else:
             minVSWR = 1
-            maxVSWR = 3
-            for d in self.data:
-                vswr = d.vswr
-                if vswr > maxVSWR:
-                    maxVSWR = vswr
+            _, maxVSWR = self.dataRange(
+                lambda series: series.vswr, minVSWR, 3, reference=())
             maxVSWR = min(self.maxDisplayValue, math.ceil(maxVSWR))
         self.maxVSWR = maxVSWR
         span = maxVSWR-minVSWR
@@ -192,6 +191,21 @@ class VSWRChart(FrequencyChart):
     def getYPosition(self, d: Datapoint) -> int:
         return self.getYPositionFromValue(d.vswr)
 
+    def yPositions(self, data, y_function) -> np.ndarray:
+        if y_function != self.getYPosition:
+            return super().yPositions(data, y_function)
+        vswr = SweepSeries.from_datapoints(data).vswr
+        if not self.logarithmicY:
+            return self.topMargin + np.round((self.maxVSWR - vswr) / self.span * self.chartHeight)
+        min_val = self.maxVSWR - self.span
+        if not (self.maxVSWR > 0 and min_val > 0):
+            return np.full(len(vswr), -1.0)
+        span = math.log(self.maxVSWR) - math.log(min_val)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            y = self.topMargin + np.round(
+                (math.log(self.maxVSWR) - np.log(vswr)) / span * self.chartHeight)
+        return np.where(vswr > 0, y, -1.0)
+
     def valueAtPosition(self, y) -> List[float]:
         absy = y - self.topMargin
         if self.logarithmicY:
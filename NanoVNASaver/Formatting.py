@@ -30,11 +30,11 @@ FMT_COMPLEX = SITools.Format(max_nr_digits=3, allow_strip=True,
 
 
 def format_frequency(freq: float, fmt=FMT_FREQ) -> str:
-    return str(SITools.Value(freq, "Hz", fmt))
+    return SITools.format_value(freq, "Hz", fmt)
 
 
 def format_frequency_inputs(freq: float) -> str:
-    return str(SITools.Value(freq, "Hz", FMT_FREQ_INPUTS))
+    return SITools.format_value(freq, "Hz", FMT_FREQ_INPUTS)
 
 
 def format_gain(val: float, invert: bool = False) -> str:
@@ -46,7 +46,7 @@ def format_gain(val: float, invert: bool = False) -> str:
 def format_q_factor(val: float) -> str:
     if val < 0 or val > 10000.0:
         return "\N{INFINITY}"
-    return str(SITools.Value(val, fmt=FMT_Q_FACTOR))
+    return SITools.format_value(val, fmt=FMT_Q_FACTOR)
 
 
 def format_vswr(val: float) -> str:
@@ -58,23 +58,23 @@ def format_magnitude(val: float) -> str:
 def format_resistance(val: float) -> str:
     if val < 0:
         return "- \N{OHM SIGN}"
-    return str(SITools.Value(val, "\N{OHM SIGN}", FMT_REACT))
+    return SITools.format_value(val, "\N{OHM SIGN}", FMT_REACT)
 
 
 def format_capacitance(val: float, allow_negative: bool = True) -> str:
     if not allow_negative and val < 0:
         return "- pF"
-    return str(SITools.Value(val, "F", FMT_REACT))
+    return SITools.format_value(val, "F", FMT_REACT)
 
 
 def format_inductance(val: float, allow_negative: bool = True) -> str:
     if not allow_negative and val < 0:
         return "- nH"
-    return str(SITools.Value(val, "H", FMT_REACT))
+    return SITools.format_value(val, "H", FMT_REACT)
 
 
 def format_group_delay(val: float) -> str:
-    return str(SITools.Value(val, "s", FMT_GROUP_DELAY))
+    return SITools.format_value(val, "s", FMT_GROUP_DELAY)
 
 
 def format_phase(val: float) -> str:
@@ -82,6 +82,6 @@ def format_phase(val: float) -> str:
 
 
 def format_complex_imp(z: complex) -> str:
-    re = SITools.Value(z.real, fmt=FMT_COMPLEX)
-    im = SITools.Value(abs(z.imag), fmt=FMT_COMPLEX)
+    re = SITools.format_value(z.real, fmt=FMT_COMPLEX)
+    im = SITools.format_value(abs(z.imag), fmt=FMT_COMPLEX)
     return f"{re}{'-' if z.imag < 0 else '+'}j{im} \N{OHM SIGN}"
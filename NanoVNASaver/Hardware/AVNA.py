@@ -39,24 +39,9 @@ class AVNA(VNA):
         logger.debug("Reading calibration info.")
         if not self.serial.is_open:
             return "Not connected."
-        if self.app.serialLock.acquire():
-            try:
-                data = "a"
-                while data != "":
-                    data = self.serial.readline().decode('ascii')
-                self.serial.write("cal\r".encode('ascii'))
-                result = ""
-                data = ""
-                sleep(0.1)
-                while "ch>" not in data:
-                    data = self.serial.readline().decode('ascii')
-                    result += data
-                values = result.splitlines()
-                return values[1]
-            except serial.SerialException as exc:
-                logger.exception("Exception while reading calibration info: %s", exc)
-            finally:
-                self.app.serialLock.release()
+        values = self.readFromCommand("cal").splitlines()
+        if len(values) > 1:
+            return values[1]
         return "Unknown"
 
     def readFrequencies(self) -> List[str]:
@@ -76,27 +61,14 @@ class AVNA(VNA):
         logger.debug("Reading version info.")
         if not self.serial.is_open:
             return
-        if self.app.serialLock.acquire():
-            try:
-                data = "a"
-                while data != "":
-                    data = self.serial.readline().decode('ascii')
-                self.serial.write("version\r".encode('ascii'))
-                result = ""
-                data = ""
-                sleep(0.1)
-                while "ch>" not in data:
-                    data = self.serial.readline().decode('ascii')
-                    result += data
-                values = result.splitlines()
-                logger.debug("Found version info: %s", values[1])
-                return values[1]
-            except serial.SerialException as exc:
-                logger.exception("Exception while reading firmware version: %s", exc)
-            finally:
-                self.app.serialLock.release()
+        values = self.readFromCommand("version").splitlines()
+        if len(values) > 1:
+            logger.debug("Found version info: %s", values[1])
+            return values[1]
         return
 
     def setSweep(self, start, stop):
         self.writeSerial("sweep " + str(start) + " " + str(stop) + " " + str(self.datapoints))
+        # The sweep command returns at once, with no way to tell when
+        # the device has measured the new range
         sleep(1)
@@ -16,17 +16,33 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import logging
 import struct
-from time import sleep
-from typing import List
+from time import sleep, perf_counter
+from typing import List, Tuple
 
 import serial
 import numpy as np
 from PyQt5 import QtGui
 
-from NanoVNASaver.Hardware.VNA import VNA, Version
+from NanoVNASaver.Hardware.VNA import VNA, Version, SCAN_TIMEOUT
 
 logger = logging.getLogger(__name__)
 
+# Time allowed for the screen contents to arrive
+CAPTURE_TIMEOUT = 4.0
+
+# outmask bits of the scan command
+SCAN_MASK_FREQ = 0x01
+SCAN_MASK_S11 = 0x02
+SCAN_MASK_S21 = 0x04
+SCAN_MASK_BINARY = 0x80
+
+# One point of binary scan output, following a uint16 mask and point count
+SCAN_RECORD = np.dtype([
+    ("freq", "<u4"),
+    ("s11", "<f4", (2,)),
+    ("s21", "<f4", (2,)),
+])
+
 
 class NanoVNA(VNA):
     name = "NanoVNA"
@@ -51,6 +67,14 @@ class NanoVNA(VNA):
             self.features.add("Original sweep method")
             self.useScan = False
         self.readFeatures()
+        if self.useScan and "scan_bin" in self.commands:
+            logger.debug("Firmware supports binary scan output.")
+            self.features.add("Binary scan")
+            self.useBinaryScan = True
+        elif self.useScan:
+            # Probed on the first segment read
+            self.features.add("Combined scan")
+            self.useCombinedScan = True
 
     def isValid(self):
         return True
@@ -59,24 +83,9 @@ class NanoVNA(VNA):
         logger.debug("Reading calibration info.")
         if not self.serial.is_open:
             return "Not connected."
-        if self.app.serialLock.acquire():
-            try:
-                data = "a"
-                while data != "":
-                    data = self.serial.readline().decode('ascii')
-                self.serial.write("cal\r".encode('ascii'))
-                result = ""
-                data = ""
-                sleep(0.1)
-                while "ch>" not in data:
-                    data = self.serial.readline().decode('ascii')
-                    result += data
-                values = result.splitlines()
-                return values[1]
-            except serial.SerialException as exc:
-                logger.exception("Exception while reading calibration info: %s", exc)
-            finally:
-                self.app.serialLock.release()
+        values = self.readFromCommand("cal").splitlines()
+        if len(values) > 1:
+            return values[1]
         return "Unknown"
 
     def getScreenshot(self) -> QtGui.QPixmap:
@@ -85,16 +94,11 @@ class NanoVNA(VNA):
             return QtGui.QPixmap()
         if self.app.serialLock.acquire():
             try:
-                data = "a"
-                while data != "":
-                    data = self.serial.readline().decode('ascii')
-                self.serial.write("capture\r".encode('ascii'))
-                timeout = self.serial.timeout
-                self.serial.timeout = 4
-                self.serial.readline()
-                image_data = self.serial.read(
-                    self.screenwidth * self.screenheight * 2)
-                self.serial.timeout = timeout
+                self.transport.drain()
+                self.transport.writeCommand("capture")
+                self.transport.readLine()
+                image_data = self.transport.readBytes(
+                    self.screenwidth * self.screenheight * 2, CAPTURE_TIMEOUT)
                 rgb_data = struct.unpack(
                     f">{self.screenwidth * self.screenheight}H",
                     image_data)
@@ -126,38 +130,76 @@ class NanoVNA(VNA):
     def readValues21(self) -> List[str]:
         return self.readValues("data 1")
 
+    def readScan(self, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if not self.useBinaryScan:
+            return super().readScan(start, stop)
+        logger.debug("Binary scan from %d to %d", start, stop)
+        empty = (np.empty(0, dtype=np.int64),
+                 np.empty(0, dtype=np.complex128), np.empty(0, dtype=np.complex128))
+        if not self.serial.is_open:
+            return empty
+        mask = SCAN_MASK_BINARY | SCAN_MASK_FREQ | SCAN_MASK_S11 | SCAN_MASK_S21
+        size = 4 + self.datapoints * SCAN_RECORD.itemsize
+        if self.app.serialLock.acquire():
+            started = perf_counter()
+            try:
+                self.transport.drain()
+                self.transport.writeCommand(
+                    f"scan {start} {stop} {self.datapoints} {mask}")
+                # Skip the echoed command
+                self.transport.readLine()
+                payload = self.transport.readBytes(size, SCAN_TIMEOUT)
+                self.transport.readUntil()
+                self.transport.record("scan", started)
+            except serial.SerialException as exc:
+                self.transport.record("scan", started, timed_out=True)
+                logger.exception("Exception while reading binary scan: %s", exc)
+                return empty
+            finally:
+                self.app.serialLock.release()
+            try:
+                return self.decodeScan(payload, self.datapoints)
+            except ValueError as exc:
+                logger.warning("Invalid binary scan data: %s", exc)
+                return empty
+        logger.error("Unable to acquire serial lock to read binary scan")
+        return empty
+
+    @staticmethod
+    def decodeScan(payload: bytes, points: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Decode binary scan output into frequencies, S11 and S21"""
+        if len(payload) != 4 + points * SCAN_RECORD.itemsize:
+            raise ValueError(f"expected {points} points, got {len(payload)} bytes")
+        mask, count = np.frombuffer(payload, dtype="<u2", count=2)
+        if count != points or mask & 0x7f != SCAN_MASK_FREQ | SCAN_MASK_S11 | SCAN_MASK_S21:
+            raise ValueError(f"unexpected header mask {mask:#x}, points {count}")
+        records = np.frombuffer(payload, dtype=SCAN_RECORD, count=points, offset=4)
+        s11 = records["s11"].astype(np.float64)
+        s21 = records["s21"].astype(np.float64)
+        return (records["freq"].astype(np.int64),
+                s11[:, 0] + 1j * s11[:, 1],
+                s21[:, 0] + 1j * s21[:, 1])
+
     def resetSweep(self, start: int, stop: int):
-        self.writeSerial("sweep {start} {stop} {self.datapoints}")
+        self.writeSerial(f"sweep {start} {stop} {self.datapoints}")
         self.writeSerial("resume")
 
     def readVersion(self):
         logger.debug("Reading version info.")
         if not self.serial.is_open:
             return
-        if self.app.serialLock.acquire():
-            try:
-                data = "a"
-                while data != "":
-                    data = self.serial.readline().decode('ascii')
-                self.serial.write("version\r".encode('ascii'))
-                result = ""
-                data = ""
-                sleep(0.1)
-                while "ch>" not in data:
-                    data = self.serial.readline().decode('ascii')
-                    result += data
-                values = result.splitlines()
-                logger.debug("Found version info: %s", values[1])
-                return values[1]
-            except serial.SerialException as exc:
-                logger.exception("Exception while reading firmware version: %s", exc)
-            finally:
-                self.app.serialLock.release()
+        values = self.readFromCommand("version").splitlines()
+        if len(values) > 1:
+            logger.debug("Found version info: %s", values[1])
+            return values[1]
         return
 
     def setSweep(self, start, stop):
         if self.useScan:
-            self.writeSerial("scan " + str(start) + " " + str(stop) + " " + str(self.datapoints))
+            # Returns its prompt once the sweep is done
+            self.writeSerial(f"scan {start} {stop} {self.datapoints}", SCAN_TIMEOUT)
         else:
-            self.writeSerial("sweep " + str(start) + " " + str(stop) + " " + str(self.datapoints))
+            self.writeSerial(f"sweep {start} {stop} {self.datapoints}")
+            # The sweep command returns at once, with no way to tell when
+            # the device has measured the new range
             sleep(1)
@@ -21,7 +21,7 @@ import serial
 import numpy as np
 from PyQt5 import QtGui
 
-from NanoVNASaver.Hardware.NanoVNA import NanoVNA
+from NanoVNASaver.Hardware.NanoVNA import NanoVNA, CAPTURE_TIMEOUT
 
 logger = logging.getLogger(__name__)
 
@@ -37,16 +37,11 @@ class NanoVNA_F(NanoVNA):
             return QtGui.QPixmap()
         if self.app.serialLock.acquire():
             try:
-                data = "a"
-                while data != "":
-                    data = self.serial.readline().decode('ascii')
-                self.serial.write("capture\r".encode('ascii'))
-                timeout = self.serial.timeout
-                self.serial.timeout = 4
-                self.serial.readline()
-                image_data = self.serial.read(
-                    self.screenwidth * self.screenheight * 2)
-                self.serial.timeout = timeout
+                self.transport.drain()
+                self.transport.writeCommand("capture")
+                self.transport.readLine()
+                image_data = self.transport.readBytes(
+                    self.screenwidth * self.screenheight * 2, CAPTURE_TIMEOUT)
                 rgb_data = struct.unpack(
                     f"<{self.screenwidth * self.screenheight}H", image_data)
                 rgb_array = np.array(rgb_data, dtype=np.uint32)
@@ -16,16 +16,33 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import logging
 import platform
-from struct import pack, unpack_from
-from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor
+from struct import pack
+from time import perf_counter
+from typing import Iterator, List, Tuple
+
+import numpy as np
 
 from NanoVNASaver.Hardware.VNA import VNA, Version
+from NanoVNASaver.SweepData import average
 
 if platform.system() != 'Windows':
     import tty
 
 logger = logging.getLogger(__name__)
 
+# Time allowed for a register read to be answered
+REGISTER_TIMEOUT = 1.0
+
+# One point as read from the values FIFO
+FIFO_RECORD = np.dtype([
+    ("fwd", "<i4", (2,)),
+    ("rev0", "<i4", (2,)),
+    ("rev1", "<i4", (2,)),
+    ("freq_index", "<u2"),
+    ("reserved", "V6"),
+])
+
 _CMD_NOP = 0x00
 _CMD_INDICATE = 0x0d
 _CMD_READ = 0x10
@@ -64,12 +81,11 @@ class NanoVNAV2(VNA):
             tty.setraw(self.serial.fd)
 
         # reset protocol to known state
-        self.serial.write(pack("<Q", 0))
+        self.transport.write(pack("<Q", 0))
 
         self.version = self.readVersion()
         self.firmware = self.readFirmware()
         self.features.add("Customizable data points")
-        # TODO: more than one dp per freq
         self.features.add("Multi data points")
 
         self.datapoints = NanoVNAV2.DEFAULT_DATAPOINTS
@@ -82,7 +98,16 @@ class NanoVNAV2(VNA):
         self._isDFU = False
         self.sweepStartHz = 200e6
         self.sweepStepHz = 1e6
-        self.sweepData = [(0, 0)] * self.datapoints
+        self.sweepData11 = np.zeros(self.datapoints, dtype=np.complex128)
+        self.sweepData21 = np.zeros(self.datapoints, dtype=np.complex128)
+        self.useBinaryScan = True
+        # Values measured per frequency and how many of them to discard
+        self.valuesPerFrequency = 1
+        self.discardPerFrequency = 0
+        self.averagingMethod = "trim"
+        self.features.add("Hardware averaging")
+        self.features.add("Pipelined sweeps")
+        self.usePipelinedScan = True
         self._updateSweep()
 
     def isValid(self):
@@ -100,9 +125,9 @@ class NanoVNAV2(VNA):
     def readFirmware(self) -> str:
         # read register 0xf3 and 0xf4 (firmware major and minor version)
         cmd = pack("<BBBB", _CMD_READ, _ADDR_FW_MAJOR, _CMD_READ, _ADDR_FW_MINOR)
-        self.serial.write(cmd)
+        self.transport.write(cmd)
 
-        resp = self.serial.read(2)
+        resp = self.transport.readBytes(2, REGISTER_TIMEOUT)
         if len(resp) != 2:
             logger.error("Timeout reading version registers")
             return None
@@ -111,58 +136,169 @@ class NanoVNAV2(VNA):
 
     def readFrequencies(self) -> List[str]:
         self.checkValid()
-        freqs = [self.sweepStartHz + i*self.sweepStepHz for i in range(self.datapoints)]
-        return [str(int(f)) for f in freqs]
-
+        return [str(f) for f in self.sweepFrequencies().tolist()]
+
+    def sweepFrequencies(self) -> np.ndarray:
+        return (self.sweepStartHz +
+                np.arange(self.datapoints) * self.sweepStepHz).astype(np.int64)
+
+    def readFifo(self, clear: bool = True, next_sweep: Tuple[float, float] = None) -> bytes:
+        """Read the raw records of a complete sweep from the values FIFO
+
+        If next_sweep (start, step) is given, the registers for it are
+        written right after the last FIFO read has been requested. The
+        device then starts measuring the next segment while this one is
+        still being transferred, and the FIFO is left cleared for it.
+        Returns an empty bytes object on timeout.
+        """
+        # Allow for the sweep to be measured while reading the FIFO
+        timeout = max(1.0, self.datapoints * self.valuesPerFrequency / 40)
+        started = perf_counter()
+        if clear:
+            # reset protocol to known state
+            self.transport.drain()
+            self.transport.write(pack("<Q", 0))
 
-    def readValues(self, value) -> List[str]:
+            # cmd: write register 0x30 to clear FIFO
+            self.transport.write(pack("<BBB", _CMD_WRITE, _ADDR_VALUES_FIFO, 0))
+        data = bytearray()
+        pointstodo = self.datapoints * self.valuesPerFrequency
+        while pointstodo > 0:
+            logger.debug("reading values")
+            pointstoread = min(255, pointstodo)
+            # cmd: read FIFO, addr 0x30
+            cmd = pack("<BBB", _CMD_READFIFO, _ADDR_VALUES_FIFO, pointstoread)
+            if pointstoread == pointstodo and next_sweep is not None:
+                cmd += self._sweepCommand(*next_sweep)
+                cmd += pack("<BBB", _CMD_WRITE, _ADDR_VALUES_FIFO, 0)
+            self.transport.write(cmd)
+
+            nBytes = pointstoread * FIFO_RECORD.itemsize
+            arr = self.transport.readBytes(nBytes, timeout)
+            if nBytes != len(arr):
+                logger.error("expected %d bytes, got %d", nBytes, len(arr))
+                self.transport.record("readfifo", started, timed_out=True)
+                return b""
+            data += arr
+            pointstodo = pointstodo - pointstoread
+        self.transport.record("readfifo", started)
+        return bytes(data)
+
+    @staticmethod
+    def decodeFifo(data: bytes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Decode FIFO records into frequency indices, S11 and S21"""
+        records = np.frombuffer(data, dtype=FIFO_RECORD)
+        fwd = records["fwd"][:, 0] + 1j * records["fwd"][:, 1]
+        rev0 = records["rev0"][:, 0] + 1j * records["rev0"][:, 1]
+        rev1 = records["rev1"][:, 0] + 1j * records["rev1"][:, 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return records["freq_index"].astype(np.intp), rev0 / fwd, rev1 / fwd
+
+    def decodeSweep(self, data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+        """Decode the records of a sweep into S11 and S21 ordered by frequency
+
+        With several values per frequency they are combined using
+        averagingMethod, discarding discardPerFrequency values when trimming.
+        """
+        index, refl, thru = self.decodeFifo(data)
+        valid = index < self.datapoints
+        index, refl, thru = index[valid], refl[valid], thru[valid]
+        if self.valuesPerFrequency == 1:
+            s11 = np.zeros(self.datapoints, dtype=np.complex128)
+            s21 = np.zeros(self.datapoints, dtype=np.complex128)
+            s11[index] = refl
+            s21[index] = thru
+            return s11, s21
+
+        order = np.argsort(index, kind="stable")
+        index, refl, thru = index[order], refl[order], thru[order]
+        counts = np.bincount(index, minlength=self.datapoints)
+        if np.all(counts == self.valuesPerFrequency):
+            shape = (self.datapoints, self.valuesPerFrequency)
+            return tuple(
+                average(values.reshape(shape), self.averagingMethod,
+                        self.discardPerFrequency, 1)
+                for values in (refl, thru))
+        logger.warning("Uneven number of values per frequency, using plain average")
+        counts = np.maximum(counts, 1)
+        return tuple(
+            (np.bincount(index, values.real, self.datapoints) +
+             1j * np.bincount(index, values.imag, self.datapoints)) / counts
+            for values in (refl, thru))
+
+    def readScan(self, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        self.checkValid()
+        self.setSweep(start, stop)
+        data = self.readFifo()
+        if not data:
+            return (np.empty(0, dtype=np.int64),
+                    np.empty(0, dtype=np.complex128),
+                    np.empty(0, dtype=np.complex128))
+        self.sweepData11, self.sweepData21 = self.decodeSweep(data)
+        return (self.sweepFrequencies(),
+                self.sweepData11.copy(), self.sweepData21.copy())
+
+    def readScans(self, ranges: List[Tuple[int, int]]) -> Iterator[
+            Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Pipelined readScan over several segments
+
+        The next segment is measured while the current one is being
+        transferred, and records are decoded on a separate thread while
+        the following segment is read.
+        """
+        self.checkValid()
+        ranges = list(ranges)
+        clear = True
+        with ThreadPoolExecutor(max_workers=1) as decoder:
+            pending = None
+            for i, (start, stop) in enumerate(ranges):
+                sweep = self._sweepRange(start, stop)
+                if clear or (self.sweepStartHz, self.sweepStepHz) != sweep:
+                    # First segment, or the sweep was changed in between
+                    self.sweepStartHz, self.sweepStepHz = sweep
+                    self._updateSweep()
+                    clear = True
+                frequencies = self.sweepFrequencies()
+                next_sweep = self._sweepRange(*ranges[i + 1]) if i + 1 < len(ranges) else None
+                data = self.readFifo(clear, next_sweep)
+                if data and next_sweep is not None:
+                    self.sweepStartHz, self.sweepStepHz = next_sweep
+                    clear = False
+                else:
+                    clear = True
+                segment = (frequencies, decoder.submit(self.decodeSweep, data) if data else None)
+                if pending is not None:
+                    yield self._pipelineResult(*pending)
+                pending = segment
+            if pending is not None:
+                yield self._pipelineResult(*pending)
+
+    @staticmethod
+    def _pipelineResult(frequencies: np.ndarray, decoded: Future) -> Tuple[
+            np.ndarray, np.ndarray, np.ndarray]:
+        if decoded is None:
+            return (np.empty(0, dtype=np.int64),
+                    np.empty(0, dtype=np.complex128),
+                    np.empty(0, dtype=np.complex128))
+        s11, s21 = decoded.result()
+        return frequencies, s11, s21
+
+    def readValues(self, value, timeout: float = None) -> List[str]:
         self.checkValid()
-        self.serial.timeout = round(self.datapoints / 40)
-
 
         # Actually grab the data only when requesting channel 0.
         # The hardware will return all channels which we will store.
         if value == "data 0":
-            # reset protocol to known state
-            self.serial.write(pack("<Q", 0))
-
-            # cmd: write register 0x30 to clear FIFO
-            self.serial.write(pack("<BBB", _CMD_WRITE, _ADDR_VALUES_FIFO, 0))
-            pointstodo = self.datapoints
-            while pointstodo > 0:
-                logger.info("reading values")
-                pointstoread = min(255, pointstodo)
-                # cmd: read FIFO, addr 0x30
-                self.serial.write(pack("<BBB", _CMD_READFIFO, _ADDR_VALUES_FIFO, pointstoread))
-
-                # each value is 32 bytes
-                nBytes = pointstoread * 32
-
-                # serial .read() will wait for exactly nBytes bytes
-                arr = self.serial.read(nBytes)
-                if nBytes != len(arr):
-                    logger.error("expected %d bytes, got %d", nBytes, len(arr))
-                    return []
-
-                for i in range(pointstoread):
-                    (fwd_real, fwd_imag, rev0_real, rev0_imag, rev1_real,
-                     rev1_imag, freq_index) = unpack_from(
-                         "<iiiiiihxxxxxx", arr, i * 32)
-                    fwd = complex(fwd_real, fwd_imag)
-                    refl = complex(rev0_real, rev0_imag)
-                    thru = complex(rev1_real, rev1_imag)
-                    self.sweepData[freq_index] = (refl / fwd, thru / fwd)
-
-                pointstodo = pointstodo - pointstoread
-
-            ret = [x[0] for x in self.sweepData]
-            ret = [str(x.real) + ' ' + str(x.imag) for x in ret]
-            return ret
-
-        if value == "data 1":
-            ret = [x[1] for x in self.sweepData]
-            ret = [str(x.real) + ' ' + str(x.imag) for x in ret]
-            return ret
+            data = self.readFifo()
+            if not data:
+                return []
+            self.sweepData11, self.sweepData21 = self.decodeSweep(data)
+            values = self.sweepData11
+        elif value == "data 1":
+            values = self.sweepData21
+        else:
+            return []
+        return [f"{re} {im}" for re, im in zip(values.real.tolist(), values.imag.tolist())]
 
     def readValues11(self) -> List[str]:
         return self.readValues("data 0")
@@ -178,17 +314,30 @@ class NanoVNAV2(VNA):
     def readVersion(self):
         # read register 0xf0 (device type), 0xf2 (board revision)
         cmd = b"\x10\xf0\x10\xf2"
-        self.serial.write(cmd)
+        self.transport.write(cmd)
 
-        resp = self.serial.read(2)
+        resp = self.transport.readBytes(2, REGISTER_TIMEOUT)
         if len(resp) != 2:
             logger.error("Timeout reading version registers")
             return None
         return Version(f"{resp[0]}.0.{resp[1]}")
 
 
+    def setAverages(self, averages: int, discard: int, method: str = "trim") -> bool:
+        averages = max(1, averages)
+        discard = max(0, min(discard, averages - 1))
+        if averages != self.valuesPerFrequency:
+            self.valuesPerFrequency = averages
+            self._updateSweep()
+        self.discardPerFrequency = discard
+        self.averagingMethod = method
+        return True
+
+    def _sweepRange(self, start, stop) -> Tuple[float, float]:
+        return start, (stop - start) / (self.datapoints - 1)
+
     def setSweep(self, start, stop):
-        step = (stop - start) / (self.datapoints - 1)
+        start, step = self._sweepRange(start, stop)
         if start == self.sweepStartHz and step == self.sweepStepHz:
             return
         self.sweepStartHz = start
@@ -197,11 +346,14 @@ class NanoVNAV2(VNA):
         self._updateSweep()
         return
 
+    def _sweepCommand(self, start: float, step: float) -> bytes:
+        cmd = pack("<BBQ", _CMD_WRITE8, _ADDR_SWEEP_START, int(start))
+        cmd += pack("<BBQ", _CMD_WRITE8, _ADDR_SWEEP_STEP, int(step))
+        cmd += pack("<BBH", _CMD_WRITE2, _ADDR_SWEEP_POINTS, self.datapoints)
+        cmd += pack("<BBH", _CMD_WRITE2, _ADDR_SWEEP_VALS_PER_FREQ,
+                    self.valuesPerFrequency)
+        return cmd
+
     def _updateSweep(self):
         self.checkValid()
-
-        cmd = pack("<BBQ", _CMD_WRITE8, _ADDR_SWEEP_START, int(self.sweepStartHz))
-        cmd += pack("<BBQ", _CMD_WRITE8, _ADDR_SWEEP_STEP, int(self.sweepStepHz))
-        cmd += pack("<BBH", _CMD_WRITE2, _ADDR_SWEEP_POINTS, self.datapoints)
-        cmd += pack("<BBH", _CMD_WRITE2, _ADDR_SWEEP_VALS_PER_FREQ, 1)
-        self.serial.write(cmd)
+        self.transport.write(self._sweepCommand(self.sweepStartHz, self.sweepStepHz))
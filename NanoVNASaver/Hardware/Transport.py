@@ -0,0 +1,153 @@
+#  NanoVNASaver
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019.  Rune B. Broberg
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+import threading
+from time import perf_counter
+from typing import Dict
+
+import serial
+
+logger = logging.getLogger(__name__)
+
+PROMPT = b"ch> "
+# Default time allowed for a command to answer with a prompt
+COMMAND_TIMEOUT = 2.0
+
+
+class CommandStats:
+    """Latency statistics for one serial command"""
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.timeouts = 0
+
+    def add(self, latency: float, timed_out: bool = False):
+        self.count += 1
+        self.total += latency
+        self.maximum = max(self.maximum, latency)
+        if timed_out:
+            self.timeouts += 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.count} calls, mean {self.mean * 1000:.1f} ms,"
+                f" max {self.maximum * 1000:.1f} ms, {self.timeouts} timeouts")
+
+
+class SerialTransport:
+    """Prompt driven, deadline bounded reads and writes on a serial port
+
+    Reads return as soon as the expected prompt or byte count has
+    arrived instead of sleeping for fixed delays. The low level read and
+    write methods expect the caller to hold the lock, command() takes it
+    itself.
+    """
+    def __init__(self, serial_port: serial.Serial, lock: threading.Lock,
+                 prompt: bytes = PROMPT):
+        self.serial = serial_port
+        self.lock = lock
+        self.prompt = prompt
+        self.stats: Dict[str, CommandStats] = {}
+        # Received but not yet consumed
+        self.buffer = bytearray()
+
+    def record(self, name: str, started: float, timed_out: bool = False):
+        latency = perf_counter() - started
+        self.stats.setdefault(name, CommandStats()).add(latency, timed_out)
+        logger.debug("%s took %.1f ms%s", name, latency * 1000,
+                     " (timed out)" if timed_out else "")
+
+    def drain(self):
+        """Discard anything already received"""
+        self.buffer.clear()
+        while self.serial.in_waiting:
+            self.serial.read(self.serial.in_waiting)
+
+    def write(self, data: bytes):
+        self.serial.write(data)
+
+    def writeCommand(self, command: str):
+        self.serial.write((command + "\r").encode('ascii'))
+
+    def receive(self):
+        """Append what is waiting, or block up to the port timeout for a byte"""
+        self.buffer += self.serial.read(max(1, self.serial.in_waiting))
+
+    def readBytes(self, size: int, timeout: float = COMMAND_TIMEOUT) -> bytes:
+        """Read exactly size bytes, or fewer if the deadline passes"""
+        deadline = perf_counter() + timeout
+        while len(self.buffer) < size:
+            self.receive()
+            if perf_counter() > deadline and len(self.buffer) < size:
+                logger.warning("Timeout reading %d bytes, got %d",
+                               size, len(self.buffer))
+                break
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def readUntil(self, terminator: bytes = None,
+                  timeout: float = COMMAND_TIMEOUT) -> bytes:
+        """Read up to and including terminator, by default the prompt
+
+        Raises serial.SerialTimeoutException if the terminator does not
+        arrive before the deadline.
+        """
+        terminator = terminator or self.prompt
+        deadline = perf_counter() + timeout
+        start = 0
+        while True:
+            end = self.buffer.find(terminator, start)
+            if end >= 0:
+                end += len(terminator)
+                data = bytes(self.buffer[:end])
+                del self.buffer[:end]
+                return data
+            start = max(0, len(self.buffer) - len(terminator) + 1)
+            if perf_counter() > deadline:
+                raise serial.SerialTimeoutException(
+                    f"Timeout waiting for {terminator!r}"
+                    f" after {len(self.buffer)} bytes")
+            self.receive()
+
+    def readLine(self, timeout: float = COMMAND_TIMEOUT) -> bytes:
+        return self.readUntil(b"\n", timeout)
+
+    def command(self, command: str, timeout: float = COMMAND_TIMEOUT) -> str:
+        """Send a command and return the reply up to and including the prompt
+
+        The reply starts with the echoed command line.
+        """
+        name = command.split(" ", 1)[0]
+        with self.lock:
+            started = perf_counter()
+            self.drain()
+            self.writeCommand(command)
+            try:
+                reply = self.readUntil(timeout=timeout)
+                # Skip a prompt left over from an earlier command
+                while reply.strip() == self.prompt.strip():
+                    reply = self.readUntil(timeout=timeout)
+            except serial.SerialTimeoutException:
+                self.record(name, started, timed_out=True)
+                raise
+            self.record(name, started)
+        return reply.decode('ascii')
@@ -16,14 +16,21 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import logging
 import re
-from time import sleep
-from typing import List
+from typing import Iterator, List, Tuple
 
+import numpy as np
 import serial
 from PyQt5 import QtWidgets, QtGui
 
+from NanoVNASaver.Hardware.Transport import SerialTransport, COMMAND_TIMEOUT
+
 logger = logging.getLogger(__name__)
 
+# Time allowed for a complete sweep to be measured and returned
+SCAN_TIMEOUT = 5.0
+# Time to wait for a prompt when resynchronising with the device
+FLUSH_TIMEOUT = 0.2
+
 
 class VNA:
     name = "VNA"
@@ -31,15 +38,22 @@ class VNA:
     def __init__(self, app: QtWidgets.QWidget, serial_port: serial.Serial):
         self.app = app
         self.serial = serial_port
+        self.transport = SerialTransport(serial_port, app.serialLock)
         self.version: Version = Version("0.0.0")
         self.features = set()
+        self.commands = set()
         self.validateInput = True
         self.datapoints = 101
+        self.useBinaryScan = False
+        self.useCombinedScan = False
+        self.combinedScanVerified = False
+        self.usePipelinedScan = False
 
     def readFeatures(self) -> List[str]:
         raw_help = self.readFromCommand("help")
         logger.debug("Help command output:")
         logger.debug(raw_help)
+        self.commands = set(raw_help.split())
 
         #  Detect features from the help command
         if "capture" in raw_help:
@@ -57,9 +71,70 @@ class VNA:
     def readValues21(self) -> List[str]:
         return []
 
+    def readScan(self, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Sweep and read frequencies, S11 and S21 in one transaction
+
+        Returns the frequencies and complex S11 and S21 arrays, or empty
+        arrays if the read failed. Combined reads are disabled if the
+        first reply shows the firmware doesn't support the outmask
+        argument, an unparseable first reply is retried once.
+        """
+        empty = (np.empty(0, dtype=np.int64),
+                 np.empty(0, dtype=np.complex128), np.empty(0, dtype=np.complex128))
+        if not self.useCombinedScan:
+            return empty
+        attempts = 1 if self.combinedScanVerified else 2
+        for _ in range(attempts):
+            lines = self.readValues(
+                f"scan {start} {stop} {self.datapoints} 7", SCAN_TIMEOUT)
+            try:
+                values = np.array(" ".join(lines).split(), dtype=np.float64)
+                values = values.reshape(self.datapoints, 5)
+            except ValueError:
+                if self.combinedScanVerified:
+                    logger.warning("Invalid combined scan data (%d lines)", len(lines))
+                    return empty
+                if self.unsupportedScanReply(lines):
+                    break
+                logger.debug("Unparseable combined scan reply (%d lines)", len(lines))
+                continue
+            self.combinedScanVerified = True
+            return (values[:, 0].astype(np.int64),
+                    values[:, 1] + 1j * values[:, 2],
+                    values[:, 3] + 1j * values[:, 4])
+        logger.info("Combined scan not supported, using separate reads.")
+        self.features.discard("Combined scan")
+        self.useCombinedScan = False
+        return empty
+
+    @staticmethod
+    def unsupportedScanReply(lines: List[str]) -> bool:
+        """Whether a reply to scan with outmask shows the firmware lacks it
+
+        That is an error or usage message, or no line with the five
+        columns of frequency, S11 and S21.
+        """
+        lines = [line for line in lines if line.strip()]
+        if not lines:
+            return False
+        if any(word in line.lower() for line in lines
+               for word in ("usage", "error", "invalid", "?")):
+            return True
+        return all(len(line.split()) != 5 for line in lines)
+
+    def readScans(self, ranges: List[Tuple[int, int]]) -> Iterator[
+            Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """readScan over several segments, overlapped where the device allows"""
+        for start, stop in ranges:
+            yield self.readScan(start, stop)
+
     def resetSweep(self, start: int, stop: int):
         pass
 
+    def setAverages(self, averages: int, discard: int, method: str = "trim") -> bool:
+        """Average on the device, returns False if it can't"""
+        return False
+
     def isValid(self):
         return False
 
@@ -77,104 +152,59 @@ class VNA:
 
     def flushSerialBuffers(self):
         if self.app.serialLock.acquire():
-            self.serial.write(b"\r\n\r\n")
-            sleep(0.1)
-            self.serial.reset_input_buffer()
-            self.serial.reset_output_buffer()
-            sleep(0.1)
-            self.app.serialLock.release()
-
-    def readFirmware(self) -> str:
-        if self.app.serialLock.acquire():
-            result = ""
             try:
-                data = "a"
-                while data != "":
-                    data = self.serial.readline().decode('ascii')
-                self.serial.write("info\r".encode('ascii'))
-                result = ""
-                data = ""
-                sleep(0.01)
-                while data != "ch> ":
-                    data = self.serial.readline().decode('ascii')
-                    result += data
-            except serial.SerialException as exc:
-                logger.exception(
-                    "Exception while reading firmware data: %s", exc)
+                self.transport.write(b"\r\n\r\n")
+                self.transport.readUntil(timeout=FLUSH_TIMEOUT)
+            except serial.SerialException:
+                logger.debug("No prompt while flushing serial buffers")
             finally:
+                self.serial.reset_input_buffer()
+                self.serial.reset_output_buffer()
+                self.transport.drain()
                 self.app.serialLock.release()
-            return result
-        logger.error("Unable to acquire serial lock to read firmware.")
+
+    def readFirmware(self) -> str:
+        try:
+            return self.transport.command("info")
+        except serial.SerialException as exc:
+            logger.exception(
+                "Exception while reading firmware data: %s", exc)
         return ""
 
     def readFromCommand(self, command) -> str:
-        if self.app.serialLock.acquire():
-            result = ""
-            try:
-                data = "a"
-                while data != "":
-                    data = self.serial.readline().decode('ascii')
-                self.serial.write((command + "\r").encode('ascii'))
-                result = ""
-                data = ""
-                sleep(0.01)
-                while data != "ch> ":
-                    data = self.serial.readline().decode('ascii')
-                    result += data
-            except serial.SerialException as exc:
-                logger.exception(
-                    "Exception while reading %s: %s", command, exc)
-            finally:
-                self.app.serialLock.release()
-            return result
-        logger.error("Unable to acquire serial lock to read %s", command)
+        try:
+            return self.transport.command(command)
+        except serial.SerialException as exc:
+            logger.exception(
+                "Exception while reading %s: %s", command, exc)
         return ""
 
-    def readValues(self, value) -> List[str]:
+    def readValues(self, value, timeout: float = COMMAND_TIMEOUT) -> List[str]:
         logger.debug("VNA reading %s", value)
-        if self.app.serialLock.acquire():
-            try:
-                data = "a"
-                while data != "":
-                    data = self.serial.readline().decode('ascii')
-                #  Then send the command to read data
-                self.serial.write(str(value + "\r").encode('ascii'))
-                result = ""
-                data = ""
-                sleep(0.05)
-                while data != "ch> ":
-                    data = self.serial.readline().decode('ascii')
-                    result += data
-                values = result.split("\r\n")
-            except serial.SerialException as exc:
-                logger.exception(
-                    "Exception while reading %s: %s", value, exc)
-                return []
-            finally:
-                self.app.serialLock.release()
-            logger.debug(
-                "VNA done reading %s (%d values)",
-                value, len(values)-2)
-            return values[1:-1]
-        logger.error("Unable to acquire serial lock to read %s", value)
-        return []
-
-    def writeSerial(self, command):
+        try:
+            result = self.transport.command(value, timeout)
+        except serial.SerialException as exc:
+            logger.exception(
+                "Exception while reading %s: %s", value, exc)
+            return []
+        values = result.split("\r\n")
+        logger.debug(
+            "VNA done reading %s (%d values)",
+            value, len(values)-2)
+        return values[1:-1]
+
+    def writeSerial(self, command, timeout: float = COMMAND_TIMEOUT):
         if not self.serial.is_open:
             logger.warning("Writing without serial port being opened (%s)",
                            command)
             return
-        if self.app.serialLock.acquire():
-            try:
-                self.serial.write(str(command + "\r").encode('ascii'))
-                self.serial.readline()
-            except serial.SerialException as exc:
-                logger.exception(
-                    "Exception while writing to serial port (%s): %s",
-                    command, exc)
-            finally:
-                self.app.serialLock.release()
-        return
+        try:
+            # Wait for the prompt so the next command starts clean
+            self.transport.command(command, timeout)
+        except serial.SerialException as exc:
+            logger.exception(
+                "Exception while writing to serial port (%s): %s",
+                command, exc)
 
     def setSweep(self, start, stop):
         self.writeSerial("sweep " + str(start) + " " + str(stop) + " " + str(self.datapoints))
@@ -17,6 +17,7 @@
 
 from typing import List, NamedTuple
 from NanoVNASaver.RFTools import Datapoint
+from NanoVNASaver.SweepData import SweepSeries
 
 
 class Label(NamedTuple):
@@ -66,21 +67,23 @@ class Value():
         self.freq = freq
         self.s11data = [] if s11data is None else s11data[:]
         self.s21data = [] if s21data is None else s21data[:]
+        # The whole sweep, for values taken from its shared derived series
+        self.s11series = SweepSeries()
+        self.s21series = SweepSeries()
+        self.seriesIndex = -1
 
     def store(self, index: int,
               s11data: List[Datapoint],
               s21data: List[Datapoint]):
         # handle boundaries
-        if index == 0:
-            index = 1
-            s11data = [s11data[0], ] + s11data
-            if s21data:
-                s21data = [s21data[0], ] + s21data
-        if index == len(s11data):
-            s11data = s11data + [s11data[-1], ]
-            if s21data:
-                s21data = s21data + [s21data[-1], ]
-        self.freq = s11data[1].freq
-        self.s11data = s11data[index-1:index+2]
-        if s21data:
-            self.s21data = s21data[index-1:index+2]
+        indices = (max(index - 1, 0), index, min(index + 1, len(s11data) - 1))
+        self.freq = s11data[index].freq
+        self.s11data = [s11data[i] for i in indices]
+        self.s11series = SweepSeries.from_datapoints(s11data)
+        self.seriesIndex = index
+        if len(s21data) == len(s11data):
+            self.s21data = [s21data[i] for i in indices]
+            self.s21series = SweepSeries.from_datapoints(s21data)
+        else:
+            self.s21data = []
+            self.s21series = SweepSeries()
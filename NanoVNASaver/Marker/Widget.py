@@ -15,8 +15,9 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import math
-from typing import List
+from typing import Dict, List
 
+import numpy as np
 from PyQt5 import QtGui, QtWidgets, QtCore
 from PyQt5.QtCore import pyqtSignal
 
@@ -36,6 +37,7 @@ from NanoVNASaver.Formatting import (
 )
 from NanoVNASaver.Inputs import MarkerFrequencyInputWidget as FrequencyInput
 from NanoVNASaver.Marker.Values import TYPES, Value, default_label_ids
+from NanoVNASaver.SweepData import SweepSeries
 
 COLORS = (
     QtGui.QColor(QtCore.Qt.darkGray),
@@ -210,6 +212,7 @@ class Marker(QtCore.QObject, Value):
     def setFieldSelection(self, fields):
         self.active_labels = fields[:]
         self.buildForm()
+        self.refreshLabels()
 
     def setColor(self, color):
         if color.isValid():
@@ -245,31 +248,28 @@ class Marker(QtCore.QObject, Value):
             # Set the frequency before loading any data
             return
 
-        min_freq = data[0].freq
-        max_freq = data[-1].freq
-        lower_stepsize = data[1].freq - data[0].freq
-        upper_stepsize = data[-1].freq - data[-2].freq
+        freqs = SweepSeries.from_datapoints(data).freq
+        min_freq = freqs[0]
+        max_freq = freqs[-1]
+        lower_stepsize = freqs[1] - freqs[0] if datasize > 1 else 0
+        upper_stepsize = freqs[-1] - freqs[-2] if datasize > 1 else 0
 
         # We are outside the bounds of the data, so we can't put in a marker
         if (self.freq + lower_stepsize/2 < min_freq or
                 self.freq - upper_stepsize/2 > max_freq):
             return
 
-        min_distance = max_freq
-        for i, item in enumerate(data):
-            if abs(item.freq - self.freq) <= min_distance:
-                min_distance = abs(item.freq - self.freq)
-            else:
-                # We have now started moving away from the nearest point
-                self.location = i-1
-                if i < datasize:
-                    self.frequencyInput.nextFrequency = item.freq
-                if (i-2) >= 0:
-                    self.frequencyInput.previousFrequency = data[i-2].freq
-                return
-        # If we still didn't find a best spot, it was the last value
-        self.location = datasize - 1
-        self.frequencyInput.previousFrequency = data[-2].freq
+        # Nearest point, the upper one on a tie and the last of repeated
+        # frequencies
+        upper = min(int(np.searchsorted(freqs, self.freq)), datasize - 1)
+        if upper > 0 and (abs(freqs[upper - 1] - self.freq) <
+                          abs(freqs[upper] - self.freq)):
+            upper -= 1
+        self.location = int(np.searchsorted(freqs, freqs[upper], "right")) - 1
+        if self.location + 1 < datasize:
+            self.frequencyInput.nextFrequency = int(freqs[self.location + 1])
+        if self.location > 0:
+            self.frequencyInput.previousFrequency = int(freqs[self.location - 1])
 
     def getGroupBox(self) -> QtWidgets.QGroupBox:
         return self.group_box
@@ -284,56 +284,73 @@ class Marker(QtCore.QObject, Value):
         if self.location == -1:
             return
         self.store(self.location, s11data, s21data)
+        self.refreshLabels()
 
-        s11 = s11data[self.location]
-
-        imp = s11.impedance()
-        cap_str = format_capacitance(RFTools.impedance_to_capacitance(imp, s11.freq))
-        ind_str = format_inductance(RFTools.impedance_to_inductance(imp, s11.freq))
-
+    def refreshLabels(self):
+        """Set the active labels from the stored points around the marker"""
+        if self.location == -1 or not self.s11data:
+            return
+        for label_id, text in self.labelTexts(self.active_labels).items():
+            self.label[label_id].setText(text)
+
+    def labelTexts(self, label_ids: List[str]) -> Dict[str, str]:
+        """Texts of the given labels, formatting only those asked for"""
+        # store() keeps the marker point between its neighbours and the
+        # sweep, whose derived series are shared with the charts
+        s11 = self.s11data[1]
+        s11series, i = self.s11series, self.seriesIndex
+        imp = complex(s11series.impedance()[i])
         imp_p = RFTools.serial_to_parallel(imp)
-        cap_p_str = format_capacitance(RFTools.impedance_to_capacitance(imp_p, s11.freq))
-        ind_p_str = format_inductance(RFTools.impedance_to_inductance(imp_p, s11.freq))
 
-        if imp.imag < 0:
-            x_str = cap_str
-        else:
-            x_str = ind_str
-
-        if imp_p.imag < 0:
-            x_p_str = cap_p_str
-        else:
-            x_p_str = ind_p_str
-
-        self.label['actualfreq'].setText(format_frequency(s11.freq))
-        self.label['admittance'].setText(format_complex_imp(imp_p))
-        self.label['impedance'].setText(format_complex_imp(imp))
-        self.label['parc'].setText(cap_p_str)
-        self.label['parl'].setText(ind_p_str)
-        self.label['parlc'].setText(x_p_str)
-        self.label['parr'].setText(format_resistance(imp_p.real))
-        self.label['returnloss'].setText(
-            format_gain(s11.gain, self.returnloss_is_positive))
-        self.label['s11groupdelay'].setText(
-            format_group_delay(RFTools.groupDelay(s11data, self.location)))
-        self.label['s11mag'].setText(format_magnitude(abs(s11.z)))
-        self.label['s11phase'].setText(format_phase(s11.phase))
-        self.label['s11polar'].setText(
-            str(round(abs(s11.z), 2)) + "∠" + format_phase(s11.phase))
-        self.label['s11q'].setText(format_q_factor(s11.qFactor()))
-        self.label['s11z'].setText(format_resistance(abs(imp)))
-        self.label['serc'].setText(cap_str)
-        self.label['serl'].setText(ind_str)
-        self.label['serlc'].setText(x_str)
-        self.label['serr'].setText(format_resistance(imp.real))
-        self.label['vswr'].setText(format_vswr(s11.vswr))
-
-        if len(s21data) == len(s11data):
-            s21 = s21data[self.location]
-            self.label['s21gain'].setText(format_gain(s21.gain))
-            self.label['s21groupdelay'].setText(
-                format_group_delay(RFTools.groupDelay(s21data, self.location) / 2))
-            self.label['s21mag'].setText(format_magnitude(abs(s21.z)))
-            self.label['s21phase'].setText(format_phase(s21.phase))
-            self.label['s21polar'].setText(
-                str(round(abs(s21.z), 2)) + "∠" + format_phase(s21.phase))
+        def reactance(z: complex) -> str:
+            if z.imag < 0:
+                return format_capacitance(
+                    RFTools.impedance_to_capacitance(z, s11.freq))
+            return format_inductance(
+                RFTools.impedance_to_inductance(z, s11.freq))
+
+        fields = {
+            'actualfreq': lambda: format_frequency(s11.freq),
+            'admittance': lambda: format_complex_imp(imp_p),
+            'impedance': lambda: format_complex_imp(imp),
+            'parc': lambda: format_capacitance(
+                RFTools.impedance_to_capacitance(imp_p, s11.freq)),
+            'parl': lambda: format_inductance(
+                RFTools.impedance_to_inductance(imp_p, s11.freq)),
+            'parlc': lambda: reactance(imp_p),
+            'parr': lambda: format_resistance(imp_p.real),
+            'returnloss': lambda: format_gain(
+                float(s11series.gain[i]), self.returnloss_is_positive),
+            's11groupdelay': lambda: format_group_delay(
+                float(s11series.groupDelay()[i])),
+            's11mag': lambda: format_magnitude(abs(s11.z)),
+            's11phase': lambda: format_phase(float(s11series.phase[i])),
+            's11polar': lambda: (
+                str(round(abs(s11.z), 2)) + "∠" +
+                format_phase(float(s11series.phase[i]))),
+            's11q': lambda: format_q_factor(float(s11series.qFactor()[i])),
+            's11z': lambda: format_resistance(abs(imp)),
+            'serc': lambda: format_capacitance(
+                RFTools.impedance_to_capacitance(imp, s11.freq)),
+            'serl': lambda: format_inductance(
+                RFTools.impedance_to_inductance(imp, s11.freq)),
+            'serlc': lambda: reactance(imp),
+            'serr': lambda: format_resistance(imp.real),
+            'vswr': lambda: format_vswr(float(s11series.vswr[i])),
+        }
+
+        if self.s21data:
+            s21 = self.s21data[1]
+            s21series = self.s21series
+            fields.update({
+                's21gain': lambda: format_gain(float(s21series.gain[i])),
+                's21groupdelay': lambda: format_group_delay(
+                    float(s21series.groupDelay()[i]) / 2),
+                's21mag': lambda: format_magnitude(abs(s21.z)),
+                's21phase': lambda: format_phase(float(s21series.phase[i])),
+                's21polar': lambda: (
+                    str(round(abs(s21.z), 2)) + "∠" +
+                    format_phase(float(s21series.phase[i]))),
+            })
+        return {label_id: fields[label_id]()
+                for label_id in label_ids if label_id in fields}
@@ -21,6 +21,7 @@ import threading
 from time import sleep, strftime, localtime
 from typing import List
 
+import numpy as np
 import serial
 from PyQt5 import QtWidgets, QtCore, QtGui
 
@@ -28,7 +29,7 @@ from .Windows import AboutWindow, AnalysisWindow, CalibrationWindow, \
     DeviceSettingsWindow, DisplaySettingsWindow, SweepSettingsWindow, \
     TDRWindow
 from .Hardware import get_interfaces, get_VNA, InvalidVNA
-from .RFTools import RFTools, Datapoint
+from .RFTools import RFTools
 from .Charts.Chart import Chart
 from .Charts import CapacitanceChart, \
     CombinedLogMagChart, GroupDelayChart, InductanceChart, \
@@ -40,6 +41,7 @@ from .Charts import CapacitanceChart, \
 from .Calibration import Calibration
 from .Inputs import FrequencyInputWidget
 from .Marker import Marker
+from .SweepData import SweepData, SweepSeries
 from .SweepWorker import SweepWorker
 from .Settings import BandsModel
 from .Touchstone import Touchstone
@@ -47,6 +49,9 @@ from .about import version as ver
 
 logger = logging.getLogger(__name__)
 
+# Shortest time in ms between marker readout updates while sweeping
+MARKER_LABEL_INTERVAL = 100
+
 
 class NanoVNASaver(QtWidgets.QWidget):
     version = ver
@@ -71,6 +76,7 @@ class NanoVNASaver(QtWidgets.QWidget):
         self.worker = SweepWorker(self)
 
         self.worker.signals.updated.connect(self.dataUpdated)
+        self.worker.signals.updatedSegment.connect(self.saveSegment)
         self.worker.signals.finished.connect(self.sweepFinished)
         self.worker.signals.sweepError.connect(self.showSweepError)
         self.worker.signals.fatalSweepError.connect(self.showFatalSweepError)
@@ -85,10 +91,18 @@ class NanoVNASaver(QtWidgets.QWidget):
 
         self.dataLock = threading.Lock()
         # TODO: use Touchstone class as data container
-        self.data: List[Datapoint] = []
-        self.data21: List[Datapoint] = []
-        self.referenceS11data: List[Datapoint] = []
-        self.referenceS21data: List[Datapoint] = []
+        self.data = SweepSeries()
+        self.data21 = SweepSeries()
+        # Behind data and data21 while segments of a sweep come in
+        self.sweepBuffer: SweepData = None
+        # Point range changed by the worker since the last dataUpdated
+        self.updatedRange = None
+        self.markerLabelTime = QtCore.QElapsedTimer()
+        self.markerLabelTimer = QtCore.QTimer()
+        self.markerLabelTimer.setSingleShot(True)
+        self.markerLabelTimer.timeout.connect(self.delayedMarkerLabels)
+        self.referenceS11data = SweepSeries()
+        self.referenceS21data = SweepSeries()
 
         self.sweepSource = ""
         self.referenceSource = ""
@@ -554,11 +568,15 @@ class NanoVNASaver(QtWidgets.QWidget):
         if nr_params == 1:
             filedialog.setDefaultSuffix("s1p")
             filedialog.setNameFilter(
-                "Touchstone 1-Port Files (*.s1p);;All files (*.*)")
+                "Touchstone 1-Port Files (*.s1p);;"
+                "Compressed Touchstone 1-Port Files (*.s1p.gz);;"
+                "All files (*.*)")
         else:
             filedialog.setDefaultSuffix("s2p")
             filedialog.setNameFilter(
-                "Touchstone 2-Port Files (*.s2p);;All files (*.*)")
+                "Touchstone 2-Port Files (*.s2p);;"
+                "Compressed Touchstone 2-Port Files (*.s2p.gz);;"
+                "All files (*.*)")
         filedialog.setAcceptMode(QtWidgets.QFileDialog.AcceptSave)
         selected = filedialog.exec()
         if not selected:
@@ -572,9 +590,7 @@ class NanoVNASaver(QtWidgets.QWidget):
         ts.sdata[0] = self.data
         if nr_params > 1:
             ts.sdata[1] = self.data
-            for dp in self.data:
-                ts.sdata[2].append(Datapoint(dp.freq, 0, 0))
-                ts.sdata[3].append(Datapoint(dp.freq, 0, 0))
+            ts.sdata[2] = ts.sdata[3] = SweepSeries(self.data.freq)
         try:
             ts.save(nr_params)
         except IOError as e:
@@ -608,6 +624,8 @@ class NanoVNASaver(QtWidgets.QWidget):
 
             self.vna = get_VNA(self, self.serial)
             self.vna.validateInput = self.settings.value("SerialInputValidation", True, bool)
+            if not self.settings.value("PipelinedSweeps", True, bool):
+                self.vna.usePipelinedScan = False
             self.worker.setVNA(self.vna)
 
             logger.info(self.vna.readFirmware())
@@ -683,44 +701,113 @@ class NanoVNASaver(QtWidgets.QWidget):
 
     def saveData(self, data, data12, source=None):
         if self.dataLock.acquire(blocking=True):
-            self.data = data
-            self.data21 = data12
+            self.data = SweepSeries.from_datapoints(data)
+            self.data21 = SweepSeries.from_datapoints(data12)
+            self.sweepBuffer = None
         else:
             logger.error("Failed acquiring data lock while saving.")
         self.dataLock.release()
         if source is not None:
+            # Replaced as a whole, not by the worker
+            self.updatedRange = None
             self.sweepSource = source
         else:
-            self.sweepSource = (
-                f"{self.sweepTitle}"
-                f" {strftime('%Y-%m-%d %H:%M:%S', localtime())}"
-            ).lstrip()
+            self.updateSweepSource()
+
+    def saveSegment(self, start: int, filled: int, segment: SweepData):
+        """Copy a segment the worker read into the displayed data
+
+        Runs on the GUI thread, so the arrays behind data and data21
+        are never written while they are being drawn.
+        """
+        stop = start + len(segment)
+        if self.dataLock.acquire(blocking=True):
+            if self.sweepBuffer is None or len(self.sweepBuffer) < filled:
+                # Start from what is shown, it may have been recalibrated
+                buffer = SweepData(np.zeros(filled, dtype=np.int64))
+                kept = min(len(self.data), filled)
+                buffer.freq[:kept] = self.data.freq[:kept]
+                buffer.s11[:kept] = self.data.z[:kept]
+                if len(self.data21) == len(self.data):
+                    buffer.s21[:kept] = self.data21.z[:kept]
+                self.sweepBuffer = buffer
+            self.sweepBuffer.freq[start:stop] = segment.freq
+            self.sweepBuffer.s11[start:stop] = segment.s11
+            self.sweepBuffer.s21[start:stop] = segment.s21
+            sweep = self.sweepBuffer[:filled]
+            self.data = sweep.s11data
+            self.data21 = sweep.s21data
+        else:
+            logger.error("Failed acquiring data lock while saving.")
+        self.dataLock.release()
+        self.dataRangeUpdated(start, stop)
+        self.updateSweepSource()
+
+    def updateSweepSource(self):
+        self.sweepSource = (
+            f"{self.sweepTitle}"
+            f" {strftime('%Y-%m-%d %H:%M:%S', localtime())}"
+        ).lstrip()
 
     def markerUpdated(self, marker: Marker):
         if self.dataLock.acquire(blocking=True):
             marker.findLocation(self.data)
-            for m in self.markers:
-                m.resetLabels()
-                m.updateLabels(self.data, self.data21)
+            # Only the moved marker has new values
+            marker.resetLabels()
+            marker.updateLabels(self.data, self.data21)
 
             for c in self.subscribing_charts:
                 c.update()
         self.dataLock.release()
 
-    def dataUpdated(self):
+    def scheduleMarkerLabels(self):
+        """Update the marker labels, at most every MARKER_LABEL_INTERVAL ms"""
+        if self.markerLabelTimer.isActive():
+            return
+        elapsed = (self.markerLabelTime.elapsed()
+                   if self.markerLabelTime.isValid() else MARKER_LABEL_INTERVAL)
+        if elapsed >= MARKER_LABEL_INTERVAL:
+            self.updateMarkerLabels()
+        else:
+            self.markerLabelTimer.start(MARKER_LABEL_INTERVAL - elapsed)
+
+    def delayedMarkerLabels(self):
         if self.dataLock.acquire(blocking=True):
-            for m in self.markers:
-                m.resetLabels()
-                m.updateLabels(self.data, self.data21)
+            self.updateMarkerLabels()
+        self.dataLock.release()
 
-            for c in self.s11charts:
-                c.setData(self.data)
+    def updateMarkerLabels(self):
+        self.markerLabelTime.start()
+        for m in self.markers:
+            m.resetLabels()
+            m.updateLabels(self.data, self.data21)
 
-            for c in self.s21charts:
-                c.setData(self.data21)
+    def dataRangeUpdated(self, start: int, stop: int):
+        if self.updatedRange is not None:
+            start = min(start, self.updatedRange[0])
+            stop = max(stop, self.updatedRange[1])
+        self.updatedRange = (start, stop)
 
-            for c in self.combinedCharts:
-                c.setCombinedData(self.data, self.data21)
+    def dataUpdated(self):
+        if self.dataLock.acquire(blocking=True):
+            self.scheduleMarkerLabels()
+
+            # Only a part of the sweep changed if the worker said so
+            updated, self.updatedRange = self.updatedRange, None
+            if updated is not None:
+                for c in self.s11charts:
+                    c.updateData(self.data, *updated)
+                for c in self.s21charts:
+                    c.updateData(self.data21, *updated)
+                for c in self.combinedCharts:
+                    c.updateCombinedData(self.data, self.data21, *updated)
+            else:
+                for c in self.s11charts:
+                    c.setData(self.data)
+                for c in self.s21charts:
+                    c.setData(self.data21)
+                for c in self.combinedCharts:
+                    c.setCombinedData(self.data, self.data21)
 
             self.sweepProgressBar.setValue(self.worker.percentage)
             self.tdr_window.updateTDR()
@@ -728,11 +815,12 @@ class NanoVNASaver(QtWidgets.QWidget):
             # Find the minimum S11 VSWR:
             min_vswr = 100
             min_vswr_freq = -1
-            for d in self.data:
-                vswr = d.vswr
-                if min_vswr > vswr > 0:
-                    min_vswr = vswr
-                    min_vswr_freq = d.freq
+            vswr = self.data.vswr
+            valid = np.flatnonzero((vswr > 0) & (vswr < min_vswr))
+            if len(valid) > 0:
+                idx = valid[np.argmin(vswr[valid])]
+                min_vswr = float(vswr[idx])
+                min_vswr_freq = int(self.data.freq[idx])
 
             if min_vswr_freq > -1:
                 self.s11_min_swr_label.setText(
@@ -750,14 +838,16 @@ class NanoVNASaver(QtWidgets.QWidget):
             min_gain_freq = -1
             max_gain = -100
             max_gain_freq = -1
-            for d in self.data21:
-                gain = d.gain
-                if gain > max_gain:
-                    max_gain = gain
-                    max_gain_freq = d.freq
-                if gain < min_gain:
-                    min_gain = gain
-                    min_gain_freq = d.freq
+            gain = self.data21.gain
+            if len(gain) > 0:
+                idx_max = np.argmax(gain)
+                idx_min = np.argmin(gain)
+                if gain[idx_max] > max_gain:
+                    max_gain = float(gain[idx_max])
+                    max_gain_freq = int(self.data21.freq[idx_max])
+                if gain[idx_min] < min_gain:
+                    min_gain = float(gain[idx_min])
+                    min_gain_freq = int(self.data21.freq[idx_min])
 
             if max_gain_freq > -1:
                 self.s21_min_gain_label.setText(
@@ -818,6 +908,9 @@ class NanoVNASaver(QtWidgets.QWidget):
             s11data = self.data
         if not s21data:
             s21data = self.data21
+        # Copy, as continuous sweeps update the current data in place
+        s11data = SweepSeries.from_datapoints(s11data).copy()
+        s21data = SweepSeries.from_datapoints(s21data).copy()
         self.referenceS11data = s11data
         for c in self.s11charts:
             c.setReference(s11data)
@@ -862,8 +955,8 @@ class NanoVNASaver(QtWidgets.QWidget):
             self.showMarkerButton.setText("Show data")
 
     def resetReference(self):
-        self.referenceS11data = []
-        self.referenceS21data = []
+        self.referenceS11data = SweepSeries()
+        self.referenceS21data = SweepSeries()
         self.referenceSource = ""
         self.updateTitle()
         for c in self.subscribing_charts:
@@ -872,7 +965,8 @@ class NanoVNASaver(QtWidgets.QWidget):
 
     def loadReferenceFile(self):
         filename, _ = QtWidgets.QFileDialog.getOpenFileName(
-            filter="Touchstone Files (*.s1p *.s2p);;All files (*.*)")
+            filter="Touchstone Files (*.s1p *.s2p *.s1p.gz *.s2p.gz);;"
+                   "All files (*.*)")
         if filename != "":
             self.resetReference()
             t = Touchstone(filename)
@@ -881,10 +975,11 @@ class NanoVNASaver(QtWidgets.QWidget):
 
     def loadSweepFile(self):
         filename, _ = QtWidgets.QFileDialog.getOpenFileName(
-            filter="Touchstone Files (*.s1p *.s2p);;All files (*.*)")
+            filter="Touchstone Files (*.s1p *.s2p *.s1p.gz *.s2p.gz);;"
+                   "All files (*.*)")
         if filename != "":
-            self.data = []
-            self.data21 = []
+            self.data = SweepSeries()
+            self.data21 = SweepSeries()
             t = Touchstone(filename)
             t.load()
             self.saveData(t.s11data, t.s21data, filename)
@@ -967,6 +1062,8 @@ class NanoVNASaver(QtWidgets.QWidget):
         self.settings.sync()
         self.bands.saveSettings()
         self.threadpool.waitForDone(2500)
+        if Chart.renderPool is not None:
+            Chart.renderPool.waitForDone(2500)
         a0.accept()
         sys.exit()
 
@@ -18,7 +18,7 @@ import math
 import cmath
 from numbers import Number
 from typing import List, NamedTuple
-from NanoVNASaver.SITools import Value, Format, clamp_value
+from NanoVNASaver.SITools import Value, Format, clamp_value, format_value
 
 FMT_FREQ = Format()
 FMT_SHORT = Format(max_nr_digits=4)
@@ -160,15 +160,15 @@ class RFTools:
     # TODO: Remove this class when unused
     @staticmethod
     def formatFrequency(freq: Number) -> str:
-        return str(Value(freq, "Hz", FMT_FREQ))
+        return format_value(freq, "Hz", FMT_FREQ)
 
     @staticmethod
     def formatShortFrequency(freq: Number) -> str:
-        return str(Value(freq, "Hz", FMT_SHORT))
+        return format_value(freq, "Hz", FMT_SHORT)
 
     @staticmethod
     def formatSweepFrequency(freq: Number) -> str:
-        return str(Value(freq, "Hz", FMT_SWEEP))
+        return format_value(freq, "Hz", FMT_SWEEP)
 
     @staticmethod
     def parseFrequency(freq: str) -> int:
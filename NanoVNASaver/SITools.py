@@ -17,11 +17,17 @@
 from __future__ import annotations
 import math
 import decimal
-from typing import NamedTuple, Union
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Tuple, Union
 from numbers import Number, Real
 
+import numpy as np
+
 PREFIXES = ("y", "z", "a", "f", "p", "n", "µ", "m",
             "", "k", "M", "G", "T", "P", "E", "Z", "Y")
+# Divisor for each offset, ints above 1 as in the original arithmetic
+SCALES = {offset: 10 ** (offset * 3) for offset in range(-8, 9)}
+FORMAT_CACHE_SIZE = 4096
 
 
 def clamp_value(value: Real, rmin: Real, rmax: Real) -> Real:
@@ -52,6 +58,86 @@ class Format(NamedTuple):
     parse_clamp_max: float = math.inf
 
 
+@lru_cache(maxsize=None)
+def format_strings(fmt: Format) -> Tuple[str, str, str]:
+    """Format specs for scaled values below 10, below 100 and above"""
+    assert 1 <= fmt.max_nr_digits <= 30
+    assert -8 <= fmt.min_offset <= fmt.max_offset <= 8
+    sign = "+" if fmt.allways_signed else ""
+    if fmt.max_nr_digits < 3:
+        return (sign + ".0f",) * 3
+    extra = (0, 0, 0) if fmt.fix_decimals else (2, 1, 0)
+    return tuple(f"{sign}.{fmt.max_nr_digits + e - 3}f" for e in extra)
+
+
+def _format(value: Number, number: float, offset: int,
+            unit: str, fmt: Format) -> str:
+    """Format value with an already clamped offset"""
+    if fmt.assume_infinity and abs(value) >= 10 ** ((fmt.max_offset + 1) * 3):
+        return ("-" if value < 0 else "") + "\N{INFINITY}" + fmt.space_str + unit
+    if value < fmt.printable_min:
+        return fmt.unprintable_under + unit
+    if value > fmt.printable_max:
+        return fmt.unprintable_over + unit
+
+    real = number / SCALES[offset]
+    small, medium, large = format_strings(fmt)
+    magnitude = abs(real)
+    result = format(real, small if magnitude < 10 else
+                    medium if magnitude < 100 else large)
+
+    if float(result) == 0.0:
+        offset = 0
+
+    if fmt.allow_strip and "." in result:
+        result = result.rstrip("0").rstrip(".")
+
+    return result + fmt.space_str + PREFIXES[offset + 8] + unit
+
+
+def _format_value(value: Number, unit: str, fmt: Format) -> str:
+    number = float(value)
+    if value == 0 or not math.isfinite(number):
+        offset = 0
+    else:
+        offset = clamp_value(
+            int(math.log10(abs(number)) // 3), fmt.min_offset, fmt.max_offset)
+    return _format(value, number, offset, unit, fmt)
+
+
+_format_cached = lru_cache(maxsize=FORMAT_CACHE_SIZE)(_format_value)
+
+
+def format_value(value: Number, unit: str = "", fmt: Format = Format()) -> str:
+    """Format value like str(Value(value, unit, fmt)), using floats
+
+    Results are cached, as the same values come up again and again in
+    axis ticks and marker readouts.
+    """
+    if isinstance(value, str):
+        return str(Value(value, unit, fmt))
+    # Zero is not cached, 0.0 and -0.0 are equal keys but print differently
+    if value == 0:
+        return _format_value(value, unit, fmt)
+    return _format_cached(value, unit, fmt)
+
+
+def format_many(values: Iterable[Number], unit: str = "",
+                fmt: Format = Format()) -> List[str]:
+    """Format a sequence of values like format_value(), uncached
+
+    The offsets are calculated for all values at once.
+    """
+    numbers = np.asarray(values, dtype=np.float64)
+    magnitude = np.abs(numbers)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        offsets = np.where((magnitude > 0) & np.isfinite(magnitude),
+                           np.log10(magnitude) // 3, 0)
+    offsets = np.clip(offsets, fmt.min_offset, fmt.max_offset).astype(int)
+    return [_format(number, number, offset, unit, fmt)
+            for number, offset in zip(numbers.tolist(), offsets.tolist())]
+
+
 class Value:
     CTX = decimal.Context(prec=60, Emin=-27, Emax=27)
 
@@ -76,41 +162,9 @@ class Value:
                 f", '{self._unit}', {self.fmt})")
 
     def __str__(self) -> str:
-        fmt = self.fmt
-        if fmt.assume_infinity and abs(self._value) >= 10 ** ((fmt.max_offset + 1) * 3):
-            return ("-" if self._value < 0 else "") + "\N{INFINITY}" + fmt.space_str + self._unit
-        if self._value < fmt.printable_min:
-            return fmt.unprintable_under + self._unit
-        if self._value > fmt.printable_max:
-            return fmt.unprintable_over + self._unit
-
         if self._value == 0:
-            offset = 0
-        else:
-            offset = clamp_value(
-                int(math.log10(abs(self._value)) // 3), fmt.min_offset, fmt.max_offset)
-
-        real = float(self._value) / (10 ** (offset * 3))
-
-        if fmt.max_nr_digits < 3:
-            formstr = ".0f"
-        else:
-            max_digits = fmt.max_nr_digits + (
-                (1 if not fmt.fix_decimals and abs(real) < 10 else 0) +
-                (1 if not fmt.fix_decimals and abs(real) < 100 else 0))
-            formstr = "." + str(max_digits - 3) + "f"
-
-        if self.fmt.allways_signed:
-            formstr = "+" + formstr
-        result = format(real, formstr)
-
-        if float(result) == 0.0:
-            offset = 0
-
-        if self.fmt.allow_strip and "." in result:
-            result = result.rstrip("0").rstrip(".")
-
-        return result + fmt.space_str + PREFIXES[offset + 8] + self._unit
+            return _format_value(self._value, self._unit, self.fmt)
+        return _format_cached(self._value, self._unit, self.fmt)
 
     def __int__(self):
         return round(self._value)
@@ -0,0 +1,353 @@
+#  NanoVNASaver
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019.  Rune B. Broberg
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+import math
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterable, Iterator, Tuple, Union
+
+import numpy as np
+
+from NanoVNASaver.RFTools import Datapoint
+
+logger = logging.getLogger(__name__)
+
+# Ways of combining repeated readings: discard the samples furthest
+# from the mean, take the median or iteratively sigma clip the mean.
+AVERAGING_METHODS = ("trim", "median", "sigma")
+SIGMA_CLIP = 2.0
+
+
+def pairs_to_complex(values: Iterable[Tuple[float, float]]) -> np.ndarray:
+    """Convert a list of (re, im) tuples into a complex128 array
+
+    Complex arrays are passed through unchanged.
+    """
+    if isinstance(values, np.ndarray) and np.iscomplexobj(values):
+        return values.astype(np.complex128, copy=False)
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.size == 0:
+        return np.empty(0, dtype=np.complex128)
+    return arr[:, 0] + 1j * arr[:, 1]
+
+
+def truncated_mean(samples: np.ndarray, count: int, axis: int = 0) -> np.ndarray:
+    """Mean along axis after discarding the count samples furthest from the mean"""
+    samples = np.asarray(samples)
+    total = samples.shape[axis]
+    count = min(count, total - 1)
+    if count < 1:
+        return samples.mean(axis)
+    deviation = np.abs(samples - samples.mean(axis, keepdims=True))
+    order = np.argsort(deviation, axis=axis, kind="stable")
+    keep = np.take(order, np.arange(total - count), axis=axis)
+    return np.take_along_axis(samples, keep, axis).mean(axis)
+
+
+def median(samples: np.ndarray, axis: int = 0) -> np.ndarray:
+    """Median along axis, of real and imaginary parts separately"""
+    samples = np.asarray(samples)
+    if np.iscomplexobj(samples):
+        return np.median(samples.real, axis) + 1j * np.median(samples.imag, axis)
+    return np.median(samples, axis)
+
+
+def sigma_clipped_mean(samples: np.ndarray, sigma: float = SIGMA_CLIP,
+                       axis: int = 0, iterations: int = 5) -> np.ndarray:
+    """Mean along axis of the samples within sigma deviations of it
+
+    The mean and deviation are recomputed from the kept samples until
+    the selection no longer changes.
+    """
+    samples = np.asarray(samples)
+    keep = np.ones(samples.shape, dtype=bool)
+    for _ in range(iterations):
+        count = keep.sum(axis, keepdims=True)
+        mean = np.where(keep, samples, 0).sum(axis, keepdims=True) / count
+        deviation = np.abs(samples - mean)
+        std = np.sqrt(np.where(keep, deviation ** 2, 0).sum(axis, keepdims=True) / count)
+        clipped = deviation <= sigma * std
+        if np.array_equal(clipped, keep):
+            break
+        keep = clipped
+    return np.where(keep, samples, 0).sum(axis) / keep.sum(axis)
+
+
+def average(samples: np.ndarray, method: str = "trim", discard: int = 0,
+            axis: int = 0) -> np.ndarray:
+    """Combine repeated readings along axis with one of AVERAGING_METHODS
+
+    discard is the number of samples dropped per point by "trim".
+    """
+    if method == "trim":
+        return truncated_mean(samples, discard, axis)
+    if method == "median":
+        return median(samples, axis)
+    if method == "sigma":
+        return sigma_clipped_mean(samples, axis=axis)
+    raise ValueError(f"Unknown averaging method {method}")
+
+
+def gain(z: np.ndarray) -> np.ndarray:
+    mag = np.abs(z)
+    with np.errstate(divide="ignore"):
+        return np.where(mag > 0, 20 * np.log10(mag), -math.inf)
+
+
+def vswr(z: np.ndarray) -> np.ndarray:
+    mag = np.abs(z)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(mag == 1, 1.0, (1 + mag) / (1 - mag))
+
+
+def impedance(z: np.ndarray, ref_impedance: float = 50) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        imp = ((-z - 1) / (z - 1)) * ref_impedance
+    return np.where(z == 1, complex(math.inf, 0), imp)
+
+
+def q_factor(z: np.ndarray, ref_impedance: float = 50) -> np.ndarray:
+    imp = impedance(z, ref_impedance)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(imp.real == 0, -1.0, np.abs(imp.imag / imp.real))
+
+
+def admittance(z: np.ndarray, ref_impedance: float = 50) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        adm = ((1 - z) / (1 + z)) / ref_impedance
+    return np.where(z == -1, complex(math.inf, 0), adm)
+
+
+def capacitive_equivalent(freq: np.ndarray, imp: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cap = -1 / (freq * 2 * math.pi * imp.imag)
+    return np.where(freq == 0, -math.inf, np.where(imp.imag == 0, math.inf, cap))
+
+
+def inductive_equivalent(freq: np.ndarray, imp: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ind = imp.imag / (freq * 2 * math.pi)
+    return np.where(freq == 0, 0.0, ind)
+
+
+def group_delay(freq: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """Group delay of every point from the unwrapped phase of its neighbours"""
+    if len(z) < 2:
+        return np.zeros(len(z))
+    phase = np.unwrap(np.angle(z))
+    idx = np.arange(len(z))
+    idx0 = np.clip(idx - 1, 0, len(z) - 1)
+    idx1 = np.clip(idx + 1, 0, len(z) - 1)
+    delta_angle = phase[idx1] - phase[idx0]
+    delta_freq = (freq[idx1] - freq[idx0]).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(delta_freq == 0, 0.0,
+                        -delta_angle / math.tau / delta_freq)
+
+
+class SweepSeries(Sequence):
+    """Column view on a single S-parameter of a sweep
+
+    Behaves like a fixed size List[Datapoint] for legacy callers while
+    exposing the underlying numpy arrays and vectorised accessors.
+    Slicing returns a new view without copying.
+
+    Derived series such as the impedance are calculated on first use
+    and shared by all charts, markers and analyses showing the series
+    until its version changes.
+    """
+    def __init__(self, freq: np.ndarray = None, values: np.ndarray = None):
+        self.freq = (np.empty(0, dtype=np.int64) if freq is None
+                     else np.asarray(freq, dtype=np.int64))
+        self.z = (np.zeros(len(self.freq), dtype=np.complex128) if values is None
+                  else np.asarray(values, dtype=np.complex128))
+        assert len(self.freq) == len(self.z)
+        # Bumped by whoever modifies the arrays in place
+        self.version = 0
+        self.derivedVersion = 0
+        self.derived: Dict[tuple, np.ndarray] = {}
+
+    @classmethod
+    def from_datapoints(cls, data: Iterable[Datapoint]) -> "SweepSeries":
+        if isinstance(data, SweepSeries):
+            return data
+        data = list(data)
+        return cls(
+            np.fromiter((d.freq for d in data), dtype=np.int64, count=len(data)),
+            np.fromiter((complex(d.re, d.im) for d in data),
+                        dtype=np.complex128, count=len(data)))
+
+    def __len__(self) -> int:
+        return len(self.freq)
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            return SweepSeries(self.freq[key], self.z[key])
+        z = self.z.item(key)
+        return Datapoint(self.freq.item(key), z.real, z.imag)
+
+    def __setitem__(self, key: int, value: Datapoint):
+        self.freq[key] = value.freq
+        self.z[key] = complex(value.re, value.im)
+        self.invalidate()
+
+    def __iter__(self) -> Iterator[Datapoint]:
+        for f, re, im in zip(self.freq.tolist(),
+                             self.z.real.tolist(), self.z.imag.tolist()):
+            yield Datapoint(f, re, im)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self)} points)"
+
+    def invalidate(self):
+        """Drop the derived series after modifying the arrays in place"""
+        self.version += 1
+
+    def cached(self, key: tuple,
+               calculate: Callable[[], np.ndarray]) -> np.ndarray:
+        """Derived series calculated once per version of the data
+
+        The result is shared by every caller and therefore read-only.
+        """
+        if self.derivedVersion != self.version:
+            self.derived = {}
+            self.derivedVersion = self.version
+        value = self.derived.get(key)
+        if value is None:
+            value = calculate()
+            value.setflags(write=False)
+            self.derived[key] = value
+        return value
+
+    @property
+    def re(self) -> np.ndarray:
+        return self.z.real
+
+    @property
+    def im(self) -> np.ndarray:
+        return self.z.imag
+
+    @property
+    def phase(self) -> np.ndarray:
+        return self.cached(("phase",), lambda: np.angle(self.z))
+
+    @property
+    def unwrappedPhase(self) -> np.ndarray:
+        return self.cached(("unwrappedPhase",), lambda: np.unwrap(self.phase))
+
+    @property
+    def gain(self) -> np.ndarray:
+        return self.cached(("gain",), lambda: gain(self.z))
+
+    @property
+    def returnLoss(self) -> np.ndarray:
+        return self.cached(("returnLoss",), lambda: -self.gain)
+
+    @property
+    def vswr(self) -> np.ndarray:
+        return self.cached(("vswr",), lambda: vswr(self.z))
+
+    def impedance(self, ref_impedance: float = 50) -> np.ndarray:
+        return self.cached(("impedance", ref_impedance),
+                           lambda: impedance(self.z, ref_impedance))
+
+    def admittance(self, ref_impedance: float = 50) -> np.ndarray:
+        return self.cached(("admittance", ref_impedance),
+                           lambda: admittance(self.z, ref_impedance))
+
+    def qFactor(self, ref_impedance: float = 50) -> np.ndarray:
+        return self.cached(("qFactor", ref_impedance),
+                           lambda: q_factor(self.z, ref_impedance))
+
+    def capacitiveEquivalent(self, ref_impedance: float = 50) -> np.ndarray:
+        return self.cached(
+            ("capacitiveEquivalent", ref_impedance),
+            lambda: capacitive_equivalent(self.freq, self.impedance(ref_impedance)))
+
+    def inductiveEquivalent(self, ref_impedance: float = 50) -> np.ndarray:
+        return self.cached(
+            ("inductiveEquivalent", ref_impedance),
+            lambda: inductive_equivalent(self.freq, self.impedance(ref_impedance)))
+
+    def groupDelay(self) -> np.ndarray:
+        return self.cached(("groupDelay",), lambda: group_delay(self.freq, self.z))
+
+    def copy(self) -> "SweepSeries":
+        return SweepSeries(self.freq.copy(), self.z.copy())
+
+
+class SweepData:
+    """Columnar storage of a sweep
+
+    Frequencies are held in a contiguous int64 array, S11 and S21 in
+    complex128 arrays of the same length. S21 may be empty for sweeps
+    loaded from 1-port files.
+    """
+    def __init__(self,
+                 freq: np.ndarray = None,
+                 s11: np.ndarray = None,
+                 s21: np.ndarray = None):
+        self.freq = (np.empty(0, dtype=np.int64) if freq is None
+                     else np.asarray(freq, dtype=np.int64))
+        self.s11 = (np.zeros(len(self.freq), dtype=np.complex128) if s11 is None
+                    else np.asarray(s11, dtype=np.complex128))
+        self.s21 = (np.zeros(len(self.freq), dtype=np.complex128) if s21 is None
+                    else np.asarray(s21, dtype=np.complex128))
+        assert len(self.s11) == len(self.freq)
+        assert len(self.s21) in (0, len(self.freq))
+
+    @classmethod
+    def from_values(cls, frequencies: Iterable[int],
+                    values11: Iterable[Tuple[float, float]],
+                    values21: Iterable[Tuple[float, float]]) -> "SweepData":
+        """Build sweep data from the (re, im) tuples read from a device"""
+        return cls(np.asarray(frequencies, dtype=np.int64),
+                   pairs_to_complex(values11),
+                   pairs_to_complex(values21))
+
+    @classmethod
+    def from_datapoints(cls, s11data: Iterable[Datapoint],
+                        s21data: Iterable[Datapoint] = ()) -> "SweepData":
+        s11 = SweepSeries.from_datapoints(s11data)
+        s21 = SweepSeries.from_datapoints(s21data)
+        if len(s21) != len(s11):
+            s21 = SweepSeries()
+        return cls(s11.freq, s11.z, s21.z)
+
+    def __len__(self) -> int:
+        return len(self.freq)
+
+    def __getitem__(self, key: slice) -> "SweepData":
+        if not isinstance(key, slice):
+            raise TypeError("SweepData can only be sliced")
+        return SweepData(self.freq[key], self.s11[key],
+                         self.s21[key] if len(self.s21) else self.s21)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self)} points)"
+
+    @property
+    def s11data(self) -> SweepSeries:
+        return SweepSeries(self.freq, self.s11)
+
+    @property
+    def s21data(self) -> SweepSeries:
+        if len(self.s21) != len(self.freq):
+            return SweepSeries()
+        return SweepSeries(self.freq, self.s21)
+
+    def copy(self) -> "SweepData":
+        return SweepData(self.freq.copy(), self.s11.copy(), self.s21.copy())
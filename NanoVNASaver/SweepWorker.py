@@ -16,7 +16,6 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import logging
 from time import sleep
-from typing import List
 
 import numpy as np
 from PyQt5 import QtCore
@@ -24,13 +23,17 @@ from PyQt5.QtCore import pyqtSlot, pyqtSignal
 
 import NanoVNASaver
 from NanoVNASaver.Calibration import Calibration
-from NanoVNASaver.RFTools import RFTools, Datapoint
+from NanoVNASaver.RFTools import RFTools
+from NanoVNASaver.SweepData import SweepData, average, pairs_to_complex
 
 logger = logging.getLogger(__name__)
 
 
 class WorkerSignals(QtCore.QObject):
     updated = pyqtSignal()
+    # Start index, points filled so far and a calibrated copy of a
+    # changed part of the sweep
+    updatedSegment = pyqtSignal(int, int, object)
     finished = pyqtSignal()
     sweepError = pyqtSignal()
     fatalSweepError = pyqtSignal()
@@ -46,16 +49,18 @@ class SweepWorker(QtCore.QRunnable):
         self.noSweeps = 1
         self.setAutoDelete(False)
         self.percentage = 0
-        self.data11: List[Datapoint] = []
-        self.data21: List[Datapoint] = []
-        self.rawData11: List[Datapoint] = []
-        self.rawData21: List[Datapoint] = []
+        self.data = SweepData()
+        self.rawData = SweepData()
+        self.rawBuffer = self.rawData
+        self.dataBuffer = self.data
         self.stopped = False
         self.running = False
         self.continuousSweep = False
         self.averaging = False
         self.averages = 3
         self.truncates = 0
+        self.hardwareAveraging = True
+        self.averagingMethod = "trim"
         self.error_message = ""
         self.offsetDelay = 0
 
@@ -98,83 +103,71 @@ class SweepWorker(QtCore.QRunnable):
 
         span = sweep_to - sweep_from
         stepsize = int(span / (self.noSweeps * self.vna.datapoints - 1))
+        ranges = []
+        for i in range(self.noSweeps):
+            start = sweep_from + i * self.vna.datapoints * stepsize
+            ranges.append((start, start + (self.vna.datapoints-1) * stepsize))
 
         #  Setup complete
 
-        values = []
-        values21 = []
-        frequencies = []
+        self.allocateData(self.noSweeps * self.vna.datapoints)
+        offset = 0
 
-        if self.averaging:
+        averaging = self.averaging
+        if averaging and self.hardwareAveraging and self.vna.setAverages(
+                self.averages, self.truncates, self.averagingMethod):
+            logger.info("Averaging on the device")
+            averaging = False
+        else:
+            self.vna.setAverages(1, 0)
+
+        if averaging:
             for i in range(self.noSweeps):
                 logger.debug("Sweep segment no %d averaged over %d readings", i, self.averages)
                 if self.stopped:
                     logger.debug("Stopping sweeping as signalled")
                     break
-                start = sweep_from + i * self.vna.datapoints * stepsize
-                freq, val11, val21 = self.readAveragedSegment(
-                    start, start + (self.vna.datapoints-1) * stepsize, self.averages)
-
-                frequencies += freq
-                values += val11
-                values21 += val21
+                freq, val11, val21 = self.readAveragedSegment(*ranges[i], self.averages)
 
                 self.percentage = (i + 1) * (self.vna.datapoints-1) / self.noSweeps
                 logger.debug("Saving acquired data")
-                self.saveData(frequencies, values, values21)
+                self.saveSegment(offset, freq, val11, val21)
+                offset += len(freq)
 
         else:
-            for i in range(self.noSweeps):
-                logger.debug("Sweep segment no %d", i)
-                if self.stopped:
-                    logger.debug("Stopping sweeping as signalled")
-                    break
-                start = sweep_from + i*self.vna.datapoints*stepsize
-                try:
-                    freq, val11, val21 = self.readSegment(
-                        start, start+(self.vna.datapoints-1)*stepsize)
-
-                    frequencies += freq
-                    values += val11
-                    values21 += val21
-
+            try:
+                for i, (freq, val11, val21) in enumerate(self.readSegments(ranges)):
                     self.percentage = (i+1)*100/self.noSweeps
                     logger.debug("Saving acquired data")
-                    self.saveData(frequencies, values, values21)
-                except NanoVNAValueException as e:
-                    self.error_message = str(e)
-                    self.stopped = True
-                    self.running = False
-                    self.signals.sweepError.emit()
-                except NanoVNASerialException as e:
-                    self.error_message = str(e)
-                    self.stopped = True
-                    self.running = False
-                    self.signals.sweepFatalError.emit()
+                    self.saveSegment(offset, freq, val11, val21)
+                    offset += len(freq)
+            except NanoVNAValueException as e:
+                self.error_message = str(e)
+                self.stopped = True
+                self.running = False
+                self.signals.sweepError.emit()
+            except NanoVNASerialException as e:
+                self.error_message = str(e)
+                self.stopped = True
+                self.running = False
+                self.signals.sweepFatalError.emit()
 
         while self.continuousSweep and not self.stopped:
             logger.debug("Continuous sweeping")
-            for i in range(self.noSweeps):
-                logger.debug("Sweep segment no %d", i)
-                if self.stopped:
-                    logger.debug("Stopping sweeping as signalled")
-                    break
-                start = sweep_from + i * self.vna.datapoints * stepsize
-                try:
-                    _, values, values21 = self.readSegment(
-                        start, start + (self.vna.datapoints-1) * stepsize)
+            try:
+                for i, (_, values, values21) in enumerate(self.readSegments(ranges)):
                     logger.debug("Updating acquired data")
                     self.updateData(values, values21, i, self.vna.datapoints)
-                except NanoVNAValueException as e:
-                    self.error_message = str(e)
-                    self.stopped = True
-                    self.running = False
-                    self.signals.sweepError.emit()
-                except NanoVNASerialException as e:
-                    self.error_message = str(e)
-                    self.stopped = True
-                    self.running = False
-                    self.signals.sweepFatalError.emit()
+            except NanoVNAValueException as e:
+                self.error_message = str(e)
+                self.stopped = True
+                self.running = False
+                self.signals.sweepError.emit()
+            except NanoVNASerialException as e:
+                self.error_message = str(e)
+                self.stopped = True
+                self.running = False
+                self.signals.sweepFatalError.emit()
 
         # Reset the device to show the full range if we were multisegment
         if self.noSweeps > 1:
@@ -185,84 +178,107 @@ class SweepWorker(QtCore.QRunnable):
             self.vna.resetSweep(RFTools.parseFrequency(self.app.sweepStartInput.text()),
                                 RFTools.parseFrequency(self.app.sweepEndInput.text()))
 
+        for command, stats in self.vna.transport.stats.items():
+            logger.debug("Serial latency of %s: %s", command, stats)
+
         self.percentage = 100
         logger.debug("Sending \"finished\" signal")
         self.signals.finished.emit()
         self.running = False
         return
 
+    def allocateData(self, size: int):
+        """Preallocate the buffers of a sweep of size points
+
+        data and rawData are views on the part filled so far.
+        """
+        self.rawBuffer = SweepData(np.zeros(size, dtype=np.int64))
+        self.dataBuffer = SweepData(np.zeros(size, dtype=np.int64))
+        self.rawData = self.rawBuffer[:0]
+        self.data = self.dataBuffer[:0]
+
+    def saveSegment(self, offset, frequencies, values11, values21):
+        """Store a newly read segment at point offset of the sweep buffers"""
+        end = offset + len(frequencies)
+        if end > len(self.rawBuffer):
+            logger.debug("Growing sweep buffers to %d points", end)
+            filled = len(self.rawData)
+            old_raw, old_data = self.rawData, self.data
+            self.allocateData(end)
+            for old, new in ((old_raw, self.rawBuffer), (old_data, self.dataBuffer)):
+                new.freq[:filled] = old.freq
+                new.s11[:filled] = old.s11
+                new.s21[:filled] = old.s21
+        self.rawBuffer.freq[offset:end] = frequencies
+        self.dataBuffer.freq[offset:end] = frequencies
+        self.rawData = self.rawBuffer[:end]
+        self.data = self.dataBuffer[:end]
+        self.updateSegment(offset, values11, values21)
+
     def updateData(self, values11, values21, offset, segment_size=101):
         # Update the data from (i*101) to (i+1)*101
-        logger.debug("Calculating data and inserting in existing data at offset %d", offset)
-        for i, val11 in enumerate(values11):
-            re, im = val11
-            re21, im21 = values21[i]
-            freq = self.data11[offset * segment_size + i].freq
-            raw_data11 = Datapoint(freq, re, im)
-            raw_data21 = Datapoint(freq, re21, im21)
-            data11, data21 = self.applyCalibration([raw_data11], [raw_data21])
-
-            self.data11[offset * segment_size + i] = data11[0]
-            self.data21[offset * segment_size + i] = data21[0]
-            self.rawData11[offset * segment_size + i] = raw_data11
-            self.rawData21[offset * segment_size + i] = raw_data21
-        logger.debug("Saving data to application (%d and %d points)",
-                     len(self.data11), len(self.data21))
-        self.app.saveData(self.data11, self.data21)
+        self.updateSegment(offset * segment_size,
+                           pairs_to_complex(values11), pairs_to_complex(values21))
+
+    def updateSegment(self, start, values11, values21):
+        """Calibrate a segment and write it into the sweep in place
+
+        The application gets a copy of the segment, the sweep buffers
+        are only ever written here.
+        """
+        logger.debug("Calculating data and inserting in existing data at point %d", start)
+        segment = slice(start, start + len(values11))
+        raw_data = self.rawData[segment]
+        size = len(raw_data)
+        raw_data.s11[:] = values11[:size]
+        raw_data.s21[:] = values21[:size]
+        # applyCalibration returns new arrays, owned by the application from here
+        data = self.applyCalibration(raw_data)
+        self.data.s11[segment] = data.s11
+        self.data.s21[segment] = data.s21
+        logger.debug("Sending segment to application (%d of %d points)",
+                     size, len(self.data))
+        self.signals.updatedSegment.emit(start, len(self.data), data)
         logger.debug("Sending \"updated\" signal")
         self.signals.updated.emit()
 
+    def recalibrate(self) -> SweepData:
+        """Apply the current calibration and offset delay to the whole sweep
+
+        Returns a copy of the result for the application.
+        """
+        data = self.applyCalibration(self.rawData)
+        self.data.s11[:] = data.s11
+        self.data.s21[:] = data.s21
+        return data
+
     def saveData(self, frequencies, values11, values21):
-        raw_data11 = []
-        raw_data21 = []
         logger.debug("Calculating data including corrections")
-        for i, val11 in enumerate(values11):
-            re, im = val11
-            re21, im21 = values21[i]
-            freq = frequencies[i]
-            raw_data11 += [Datapoint(freq, re, im)]
-            raw_data21 += [Datapoint(freq, re21, im21)]
-        self.data11, self.data21 = self.applyCalibration(raw_data11, raw_data21)
-        self.rawData11 = raw_data11
-        self.rawData21 = raw_data21
-        logger.debug("Saving data to application (%d and %d points)",
-                     len(self.data11), len(self.data21))
-        self.app.saveData(self.data11, self.data21)
+        self.rawData = self.rawBuffer = SweepData.from_values(
+            frequencies, values11, values21)
+        self.data = self.dataBuffer = self.applyCalibration(self.rawData)
+        logger.debug("Saving data to application (%d points)", len(self.data))
+        data = self.data.copy()
+        self.app.saveData(data.s11data, data.s21data)
         logger.debug("Sending \"updated\" signal")
         self.signals.updated.emit()
 
-    def applyCalibration(self, raw_data11: List[Datapoint], raw_data21: List[Datapoint]) ->\
-                        (List[Datapoint], List[Datapoint]):
+    def applyCalibration(self, raw_data: SweepData) -> SweepData:
+        data = raw_data.copy()
         if self.offsetDelay != 0:
-            tmp = []
-            for d in raw_data11:
-                tmp.append(Calibration.correctDelay11(d, self.offsetDelay))
-            raw_data11 = tmp
-            tmp = []
-            for d in raw_data21:
-                tmp.append(Calibration.correctDelay21(d, self.offsetDelay))
-            raw_data21 = tmp
-
-        if not self.app.calibration.isCalculated:
-            return raw_data11, raw_data21
-
-        data11: List[Datapoint] = []
-        data21: List[Datapoint] = []
-
-        if self.app.calibration.isValid1Port():
-            for d in raw_data11:
-                re, im = self.app.calibration.correct11(d.re, d.im, d.freq)
-                data11.append(Datapoint(d.freq, re, im))
-        else:
-            data11 = raw_data11
+            data.s11, data.s21 = Calibration.correctDelay(
+                data.freq, data.s11, data.s21, self.offsetDelay)
 
-        if self.app.calibration.isValid2Port():
-            for d in raw_data21:
-                re, im = self.app.calibration.correct21(d.re, d.im, d.freq)
-                data21.append(Datapoint(d.freq, re, im))
-        else:
-            data21 = raw_data21
-        return data11, data21
+        calibration = self.app.calibration
+        if not calibration.isCalculated or not calibration.isValid1Port():
+            return data
+
+        s21 = data.s21 if calibration.isValid2Port() and len(data.s21) else None
+        s11, s21 = calibration.correct(data.freq, data.s11, s21)
+        data.s11 = s11
+        if s21 is not None:
+            data.s21 = s21
+        return data
 
     def readAveragedSegment(self, start, stop, averages):
         val11 = []
@@ -280,50 +296,54 @@ class SweepWorker(QtCore.QRunnable):
             self.percentage += 100/(self.noSweeps*averages)
             self.signals.updated.emit()
 
-        logger.debug("Post-processing averages")
-        logger.debug("Truncating %d values by %d", len(val11), self.truncates)
-        val11 = self.truncate(val11, self.truncates)
-        val21 = self.truncate(val21, self.truncates)
-        logger.debug("Averaging %d values", len(val11))
-
-        return11 = np.average(val11, 0).tolist()
-        return21 = np.average(val21, 0).tolist()
+        if not val11:
+            return (np.empty(0, dtype=np.int64),
+                    np.empty(0, dtype=np.complex128),
+                    np.empty(0, dtype=np.complex128))
+        logger.debug("Averaging %d readings using %s, discarding %d",
+                     len(val11), self.averagingMethod, self.truncates)
+        return11 = average(np.array(val11), self.averagingMethod, self.truncates)
+        return21 = average(np.array(val21), self.averagingMethod, self.truncates)
 
         return freq, return11, return21
 
-    @staticmethod
-    def truncate(values: List[List[tuple]], count):
-        logger.debug("Truncating from %d values to %d", len(values), len(values) - count)
-        if count < 1:
-            return values
-        values = np.swapaxes(values, 0, 1)
-        return_values = []
-
-        for valueset in values:
-            # avg becomes a 2-value array of the location of the average
-            avg = np.average(valueset, 0)
-            new_valueset = valueset
-            for _ in range(count):
-                max_deviance = 0
-                max_idx = -1
-                for i, valset in enumerate(new_valueset):
-                    deviance = abs(valset[0] - avg[0])**2 + abs(valset[1] - avg[1])**2
-                    if deviance > max_deviance:
-                        max_deviance = deviance
-                        max_idx = i
-                next_valueset = []
-                # TODO: find out if valset is always a two element array
-                for i, valset in enumerate(new_valueset):
-                    if i != max_idx:
-                        next_valueset.append((valset[0], valueset[1]))
-                new_valueset = next_valueset
-
-            return_values.append(new_valueset)
-
-        return_values = np.swapaxes(return_values, 0, 1)
-        return return_values.tolist()
+    def readSegments(self, ranges):
+        """Read the segments of a sweep in order until stopped
+
+        Devices that support it measure the next segment while the
+        current one is being transferred.
+        """
+        if not self.vna.usePipelinedScan:
+            for i, (start, stop) in enumerate(ranges):
+                if self.stopped:
+                    logger.debug("Stopping sweeping as signalled")
+                    return
+                logger.debug("Sweep segment no %d", i)
+                yield self.readSegment(start, stop)
+            return
+        for i, ((start, stop), segment) in enumerate(zip(ranges, self.vna.readScans(ranges))):
+            if self.stopped:
+                logger.debug("Stopping sweeping as signalled")
+                return
+            logger.debug("Sweep segment no %d (pipelined)", i)
+            frequencies, values11, values21 = segment
+            if len(frequencies) == 0 or not self.validValues(values11, values21):
+                logger.debug("Re-reading segment %d", i)
+                segment = self.readSegment(start, stop)
+            yield segment
+
+    def validValues(self, values11, values21) -> bool:
+        return not self.vna.validateInput or all(
+            np.all(np.abs(part) <= 9.5) for part in
+            (values11.real, values11.imag, values21.real, values21.imag))
 
     def readSegment(self, start, stop):
+        if self.vna.useBinaryScan or self.vna.useCombinedScan:
+            segment = self.readScan(start, stop)
+            if segment is not None:
+                return segment
+            logger.debug("Falling back to separate reads")
+
         logger.debug("Setting sweep range to %d to %d", start, stop)
         self.vna.setSweep(start, stop)
 
@@ -334,7 +354,33 @@ class SweepWorker(QtCore.QRunnable):
         # S21
         values21 = self.readData("data 1")
 
-        return frequencies, values11, values21
+        return (np.asarray(frequencies, dtype=np.int64),
+                pairs_to_complex(values11), pairs_to_complex(values21))
+
+    def readScan(self, start, stop):
+        logger.debug("Reading scan from %d to %d", start, stop)
+        count = 0
+        while True:
+            frequencies, values11, values21 = self.vna.readScan(start, stop)
+            if len(frequencies) == 0:
+                if not (self.vna.useBinaryScan or self.vna.useCombinedScan):
+                    return None
+                logger.warning("Read no values")
+                raise NanoVNASerialException("Failed reading data: Returned no values.")
+            if self.validValues(values11, values21):
+                return frequencies, values11, values21
+            logger.warning("Got data values outside the valid range")
+            logger.debug("Re-reading scan")
+            sleep(0.2)
+            count += 1
+            if count == 10:
+                logger.error("Tried and failed to read scan %d times.", count)
+            if count >= 20:
+                logger.critical("Tried and failed to read scan %d times. Giving up.", count)
+                raise NanoVNAValueException(
+                    f"Failed reading scan {count} times.\n"
+                    f"Data outside expected valid ranges, or in an unexpected format.\n\n"
+                    f"You can disable data validation on the device settings screen.")
 
     def readData(self, data):
         logger.debug("Reading %s", data)
@@ -413,8 +459,11 @@ class SweepWorker(QtCore.QRunnable):
     def setContinuousSweep(self, continuous_sweep: bool):
         self.continuousSweep = continuous_sweep
 
-    def setAveraging(self, averaging: bool, averages: str, truncates: str):
+    def setAveraging(self, averaging: bool, averages: str, truncates: str,
+                     hardware_averaging: bool = True, method: str = "trim"):
         self.averaging = averaging
+        self.hardwareAveraging = hardware_averaging
+        self.averagingMethod = method
         try:
             self.averages = int(averages)
             self.truncates = int(truncates)
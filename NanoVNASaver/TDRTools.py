@@ -0,0 +1,145 @@
+#  NanoVNASaver
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019.  Rune B. Broberg
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+import math
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SPEED_OF_LIGHT = 299792458
+FFT_SIZES = (2**12, 2**13, 2**14, 2**15, 2**16)
+DEFAULT_FFT_POINTS = 2**14
+WINDOWS = ("blackman", "kaiser", "hann")
+KAISER_BETA = 6.0
+# Band pass transforms the measured span as is and shows the magnitude
+# of the response, low pass needs a harmonic frequency grid but
+# recovers the sign of the reflections and a real step response.
+MODES = ("bandpass", "lowpass")
+# Largest transform low pass mode grows to for a sweep far from DC
+MAX_LOWPASS_POINTS = 2**22
+
+
+class TDRResult(NamedTuple):
+    td: np.ndarray
+    step_response: np.ndarray
+    step_response_Z: np.ndarray
+    distance_axis: np.ndarray
+
+
+def _readonly(arr: np.ndarray) -> np.ndarray:
+    arr.setflags(write=False)
+    return arr
+
+
+@lru_cache(maxsize=16)
+def window(name: str, points: int) -> np.ndarray:
+    """Read-only window of one of WINDOWS with points samples"""
+    if name == "blackman":
+        return _readonly(np.blackman(points))
+    if name == "kaiser":
+        return _readonly(np.kaiser(points, KAISER_BETA))
+    if name == "hann":
+        return _readonly(np.hanning(points))
+    raise ValueError(f"Unknown TDR window {name}")
+
+
+@lru_cache(maxsize=16)
+def half_window(name: str, points: int) -> np.ndarray:
+    """Falling half of a window, starting at its peak, for low pass mode"""
+    return _readonly(window(name, 2 * points - 1)[points - 1:].copy())
+
+
+@lru_cache(maxsize=16)
+def distance_axis(points: int, step_size: float, velocity: float) -> np.ndarray:
+    """Round trip distance of every sample of a points long transform"""
+    return _readonly(
+        np.linspace(0, 1 / step_size, points) * velocity * SPEED_OF_LIGHT)
+
+
+def step_impedance(step_response: np.ndarray,
+                   ref_impedance: float = 50) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return ref_impedance * (1 + step_response) / (1 - step_response)
+
+
+def lowpass_spectrum(freq: np.ndarray, s11: np.ndarray,
+                     step_size: float) -> np.ndarray:
+    """S11 on the harmonic grid 0, step, 2 * step, ...
+
+    The DC value is extrapolated from the two lowest points and bins
+    below the start frequency are interpolated between it and the data.
+    """
+    bins = np.rint(freq / step_size).astype(np.int64)
+    dc = s11[0] - bins[0] * (s11[1] - s11[0]) / max(bins[1] - bins[0], 1)
+    spectrum = np.zeros(bins[-1] + 1, dtype=np.complex128)
+    spectrum[bins] = s11
+    spectrum[0] = dc.real
+    if bins[0] > 1:
+        gap = np.arange(1, bins[0])
+        spectrum[gap] = (np.interp(gap, [0, bins[0]], [dc.real, s11[0].real])
+                         + 1j * np.interp(gap, [0, bins[0]], [0, s11[0].imag]))
+    return spectrum
+
+
+def lowpass_points(bins: int, fft_points: int) -> int:
+    """FFT size of at least fft_points holding a spectrum of bins bins
+
+    irfft drops bins that don't fit, so sweeps far from DC raise the
+    size to the next power of two that keeps all of them.
+    """
+    needed = 2 * (bins - 1)
+    if fft_points >= needed:
+        return fft_points
+    if needed > MAX_LOWPASS_POINTS:
+        raise ValueError(
+            f"Low pass TDR of this sweep needs {needed} FFT points, "
+            f"start the sweep lower or use band pass")
+    points = 2 ** math.ceil(math.log2(needed))
+    logger.info("Low pass TDR needs %d instead of %d points", points, fft_points)
+    return points
+
+
+def tdr(freq: np.ndarray, s11: np.ndarray, velocity: float,
+        fft_points: int = DEFAULT_FFT_POINTS, window_name: str = "blackman",
+        mode: str = "bandpass", ref_impedance: float = 50) -> TDRResult:
+    """Time domain response of an evenly spaced S11 sweep
+
+    The step response is the running sum of the impulse response, so
+    the whole transform is O(N log N) in the FFT size.
+    """
+    step_size = float(freq[1] - freq[0])
+    if step_size <= 0:
+        raise ValueError("TDR needs increasing frequencies")
+    if mode == "bandpass":
+        windowed = window(window_name, len(s11)) * s11
+        td = np.abs(np.fft.ifft(windowed, fft_points))
+        step_response = np.cumsum(td)
+    elif mode == "lowpass":
+        fft_points = lowpass_points(round(freq[-1] / step_size) + 1, fft_points)
+        spectrum = lowpass_spectrum(freq, s11, step_size)
+        spectrum *= half_window(window_name, len(spectrum))
+        impulse = np.fft.irfft(spectrum, fft_points)
+        td = np.abs(impulse)
+        step_response = np.cumsum(impulse)
+    else:
+        raise ValueError(f"Unknown TDR mode {mode}")
+    return TDRResult(
+        td, step_response, step_impedance(step_response, ref_impedance),
+        distance_axis(fft_points, step_size, velocity))
@@ -16,7 +16,7 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import logging
 
-from PyQt5 import QtWidgets, QtCore
+from PyQt5 import QtWidgets, QtCore, QtGui
 
 from NanoVNASaver.Analysis import Analysis, LowPassAnalysis, HighPassAnalysis, \
     BandPassAnalysis, BandStopAnalysis, VSWRAnalysis, \
@@ -28,6 +28,8 @@ logger = logging.getLogger(__name__)
 class AnalysisWindow(QtWidgets.QWidget):
     analyses = []
     analysis: Analysis = None
+    # New data arrived while automatic runs were held back
+    stale = False
 
     def __init__(self, app: QtWidgets.QWidget):
         super().__init__()
@@ -76,9 +78,22 @@ class AnalysisWindow(QtWidgets.QWidget):
         self.updateSelection()
 
     def runAnalysis(self):
+        self.stale = False
         if self.analysis is not None:
             self.analysis.runAnalysis()
 
+    def automaticRun(self):
+        """Run on new data, or on showing the window if it is hidden"""
+        if self.isVisible():
+            self.runAnalysis()
+        else:
+            self.stale = True
+
+    def showEvent(self, event: QtGui.QShowEvent):
+        super().showEvent(event)
+        if self.stale and self.checkbox_run_automatically.isChecked():
+            self.runAnalysis()
+
     def updateSelection(self):
         self.analysis = self.analysis_list.currentData()
         old_item = self.analysis_layout.itemAt(0)
@@ -94,7 +109,7 @@ class AnalysisWindow(QtWidgets.QWidget):
     def toggleAutomaticRun(self, state: QtCore.Qt.CheckState):
         if state == QtCore.Qt.Checked:
             self.analysis_list.setDisabled(True)
-            self.app.dataAvailable.connect(self.runAnalysis)
+            self.app.dataAvailable.connect(self.automaticRun)
         else:
             self.analysis_list.setDisabled(False)
-            self.app.dataAvailable.disconnect(self.runAnalysis)
+            self.app.dataAvailable.disconnect(self.automaticRun)
@@ -86,6 +86,10 @@ class CalibrationWindow(QtWidgets.QWidget):
         self.input_offset_delay.valueChanged.connect(self.setOffsetDelay)
         self.input_offset_delay.setRange(-10e6, 10e6)
 
+        self.input_interpolation = QtWidgets.QComboBox()
+        self.input_interpolation.addItems(["Nearest", "Linear", "Cubic"])
+        self.input_interpolation.currentIndexChanged.connect(self.setInterpolation)
+
         calibration_control_layout.addRow(btn_cal_short, self.cal_short_label)
         calibration_control_layout.addRow(btn_cal_open, self.cal_open_label)
         calibration_control_layout.addRow(btn_cal_load, self.cal_load_label)
@@ -94,6 +98,7 @@ class CalibrationWindow(QtWidgets.QWidget):
 
         calibration_control_layout.addRow(QtWidgets.QLabel(""))
         calibration_control_layout.addRow("Offset delay", self.input_offset_delay)
+        calibration_control_layout.addRow("Interpolation", self.input_interpolation)
 
         self.btn_automatic = QtWidgets.QPushButton("Calibration assistant")
         calibration_control_layout.addRow(self.btn_automatic)
@@ -244,45 +249,45 @@ class CalibrationWindow(QtWidgets.QWidget):
             self.saveShort()
 
     def saveShort(self):
-        self.app.calibration.s11short = self.app.data
+        self.app.calibration.s11short = self.app.data.copy()
         self.cal_short_label.setText(
-            f"Data set ({self.app.calibration.s11short} points)")
+            f"Data set ({len(self.app.calibration.s11short)} points)")
 
     def manualSaveOpen(self):
         if self.checkExpertUser():
             self.saveOpen()
 
     def saveOpen(self):
-        self.app.calibration.s11open = self.app.data
+        self.app.calibration.s11open = self.app.data.copy()
         self.cal_open_label.setText(
-            f"Data set ({self.app.calibration.s11open} points)")
+            f"Data set ({len(self.app.calibration.s11open)} points)")
 
     def manualSaveLoad(self):
         if self.checkExpertUser():
             self.saveLoad()
 
     def saveLoad(self):
-        self.app.calibration.s11load = self.app.data
+        self.app.calibration.s11load = self.app.data.copy()
         self.cal_load_label.setText(
-            f"Data set ({self.app.calibration.s11load} points)")
+            f"Data set ({len(self.app.calibration.s11load)} points)")
 
     def manualSaveIsolation(self):
         if self.checkExpertUser():
             self.saveIsolation()
 
     def saveIsolation(self):
-        self.app.calibration.s21isolation = self.app.data21
+        self.app.calibration.s21isolation = self.app.data21.copy()
         self.cal_isolation_label.setText(
-            f"Data set ({self.app.calibration.s21isolation} points)")
+            f"Data set ({len(self.app.calibration.s21isolation)} points)")
 
     def manualSaveThrough(self):
         if self.checkExpertUser():
             self.saveThrough()
 
     def saveThrough(self):
-        self.app.calibration.s21through = self.app.data21
+        self.app.calibration.s21through = self.app.data21.copy()
         self.cal_through_label.setText(
-            f"Data set ({self.app.calibration.s21through} points)")
+            f"Data set ({len(self.app.calibration.s21through)} points)")
 
     def listCalibrationStandards(self):
         self.cal_standard_save_selector.clear()
@@ -469,6 +474,8 @@ class CalibrationWindow(QtWidgets.QWidget):
 
     def reset(self):
         self.app.calibration = Calibration()
+        self.app.calibration.interpolation = Calibration.INTERPOLATIONS[
+            self.input_interpolation.currentIndex()]
         self.cal_short_label.setText("Uncalibrated")
         self.cal_open_label.setText("Uncalibrated")
         self.cal_load_label.setText("Uncalibrated")
@@ -478,24 +485,35 @@ class CalibrationWindow(QtWidgets.QWidget):
         self.calibration_source_label.setText("Device")
         self.notes_textedit.clear()
 
-        if len(self.app.worker.rawData11) > 0:
+        if len(self.app.worker.rawData) > 0:
             # There's raw data, so we can get corrected data
             logger.debug("Saving and displaying raw data.")
-            self.app.saveData(self.app.worker.rawData11,
-                              self.app.worker.rawData21, self.app.sweepSource)
+            data = self.app.worker.recalibrate()
+            self.app.saveData(data.s11data, data.s21data,
+                              self.app.sweepSource)
             self.app.worker.signals.updated.emit()
 
     def setOffsetDelay(self, value: float):
         logger.debug("New offset delay value: %f ps", value)
         self.app.worker.offsetDelay = value / 1e12
-        if len(self.app.worker.rawData11) > 0:
+        if len(self.app.worker.rawData) > 0:
             # There's raw data, so we can get corrected data
             logger.debug("Applying new offset to existing sweep data.")
-            self.app.worker.data11, self.app.worker.data21 = \
-                self.app.worker.applyCalibration(
-                    self.app.worker.rawData11, self.app.worker.rawData21)
+            data = self.app.worker.recalibrate()
             logger.debug("Saving and displaying corrected data.")
-            self.app.saveData(self.app.worker.data11, self.app.worker.data21, self.app.sweepSource)
+            self.app.saveData(data.s11data, data.s21data,
+                              self.app.sweepSource)
+            self.app.worker.signals.updated.emit()
+
+    def setInterpolation(self, index: int):
+        logger.debug("New calibration interpolation: %s",
+                     Calibration.INTERPOLATIONS[index])
+        self.app.calibration.interpolation = Calibration.INTERPOLATIONS[index]
+        if self.app.calibration.isCalculated and len(self.app.worker.rawData) > 0:
+            logger.debug("Applying calibration to existing sweep data.")
+            data = self.app.worker.recalibrate()
+            self.app.saveData(data.s11data, data.s21data,
+                              self.app.sweepSource)
             self.app.worker.signals.updated.emit()
 
     def calculate(self):
@@ -574,22 +592,28 @@ class CalibrationWindow(QtWidgets.QWidget):
         logger.debug("Attempting calibration calculation.")
         valid, error = self.app.calibration.calculateCorrections()
         if valid:
-            self.calibration_status_label.setText(
-                f"Application calibration ({self.app.calibration.s11short} points)")
+            degenerate = int(self.app.calibration.degenerate.sum())
+            if degenerate:
+                self.calibration_status_label.setText(
+                    f"Application calibration ({len(self.app.calibration.s11short)}"
+                    f" points, {degenerate} unusable)")
+                QtWidgets.QMessageBox.warning(self, "Incomplete calibration", error)
+            else:
+                self.calibration_status_label.setText(
+                    f"Application calibration ({len(self.app.calibration.s11short)} points)")
             if self.use_ideal_values.isChecked():
                 self.calibration_source_label.setText(self.app.calibration.source)
             else:
                 self.calibration_source_label.setText(
                     self.app.calibration.source + " (Standards: Custom)")
 
-            if len(self.app.worker.rawData11) > 0:
+            if len(self.app.worker.rawData) > 0:
                 # There's raw data, so we can get corrected data
                 logger.debug("Applying calibration to existing sweep data.")
-                self.app.worker.data11, self.app.worker.data21 = self.app.worker.applyCalibration(
-                    self.app.worker.rawData11, self.app.worker.rawData21)
+                data = self.app.worker.recalibrate()
                 logger.debug("Saving and displaying corrected data.")
-                self.app.saveData(self.app.worker.data11,
-                                  self.app.worker.data21, self.app.sweepSource)
+                self.app.saveData(data.s11data, data.s21data,
+                                  self.app.sweepSource)
                 self.app.worker.signals.updated.emit()
         else:
             # showError here hides the calibration window, so we need to pop up our own
@@ -611,16 +635,16 @@ class CalibrationWindow(QtWidgets.QWidget):
             self.app.calibration.loadCalibration(filename)
             if self.app.calibration.isValid1Port():
                 self.cal_short_label.setText(
-                    f"Loaded ({self.app.calibration.s11short})")
+                    f"Loaded ({len(self.app.calibration.s11short)} points)")
                 self.cal_open_label.setText(
-                    f"Loaded ({self.app.calibration.s11open})")
+                    f"Loaded ({len(self.app.calibration.s11open)} points)")
                 self.cal_load_label.setText(
-                    f"Loaded ({self.app.calibration.s11load})")
+                    f"Loaded ({len(self.app.calibration.s11load)} points)")
                 if self.app.calibration.isValid2Port():
                     self.cal_through_label.setText(
-                        f"Loaded ({self.app.calibration.s21through})")
+                        f"Loaded ({len(self.app.calibration.s21through)} points)")
                     self.cal_isolation_label.setText(
-                        f"Loaded ({self.app.calibration.s21isolation})")
+                        f"Loaded ({len(self.app.calibration.s21isolation)} points)")
                 self.calculate()
                 self.notes_textedit.clear()
                 for note in self.app.calibration.notes:
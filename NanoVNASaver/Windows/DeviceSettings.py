@@ -56,6 +56,12 @@ class DeviceSettingsWindow(QtWidgets.QWidget):
         self.chkValidateInputData.stateChanged.connect(self.updateValidation)
         settings_layout.addRow("Validation", self.chkValidateInputData)
 
+        self.chkPipelinedSweeps = QtWidgets.QCheckBox("Read next segment while transferring")
+        pipelined = self.app.settings.value("PipelinedSweeps", True, bool)
+        self.chkPipelinedSweeps.setChecked(pipelined)
+        self.chkPipelinedSweeps.stateChanged.connect(self.updatePipelining)
+        settings_layout.addRow("Pipelining", self.chkPipelinedSweeps)
+
         control_layout = QtWidgets.QHBoxLayout()
         self.btnRefresh = QtWidgets.QPushButton("Refresh")
         self.btnRefresh.clicked.connect(self.updateFields)
@@ -88,6 +94,8 @@ class DeviceSettingsWindow(QtWidgets.QWidget):
             for item in features:
                 self.featureList.addItem(item)
 
+            self.chkPipelinedSweeps.setEnabled("Pipelined sweeps" in features)
+
             if "Screenshots" in features:
                 self.btnCaptureScreenshot.setDisabled(False)
             else:
@@ -103,6 +111,11 @@ class DeviceSettingsWindow(QtWidgets.QWidget):
         self.app.vna.validateInput = validate_data
         self.app.settings.setValue("SerialInputValidation", validate_data)
 
+    def updatePipelining(self, pipelined: bool):
+        pipelined = bool(pipelined)
+        self.app.vna.usePipelinedScan = pipelined and "Pipelined sweeps" in self.app.vna.features
+        self.app.settings.setValue("PipelinedSweeps", pipelined)
+
     def captureScreenshot(self):
         if not self.app.worker.running:
             pixmap = self.app.vna.getScreenshot()
@@ -71,6 +71,14 @@ class DisplaySettingsWindow(QtWidgets.QWidget):
         self.dark_mode_option.stateChanged.connect(self.changeDarkMode)
         display_options_layout.addRow(self.dark_mode_option, dark_mode_label)
 
+        self.background_rendering_option = QtWidgets.QCheckBox("Background rendering")
+        background_rendering_label = QtWidgets.QLabel(
+            "Draws charts on a worker thread to keep the window responsive")
+        self.background_rendering_option.stateChanged.connect(
+            self.changeBackgroundRendering)
+        display_options_layout.addRow(self.background_rendering_option,
+                                      background_rendering_label)
+
         self.btnColorPicker = QtWidgets.QPushButton("█")
         self.btnColorPicker.setFixedWidth(20)
         self.sweepColor = self.app.settings.value(
@@ -444,6 +452,8 @@ class DisplaySettingsWindow(QtWidgets.QWidget):
             self.app.settings.value("DarkMode", False, bool))
         self.show_lines_option.setChecked(
             self.app.settings.value("ShowLines", False, bool))
+        self.background_rendering_option.setChecked(
+            self.app.settings.value("BackgroundRendering", False, bool))
         self.show_marker_number_option.setChecked(
             self.app.settings.value("ShowMarkerNumbers", False, bool))
         self.filled_marker_option.setChecked(
@@ -532,6 +542,12 @@ class DisplaySettingsWindow(QtWidgets.QWidget):
         for c in self.app.subscribing_charts:
             c.setDrawLines(state)
 
+    def changeBackgroundRendering(self):
+        state = self.background_rendering_option.isChecked()
+        self.app.settings.setValue("BackgroundRendering", state)
+        for c in self.app.subscribing_charts:
+            c.setBackgroundRendering(state)
+
     def changeShowMarkerNumber(self):
         state = self.show_marker_number_option.isChecked()
         self.app.settings.setValue("ShowMarkerNumbers", state)
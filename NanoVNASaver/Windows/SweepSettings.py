@@ -68,11 +68,20 @@ class SweepSettingsWindow(QtWidgets.QWidget):
 
         settings_layout.addRow("Number of measurements to average", self.averages)
         settings_layout.addRow("Number to discard", self.truncates)
+
+        self.averaging_method = QtWidgets.QComboBox()
+        self.averaging_method.addItem("Discard outliers", "trim")
+        self.averaging_method.addItem("Median", "median")
+        self.averaging_method.addItem("Sigma clipped mean", "sigma")
+        settings_layout.addRow("Averaging method", self.averaging_method)
         settings_layout.addRow(
             QtWidgets.QLabel(
                 "Averaging allows discarding outlying samples to get better averages."))
         settings_layout.addRow(
             QtWidgets.QLabel("Common values are 3/0, 5/2, 9/4 and 25/6."))
+        self.hardware_averaging = QtWidgets.QCheckBox("Average on the device if supported")
+        self.hardware_averaging.setChecked(True)
+        settings_layout.addRow(self.hardware_averaging)
 
         self.continuous_sweep_radiobutton.toggled.connect(
             lambda: self.app.worker.setContinuousSweep(
@@ -80,6 +89,8 @@ class SweepSettingsWindow(QtWidgets.QWidget):
         self.averaged_sweep_radiobutton.toggled.connect(self.updateAveraging)
         self.averages.textEdited.connect(self.updateAveraging)
         self.truncates.textEdited.connect(self.updateAveraging)
+        self.hardware_averaging.toggled.connect(self.updateAveraging)
+        self.averaging_method.currentIndexChanged.connect(self.updateAveraging)
 
         layout.addWidget(settings_box)
 
@@ -173,4 +184,6 @@ class SweepSettingsWindow(QtWidgets.QWidget):
     def updateAveraging(self):
         self.app.worker.setAveraging(self.averaged_sweep_radiobutton.isChecked(),
                                      self.averages.text(),
-                                     self.truncates.text())
+                                     self.truncates.text(),
+                                     self.hardware_averaging.isChecked(),
+                                     self.averaging_method.currentData())
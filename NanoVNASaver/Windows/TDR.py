@@ -17,13 +17,51 @@ import logging
 import math
 
 import numpy as np
-import scipy.signal as signal
-from PyQt5 import QtWidgets, QtCore
+from PyQt5 import QtWidgets, QtCore, QtGui
+
+from NanoVNASaver import TDRTools
+from NanoVNASaver.SweepData import SweepSeries
 
 
 logger = logging.getLogger(__name__)
 
 
+class TDRSignals(QtCore.QObject):
+    finished = QtCore.pyqtSignal(int, object)
+    failed = QtCore.pyqtSignal(int, str)
+
+
+class TDRJob(QtCore.QRunnable):
+    """Computes one TDR transform on a thread pool thread
+
+    Jobs carry the generation they were started for and are skipped if
+    a newer one was requested before they got to run. finished is
+    emitted either way, with None as the result when nothing was done.
+    """
+    def __init__(self, window: "TDRWindow", generation: int,
+                 data: SweepSeries, velocity: float, **options):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.window = window
+        self.generation = generation
+        self.data = data
+        self.velocity = velocity
+        self.options = options
+        self.signals = TDRSignals()
+
+    def run(self):
+        result = None
+        if self.window.tdrGeneration == self.generation:
+            try:
+                result = TDRTools.tdr(self.data.freq, self.data.z,
+                                      self.velocity, **self.options)
+            except ValueError as exc:
+                self.signals.failed.emit(self.generation, str(exc))
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.exception("TDR failed: %s", exc)
+        self.signals.finished.emit(self.generation, result)
+
+
 class TDRWindow(QtWidgets.QWidget):
     updated = QtCore.pyqtSignal()
 
@@ -36,6 +74,15 @@ class TDRWindow(QtWidgets.QWidget):
         self.step_response = []
         self.step_response_Z = []
 
+        # Bumped on every request, results of older jobs are dropped
+        self.tdrGeneration = 0
+        self.tdrJob: TDRJob = None
+        self.tdrRunning = False
+        # Data changed while a job was running
+        self.tdrPending = False
+        # Data changed while nobody was looking at the result
+        self.stale = False
+
         self.setWindowTitle("TDR")
         self.setWindowIcon(self.app.icon)
 
@@ -94,16 +141,36 @@ class TDRWindow(QtWidgets.QWidget):
 
         layout.addRow("Velocity factor", self.tdr_velocity_input)
 
+        self.tdr_resolution_dropdown = QtWidgets.QComboBox()
+        for points in TDRTools.FFT_SIZES:
+            self.tdr_resolution_dropdown.addItem(f"{points} points", points)
+        self.tdr_resolution_dropdown.setCurrentIndex(
+            TDRTools.FFT_SIZES.index(TDRTools.DEFAULT_FFT_POINTS))
+        self.tdr_resolution_dropdown.currentIndexChanged.connect(self.updateTDR)
+        layout.addRow("Resolution", self.tdr_resolution_dropdown)
+
+        self.tdr_window_dropdown = QtWidgets.QComboBox()
+        self.tdr_window_dropdown.addItem("Blackman", "blackman")
+        self.tdr_window_dropdown.addItem("Kaiser", "kaiser")
+        self.tdr_window_dropdown.addItem("Hann", "hann")
+        self.tdr_window_dropdown.currentIndexChanged.connect(self.updateTDR)
+        layout.addRow("Window", self.tdr_window_dropdown)
+
+        self.tdr_mode_dropdown = QtWidgets.QComboBox()
+        self.tdr_mode_dropdown.addItem("Band pass", "bandpass")
+        self.tdr_mode_dropdown.addItem("Low pass", "lowpass")
+        self.tdr_mode_dropdown.setToolTip(
+            "Low pass needs a sweep starting at the frequency step,"
+            " but shows the sign of reflections")
+        self.tdr_mode_dropdown.currentIndexChanged.connect(self.updateTDR)
+        layout.addRow("Mode", self.tdr_mode_dropdown)
+
         self.tdr_result_label = QtWidgets.QLabel()
         layout.addRow("Estimated cable length:", self.tdr_result_label)
 
         layout.addRow(self.app.tdr_chart)
 
     def updateTDR(self):
-        c = 299792458
-        # TODO: Let the user select whether to use high or low resolution TDR?
-        FFT_POINTS = 2**14
-
         if len(self.app.data) < 2:
             return
 
@@ -118,27 +185,69 @@ class TDRWindow(QtWidgets.QWidget):
         except ValueError:
             return
 
-        step_size = self.app.data[1].freq - self.app.data[0].freq
-        if step_size == 0:
+        if not self.hasConsumers():
+            # The cable length in the main window keeps the last result
+            self.stale = True
+            self.app.tdr_result_label.setEnabled(False)
+            return
+        self.stale = False
+
+        data = SweepSeries.from_datapoints(self.app.data)
+        if data.freq[1] == data.freq[0]:
             self.tdr_result_label.setText("")
             logger.info("Cannot compute cable length at 0 span")
             return
 
-        s11 = []
-        for d in self.app.data:
-            s11.append(np.complex(d.re, d.im))
+        # A job still waiting in the queue has been superseded, one that
+        # already runs is let finish and followed by a fresh one
+        if self.tdrRunning:
+            if not self.app.threadpool.tryTake(self.tdrJob):
+                self.tdrPending = True
+                return
+        self.tdrRunning = True
+        self.tdrGeneration += 1
+        self.tdrJob = TDRJob(
+            self, self.tdrGeneration, data.copy(), v,
+            fft_points=self.tdr_resolution_dropdown.currentData(),
+            window_name=self.tdr_window_dropdown.currentData(),
+            mode=self.tdr_mode_dropdown.currentData())
+        self.tdrJob.signals.finished.connect(self.tdrFinished)
+        self.tdrJob.signals.failed.connect(self.tdrFailed)
+        self.app.threadpool.start(self.tdrJob)
+
+    def hasConsumers(self) -> bool:
+        """Whether the window or a TDR chart showing the result is visible"""
+        charts = self.app.selectable_charts + self.app.subscribing_charts
+        return self.isVisible() or any(
+            c.isVisible() for c in charts
+            if getattr(c, "tdrWindow", None) is self)
+
+    def refreshTDR(self):
+        if self.stale:
+            self.updateTDR()
 
-        window = np.blackman(len(self.app.data))
+    def showEvent(self, event: QtGui.QShowEvent):
+        super().showEvent(event)
+        self.refreshTDR()
 
-        windowed_s11 = window * s11
-        self.td = np.abs(np.fft.ifft(windowed_s11, FFT_POINTS))
-        step = np.ones(FFT_POINTS)
-        self.step_response = signal.convolve(self.td, step)
+    def tdrFinished(self, generation: int, result: TDRTools.TDRResult):
+        self.tdrRunning = False
+        if result is not None and generation == self.tdrGeneration:
+            self.showResult(result)
+        if self.tdrPending:
+            self.tdrPending = False
+            self.updateTDR()
 
-        self.step_response_Z = 50 * (1 + self.step_response) / (1 - self.step_response)
+    def tdrFailed(self, generation: int, message: str):
+        if generation == self.tdrGeneration:
+            self.tdr_result_label.setText(message)
+            self.app.tdr_result_label.setText("")
 
-        time_axis = np.linspace(0, 1/step_size, FFT_POINTS)
-        self.distance_axis = time_axis * v * c
+    def showResult(self, result: TDRTools.TDRResult):
+        self.td = result.td
+        self.step_response = result.step_response
+        self.step_response_Z = result.step_response_Z
+        self.distance_axis = result.distance_axis
         # peak = np.max(td)
         #  We should check that this is an actual *peak*, and not just a vague maximum
         index_peak = np.argmax(self.td)
@@ -149,4 +258,5 @@ class TDRWindow(QtWidgets.QWidget):
 
         self.tdr_result_label.setText(f"{cable_len}m ({feet}ft {inches}in)")
         self.app.tdr_result_label.setText(str(cable_len) + " m")
+        self.app.tdr_result_label.setEnabled(True)
         self.updated.emit()
@@ -0,0 +1,163 @@
+#  NanoVNASaver
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019.  Rune B. Broberg
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import unittest
+import cmath
+import math
+
+import numpy as np
+
+# Import targets to be tested
+from NanoVNASaver.Calibration import Calibration
+from NanoVNASaver.RFTools import Datapoint
+
+FREQS = [1000000, 2000000, 3000000, 4000000]
+# Error terms of a simulated VNA
+E00 = complex(0.05, -0.02)
+E11 = complex(0.1, 0.03)
+E10E01 = complex(0.9, -0.1)
+E30 = complex(0.001, 0.002)
+E10E32 = complex(0.8, 0.2)
+
+
+def measure11(gamma: complex) -> complex:
+    return E00 + E10E01 * gamma / (1 - E11 * gamma)
+
+
+def dataset(values):
+    return [Datapoint(f, v.real, v.imag) for f, v in zip(FREQS, values)]
+
+
+class TestCalibration(unittest.TestCase):
+
+    def setUp(self):
+        self.cal = Calibration()
+        self.cal.s11short = dataset([measure11(-1)] * 4)
+        self.cal.s11open = dataset([measure11(1)] * 4)
+        self.cal.s11load = dataset([measure11(0)] * 4)
+        self.cal.s21isolation = dataset([E30] * 4)
+        self.cal.s21through = dataset([E30 + E10E32 / (1 - E11 * E11)] * 4)
+
+    def test_ideal(self):
+        valid, _ = self.cal.calculateCorrections()
+        self.assertTrue(valid)
+        self.assertEqual(len(self.cal.e00), 4)
+        self.assertEqual(list(self.cal.frequencies), FREQS)
+        self.assertFalse(self.cal.degenerate.any())
+        for i in range(4):
+            self.assertAlmostEqual(self.cal.e00[i], E00)
+            self.assertAlmostEqual(self.cal.e11[i], E11)
+            self.assertAlmostEqual(self.cal.e30[i], E30)
+            self.assertAlmostEqual(self.cal.e10e32[i], E10E32)
+        dut = complex(0.3, -0.4)
+        m = measure11(dut)
+        re, im = self.cal.correct11(m.real, m.imag, 2000000)
+        self.assertAlmostEqual(complex(re, im), dut)
+
+    def test_standards(self):
+        cal = self.cal
+        cal.useIdealShort = cal.useIdealOpen = cal.useIdealLoad = False
+        cal.loadR = 50
+        cal.loadL = 1e-9
+        cal.loadLength = 1e-12
+        for f, g in zip(FREQS, cal.gammaShort(FREQS)):
+            zsp = 1j * 2 * math.pi * f * (
+                cal.shortL0 + cal.shortL1 * f +
+                cal.shortL2 * f**2 + cal.shortL3 * f**3)
+            expected = (zsp / 50 - 1) / (zsp / 50 + 1) * cmath.exp(
+                -1j * 4 * math.pi * f * cal.shortLength)
+            self.assertAlmostEqual(g, expected)
+        for f, g in zip(FREQS, cal.gammaLoad(FREQS)):
+            zl = 50 + 1j * 2 * math.pi * f * 1e-9
+            expected = (zl / 50 - 1) / (zl / 50 + 1) * cmath.exp(
+                -1j * 4 * math.pi * f * 1e-12)
+            self.assertAlmostEqual(g, expected)
+        self.assertEqual(cal.gammaOpen([0])[0], cal.openIdeal)
+        self.assertNotEqual(cal.gammaOpen([1000000])[0], cal.openIdeal)
+        valid, _ = cal.calculateCorrections()
+        self.assertTrue(valid)
+
+    def test_correct(self):
+        self.cal.calculateCorrections()
+        duts = [complex(0.3, -0.4), complex(-0.2, 0.1), 0, complex(0.9, 0)]
+        s11m = [measure11(d) for d in duts]
+        s21m = [E30 + E10E32 * d for d in duts]
+        # Frequencies between and outside the calibration points
+        freqs = [500000, 1400000, 2600000, 9000000]
+        for interpolation in Calibration.INTERPOLATIONS:
+            self.cal.interpolation = interpolation
+            s11, s21 = self.cal.correct(freqs, s11m, s21m)
+            for i, dut in enumerate(duts):
+                self.assertAlmostEqual(s11[i], dut)
+                self.assertAlmostEqual(s21[i], dut)
+        s11, s21 = self.cal.correct(freqs, s11m)
+        self.assertIsNone(s21)
+
+    def test_lookup(self):
+        self.cal.calculateCorrections()
+        self.cal.e00 = self.cal.e00 * 0 + [0, 1, 2, 3]
+        freqs = [0, 1400000, 1500000, 1600000, 2500000, 5000000]
+        e00, = self.cal.errorTerms(freqs, ["e00"])
+        self.assertEqual(list(e00), [0, 0, 0, 1, 1, 3])
+        self.cal.interpolation = "linear"
+        e00, = self.cal.errorTerms(freqs, ["e00"])
+        for value, expected in zip(e00, [0, 0.4, 0.5, 0.6, 1.5, 3]):
+            self.assertAlmostEqual(value, expected)
+        self.cal.interpolation = "cubic"
+        e00, = self.cal.errorTerms(freqs, ["e00"])
+        for value, expected in zip(e00, [0, 0.4, 0.5, 0.6, 1.5, 3]):
+            self.assertAlmostEqual(value, expected)
+
+    def test_unsorted(self):
+        for name in ("s11short", "s11open", "s11load", "s21isolation", "s21through"):
+            setattr(self.cal, name, list(reversed(getattr(self.cal, name))))
+        self.cal.calculateCorrections()
+        self.assertEqual(list(self.cal.frequencies), FREQS)
+        m = measure11(0.5)
+        re, im = self.cal.correct11(m.real, m.imag, 3000000)
+        self.assertAlmostEqual(complex(re, im), 0.5)
+
+    def test_delay(self):
+        s11, s21 = Calibration.correctDelay(FREQS, [1] * 4, [1] * 4, 1e-9)
+        for i, f in enumerate(FREQS):
+            d = Datapoint(f, 1, 0)
+            self.assertAlmostEqual(s11[i], Calibration.correctDelay11(d, 1e-9).z)
+            self.assertAlmostEqual(s21[i], Calibration.correctDelay21(d, 1e-9).z)
+
+    def test_degenerate(self):
+        self.cal.s11open[1] = self.cal.s11short[1]
+        self.cal.s11open[3] = self.cal.s11short[3]
+        valid, error = self.cal.calculateCorrections()
+        self.assertTrue(valid)
+        self.assertEqual(list(self.cal.degenerate), [False, True, False, True])
+        self.assertIn("2 points", error)
+        self.assertIn("2000000Hz", error)
+        self.assertEqual(list(self.cal.frequencies), [FREQS[0], FREQS[2]])
+        self.assertTrue(np.isfinite(self.cal.e00).all())
+        # The degenerate points are corrected from their neighbours
+        m = measure11(0.5)
+        re, im = self.cal.correct11(m.real, m.imag, FREQS[1])
+        self.assertAlmostEqual(complex(re, im), 0.5)
+        for i in range(4):
+            self.cal.s11open[i] = self.cal.s11short[i]
+        valid, _ = self.cal.calculateCorrections()
+        self.assertFalse(valid)
+        self.assertFalse(self.cal.isCalculated)
+
+    def test_insufficient(self):
+        self.cal.s11load = self.cal.s11load[:2]
+        valid, _ = self.cal.calculateCorrections()
+        self.assertFalse(valid)
@@ -0,0 +1,184 @@
+#  NanoVNASaver
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019.  Rune B. Broberg
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import unittest
+import struct
+import threading
+
+# Import targets to be tested
+from NanoVNASaver.Hardware.NanoVNA import NanoVNA
+from NanoVNASaver.Hardware.NanoVNA_V2 import NanoVNAV2
+from NanoVNASaver.Hardware.VNA import VNA
+
+
+def scan_payload(points, mask=0x87):
+    payload = struct.pack("<HH", mask, points)
+    for i in range(points):
+        payload += struct.pack("<Iffff", 1000000 * (i + 1),
+                               0.25 * i, -0.5, 0.125, 1.5 * i)
+    return payload
+
+
+class TestBinaryScan(unittest.TestCase):
+
+    def test_decode(self):
+        freq, s11, s21 = NanoVNA.decodeScan(scan_payload(3), 3)
+        self.assertEqual(freq.tolist(), [1000000, 2000000, 3000000])
+        self.assertEqual(s11.tolist(), [-0.5j, 0.25-0.5j, 0.5-0.5j])
+        self.assertEqual(s21.tolist(), [0.125, 0.125+1.5j, 0.125+3j])
+        self.assertEqual(s11.dtype.name, "complex128")
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, NanoVNA.decodeScan, scan_payload(3), 4)
+        self.assertRaises(ValueError, NanoVNA.decodeScan, scan_payload(3)[:-1], 3)
+        self.assertRaises(ValueError, NanoVNA.decodeScan, scan_payload(3, 0x83), 3)
+
+
+class App:
+    serialLock = threading.Lock()
+
+
+class TestCombinedScan(unittest.TestCase):
+
+    def setUp(self):
+        self.vna = VNA(App(), None)
+        self.vna.datapoints = 2
+        self.vna.useCombinedScan = True
+        self.commands = []
+        self.reply = ["1000000 0.1 0.2 0.3 0.4", "2000000 -0.1 -0.2 -0.3 -0.4"]
+
+        def read_values(command, timeout=None):
+            self.commands.append(command)
+            return self.reply
+        self.vna.readValues = read_values
+
+    def test_read(self):
+        freq, s11, s21 = self.vna.readScan(1000000, 2000000)
+        self.assertEqual(self.commands, ["scan 1000000 2000000 2 7"])
+        self.assertEqual(freq.tolist(), [1000000, 2000000])
+        self.assertEqual(s11.tolist(), [0.1+0.2j, -0.1-0.2j])
+        self.assertEqual(s21.tolist(), [0.3+0.4j, -0.3-0.4j])
+        # A later bad read does not disable combined reads
+        self.reply = ["garbage"]
+        freq, _, _ = self.vna.readScan(1000000, 2000000)
+        self.assertEqual(len(freq), 0)
+        self.assertTrue(self.vna.useCombinedScan)
+
+    def test_unsupported(self):
+        self.reply = ["usage: scan {start(Hz)} {stop(Hz)} [points]"]
+        freq, _, _ = self.vna.readScan(1000000, 2000000)
+        self.assertEqual(len(freq), 0)
+        self.assertFalse(self.vna.useCombinedScan)
+        self.vna.readScan(1000000, 2000000)
+        self.assertEqual(len(self.commands), 1)
+
+        self.setUp()
+        self.reply = ["1000000 0.1 0.2", "2000000 -0.1 -0.2"]
+        self.vna.readScan(1000000, 2000000)
+        self.assertFalse(self.vna.useCombinedScan)
+        self.assertEqual(len(self.commands), 1)
+
+    def test_retry_probe(self):
+        replies = [["1000000 0.1 0.2 0.3 0.4", "2000000 -0.1"], self.reply]
+        self.vna.readValues = lambda command, timeout=None: replies.pop(0)
+        freq, _, _ = self.vna.readScan(1000000, 2000000)
+        self.assertEqual(freq.tolist(), [1000000, 2000000])
+        self.assertTrue(self.vna.useCombinedScan)
+
+        self.setUp()
+        self.reply = ["0.1 0.2 0.3 0.4", "2000000 -0.1 -0.2 -0.3 -0.4"]
+        freq, _, _ = self.vna.readScan(1000000, 2000000)
+        self.assertEqual(len(freq), 0)
+        self.assertEqual(len(self.commands), 2)
+        self.assertFalse(self.vna.useCombinedScan)
+
+
+class TestV2Fifo(unittest.TestCase):
+
+    def test_decode(self):
+        data = struct.pack("<iiiiiihxxxxxx", 2, 0, 1, 1, 4, -2, 7)
+        data += struct.pack("<iiiiiihxxxxxx", 0, 1, 1, 0, 0, 0, 300)
+        index, s11, s21 = NanoVNAV2.decodeFifo(data)
+        self.assertEqual(index.tolist(), [7, 300])
+        self.assertEqual(s11.tolist(), [0.5+0.5j, -1j])
+        self.assertEqual(s21.tolist(), [2-1j, 0])
+
+    def test_averaged_sweep(self):
+        vna = NanoVNAV2.__new__(NanoVNAV2)
+        vna.datapoints = 2
+        vna.valuesPerFrequency = 3
+        vna.discardPerFrequency = 1
+        vna.averagingMethod = "trim"
+        records = [(1, 1), (0, 2), (1, 3), (0, 4), (1, 20), (0, 30)]
+        data = b"".join(struct.pack("<iiiiiihxxxxxx", 1, 0, value, 0, 0, 0, index)
+                        for index, value in records)
+        s11, _ = vna.decodeSweep(data)
+        self.assertEqual(s11.tolist(), [3, 2])
+        vna.averagingMethod = "median"
+        s11, _ = vna.decodeSweep(data)
+        self.assertEqual(s11.tolist(), [4, 3])
+        s11, _ = vna.decodeSweep(data[:-32])
+        self.assertEqual(s11.tolist(), [3, 8])
+
+
+class FifoTransport:
+    """Answers every FIFO read with records of the next measured segment"""
+    def __init__(self):
+        self.writes = []
+        self.segment = 0
+
+    def drain(self):
+        pass
+
+    def write(self, data):
+        self.writes.append(data)
+
+    def readBytes(self, size, timeout=None):
+        self.segment += 1
+        return b"".join(
+            struct.pack("<iiiiiihxxxxxx", 1, 0, self.segment, 0, 0, 0, i)
+            for i in range(size // 32))
+
+    def record(self, name, started, timed_out=False):
+        pass
+
+
+class TestV2Pipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.vna = NanoVNAV2.__new__(NanoVNAV2)
+        self.vna._isDFU = False
+        self.vna.datapoints = 3
+        self.vna.sweepStartHz = 200e6
+        self.vna.sweepStepHz = 1e6
+        self.vna.valuesPerFrequency = 1
+        self.vna.transport = FifoTransport()
+
+    def test_read_scans(self):
+        ranges = [(1000, 3000), (4000, 6000), (7000, 9000)]
+        segments = list(self.vna.readScans(ranges))
+        self.assertEqual([s[0].tolist() for s in segments],
+                         [[1000, 2000, 3000], [4000, 5000, 6000], [7000, 8000, 9000]])
+        self.assertEqual([s[1].tolist() for s in segments],
+                         [[1, 1, 1], [2, 2, 2], [3, 3, 3]])
+        writes = self.vna.transport.writes
+        # The registers of every following segment are queued behind
+        # the FIFO read of the current one
+        self.assertIn(self.vna._sweepCommand(1000, 1000), writes[0])
+        self.assertIn(self.vna._sweepCommand(4000, 1000), writes[3])
+        self.assertIn(self.vna._sweepCommand(7000, 1000), writes[4])
+        self.assertEqual(len(writes), 6)
+        self.assertEqual((self.vna.sweepStartHz, self.vna.sweepStepHz), (7000, 1000))
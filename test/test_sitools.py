@@ -17,7 +17,7 @@
 import unittest
 
 # Import targets to be tested
-from NanoVNASaver.SITools import Format, Value
+from NanoVNASaver.SITools import Format, Value, format_many, format_value
 from decimal import Decimal
 from math import inf
 
@@ -137,6 +137,54 @@ class TestTSIToolsValue(unittest.TestCase):
         self.assertEqual(str(v.parse("1e-2")), "10.00m")
         self.assertEqual(str(v.parse("1e-3")), "1.000m")
 
+
+class TestFormatValue(unittest.TestCase):
+
+    def test_same_as_decimal(self):
+        # Expected strings as formatted by the former Decimal based Value
+        values = (0, 1, -1, 12.5, 999.9995, 123456789, 1e-3, -4.7e-12,
+                  1e27, -1e27, 1e-29, 1e-30)
+        expected = {
+            F_DEFAULT: [
+                "0.00000Hz", "1.00000Hz", "-1.00000Hz", "12.5000Hz",
+                "1000.000Hz", "123.457MHz", "1.00000mHz", "-4.70000pHz",
+                "\N{INFINITY}Hz", "-\N{INFINITY}Hz", "0.00001yHz", "0.00000Hz"],
+            F_DIGITS_1: [
+                "0Hz", "1Hz", "-1Hz", "12Hz", "1000Hz", "123MHz", "1mHz",
+                "-0Hz", "1000000000000000000000MHz",
+                "-1000000000000000000000MHz", "0Hz", "0Hz"],
+            F_DIGITS_3: [
+                "0.00Hz", "1.00Hz", "-1.00Hz", "12.5Hz", "1000Hz", "123MHz",
+                "1.00mHz", "-0.00Hz", "1000000000000000000000MHz",
+                "-1000000000000000000000MHz", "0.00Hz", "0.00Hz"],
+            F_DIGITS_4: [
+                "0.000Hz", "1.000Hz", "-1.000Hz", "12.50Hz", "1000.0Hz",
+                "123.5MHz", "1.000mHz", "-4.700pHz", "\N{INFINITY}Hz",
+                "-\N{INFINITY}Hz", "0.000Hz", "0.000Hz"],
+            F_WITH_SPACE: [
+                "0.00000 Hz", "1.00000 Hz", "-1.00000 Hz", "12.5000 Hz",
+                "1000.000 Hz", "123.457 MHz", "1.00000 mHz", "-4.70000 pHz",
+                "\N{INFINITY} Hz", "-\N{INFINITY} Hz", "0.00001 yHz",
+                "0.00000 Hz"],
+        }
+        for fmt, strings in expected.items():
+            for val, string in zip(values, strings):
+                self.assertEqual(format_value(val, "Hz", fmt), string)
+                self.assertEqual(str(Value(val, "Hz", fmt)), string)
+            self.assertEqual(format_many(values, "Hz", fmt), strings)
+
+    def test_parsed_string(self):
+        self.assertEqual(format_value("1M", "Hz"), "1.00000MHz")
+
+    def test_negative_zero(self):
+        self.assertEqual(format_value(0.0), "0.00000")
+        self.assertEqual(format_value(-0.0), "-0.00000")
+
+    def test_non_finite(self):
+        self.assertEqual(format_value(inf), "\N{INFINITY}")
+        self.assertEqual(format_many([inf, -inf]),
+                         ["\N{INFINITY}", "-\N{INFINITY}"])
+
 # TODO: test F_DIGITS_31
 #            F_WITH_SPACE
 #            F_WITH_UNDERSCORE
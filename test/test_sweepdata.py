@@ -0,0 +1,153 @@
+#  NanoVNASaver
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019.  Rune B. Broberg
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import unittest
+import math
+
+# Import targets to be tested
+from NanoVNASaver.RFTools import Datapoint, groupDelay
+from NanoVNASaver.SweepData import (
+    SweepData, SweepSeries, average, median, sigma_clipped_mean, truncated_mean)
+
+
+class TestSweepSeries(unittest.TestCase):
+
+    def setUp(self):
+        self.dpoints = [
+            Datapoint(100000, 0.1091, 0.3118),
+            Datapoint(100001, 0.1091, 0.3124),
+            Datapoint(100002, 0.1091, 0.3130),
+            Datapoint(100003, 0, 0),
+            Datapoint(100004, 1, 0),
+        ]
+        self.series = SweepSeries.from_datapoints(self.dpoints)
+
+    def test_sequence(self):
+        self.assertEqual(len(self.series), 5)
+        self.assertEqual(self.series[0], self.dpoints[0])
+        self.assertEqual(self.series[-1], self.dpoints[-1])
+        self.assertEqual(list(self.series), self.dpoints)
+        self.assertIn(self.dpoints[2], self.series)
+        self.assertEqual(self.series.index(self.dpoints[2]), 2)
+        self.assertIs(SweepSeries.from_datapoints(self.series), self.series)
+        self.assertEqual(len(SweepSeries()), 0)
+        self.assertFalse(SweepSeries())
+
+    def test_slicing(self):
+        part = self.series[1:3]
+        self.assertIsInstance(part, SweepSeries)
+        self.assertEqual(list(part), self.dpoints[1:3])
+        part.z[0] = complex(0.5, 0.5)
+        self.assertEqual(self.series[1].z, complex(0.5, 0.5))
+        part[1] = Datapoint(100005, 0.25, 0.5)
+        self.assertEqual(self.series[2], Datapoint(100005, 0.25, 0.5))
+
+    def test_accessors(self):
+        for i, dp in enumerate(self.dpoints):
+            self.assertAlmostEqual(self.series.phase[i], dp.phase)
+            self.assertEqual(self.series.gain[i], dp.gain)
+            self.assertAlmostEqual(self.series.vswr[i], dp.vswr)
+            self.assertAlmostEqual(self.series.impedance()[i], dp.impedance())
+            self.assertAlmostEqual(self.series.impedance(75)[i], dp.impedance(75))
+        self.assertEqual(self.series.gain[3], -math.inf)
+        self.assertEqual(self.series.vswr[4], 1.0)
+        self.assertEqual(self.series.impedance()[4].real, math.inf)
+        for i, dp in enumerate(self.dpoints[:4]):
+            self.assertAlmostEqual(self.series.qFactor()[i], dp.qFactor())
+
+    def test_group_delay(self):
+        delay = self.series[:3].groupDelay()
+        self.assertAlmostEqual(delay[1], groupDelay(self.dpoints[:3], 1))
+        same_freq = SweepSeries([100000] * 3, self.series.z[:3])
+        self.assertEqual(list(same_freq.groupDelay()), [0.0, 0.0, 0.0])
+        self.assertEqual(len(SweepSeries().groupDelay()), 0)
+
+    def test_equivalents(self):
+        for i, dp in enumerate(self.dpoints[:3]):
+            self.assertAlmostEqual(
+                self.series.capacitiveEquivalent()[i] / dp.capacitiveEquivalent(), 1)
+            self.assertAlmostEqual(
+                self.series.inductiveEquivalent()[i] / dp.inductiveEquivalent(), 1)
+
+    def test_derived_cache(self):
+        impedance = self.series.impedance()
+        self.assertIs(self.series.impedance(), impedance)
+        self.assertIsNot(self.series.impedance(75), impedance)
+        self.assertFalse(impedance.flags.writeable)
+        self.series.z[4] = 0
+        self.assertIs(self.series.impedance(), impedance)
+        self.series.invalidate()
+        self.assertIsNot(self.series.impedance(), impedance)
+        self.assertEqual(self.series.impedance()[4], 50)
+        self.assertIsNot(self.series[:3].impedance(), impedance)
+
+
+class TestSweepData(unittest.TestCase):
+
+    def test_from_values(self):
+        sweep = SweepData.from_values(
+            [1000, 2000, 3000],
+            [(0.1, 0.2), (0.3, 0.4), (0.5, 0.6)],
+            [(0.7, 0.8), (0.9, 1.0), (1.1, 1.2)])
+        self.assertEqual(len(sweep), 3)
+        self.assertEqual(sweep.freq.dtype.name, "int64")
+        self.assertEqual(sweep.s11.dtype.name, "complex128")
+        self.assertEqual(sweep.s11data[1], Datapoint(2000, 0.3, 0.4))
+        self.assertEqual(sweep.s21data[2], Datapoint(3000, 1.1, 1.2))
+
+    def test_from_datapoints(self):
+        s11 = [Datapoint(1000, 0.1, 0.2), Datapoint(2000, 0.3, 0.4)]
+        sweep = SweepData.from_datapoints(s11)
+        self.assertEqual(list(sweep.s11data), s11)
+        self.assertEqual(len(sweep.s21data), 0)
+        self.assertEqual(len(sweep[0:1]), 1)
+        self.assertEqual(len(sweep[0:1].s21data), 0)
+
+    def test_slicing(self):
+        sweep = SweepData([1, 2, 3, 4])
+        segment = sweep[2:4]
+        segment.s11[:] = complex(1, 1)
+        segment.s21[:] = complex(2, 2)
+        self.assertEqual(list(sweep.s11), [0, 0, complex(1, 1), complex(1, 1)])
+        self.assertEqual(list(sweep.s21), [0, 0, complex(2, 2), complex(2, 2)])
+        self.assertEqual(list(sweep.copy().freq), [1, 2, 3, 4])
+        self.assertRaises(TypeError, sweep.__getitem__, 1)
+
+
+class TestAveraging(unittest.TestCase):
+
+    def test_truncated_mean(self):
+        samples = [[1, 10], [2, 10], [9, 10], [1, 40]]
+        self.assertEqual(truncated_mean(samples, 0).tolist(), [3.25, 17.5])
+        self.assertEqual(truncated_mean(samples, 1).tolist(), [4 / 3, 10])
+        self.assertEqual(truncated_mean(samples, 9).tolist(), [2, 10])
+        self.assertEqual(truncated_mean([[1, 2, 1j, 30]], 1, 1).tolist(), [1 + 1j / 3])
+
+    def test_median(self):
+        samples = [[1 + 5j, 3], [2 + 1j, 3], [9 + 2j, 4]]
+        self.assertEqual(median(samples).tolist(), [2 + 2j, 3])
+
+    def test_sigma_clipped_mean(self):
+        samples = [[1, 1], [1.1, 2], [0.9, 3], [1, 4], [1, 4], [20, 4]]
+        self.assertAlmostEqual(sigma_clipped_mean(samples)[0], 1)
+        self.assertAlmostEqual(sigma_clipped_mean(samples)[1], 3)
+        self.assertEqual(sigma_clipped_mean([[5], [5]]).tolist(), [5])
+
+    def test_average(self):
+        samples = [[1, 10], [2, 10], [9, 10], [1, 40]]
+        self.assertEqual(average(samples, "trim", 1).tolist(), [4 / 3, 10])
+        self.assertEqual(average(samples, "median").tolist(), [1.5, 10])
+        self.assertRaises(ValueError, average, samples, "mode")
@@ -0,0 +1,79 @@
+#  NanoVNASaver
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019.  Rune B. Broberg
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import unittest
+
+import numpy as np
+from scipy import signal
+
+# Import targets to be tested
+from NanoVNASaver import TDRTools
+
+
+class TestTDR(unittest.TestCase):
+
+    def setUp(self):
+        # Open line, 10 ns round trip
+        self.freq = np.arange(1, 402, dtype=np.int64) * 1000000
+        self.s11 = 0.8 * np.exp(-2j * np.pi * self.freq * 10e-9)
+
+    def test_bandpass_step_response(self):
+        result = TDRTools.tdr(self.freq, self.s11, 0.66, fft_points=2**12)
+        windowed = np.blackman(len(self.s11)) * self.s11
+        td = np.abs(np.fft.ifft(windowed, 2**12))
+        convolved = signal.convolve(td, np.ones(2**12))
+        np.testing.assert_allclose(result.td, td)
+        np.testing.assert_allclose(result.step_response,
+                                   convolved[:2**12], atol=1e-12)
+        self.assertEqual(len(result.distance_axis), 2**12)
+
+    def test_peak_distance(self):
+        for mode in TDRTools.MODES:
+            for name in TDRTools.WINDOWS:
+                result = TDRTools.tdr(self.freq, self.s11, 1.0,
+                                      window_name=name, mode=mode)
+                peak = result.distance_axis[np.argmax(result.td)]
+                self.assertAlmostEqual(peak, 10e-9 * TDRTools.SPEED_OF_LIGHT,
+                                       delta=0.1)
+
+    def test_lowpass_step(self):
+        short = -np.ones(len(self.freq), dtype=np.complex128)
+        result = TDRTools.tdr(self.freq, short, 1.0, mode="lowpass")
+        self.assertAlmostEqual(result.step_response[-1], -1.0, places=6)
+        self.assertAlmostEqual(result.step_response_Z[-1], 0.0, places=3)
+
+    def test_lowpass_points(self):
+        # 2.4 to 2.5 GHz in 1 MHz steps is a grid of 2501 bins
+        freq = np.linspace(2400, 2500, 101, dtype=np.int64) * 1000000
+        s11 = 0.8 * np.exp(-2j * np.pi * freq * 10e-9)
+        result = TDRTools.tdr(freq, s11, 1.0, fft_points=2**12, mode="lowpass")
+        self.assertEqual(len(result.td), 2**13)
+        self.assertEqual(len(result.distance_axis), 2**13)
+        self.assertEqual(TDRTools.lowpass_points(401, 2**12), 2**12)
+        freq = np.arange(10000000, 10000101, dtype=np.int64) * 1000
+        self.assertRaisesRegex(
+            ValueError, "use band pass", TDRTools.tdr, freq,
+            np.ones(len(freq), dtype=np.complex128), 1.0, mode="lowpass")
+
+    def test_cached_axes(self):
+        self.assertIs(TDRTools.window("kaiser", 101),
+                      TDRTools.window("kaiser", 101))
+        self.assertIs(TDRTools.distance_axis(1024, 1e6, 0.66),
+                      TDRTools.distance_axis(1024, 1e6, 0.66))
+        self.assertFalse(TDRTools.window("hann", 101).flags.writeable)
+        self.assertRaises(ValueError, TDRTools.window, "boxcar", 101)
+        self.assertRaises(ValueError, TDRTools.tdr, self.freq, self.s11,
+                          0.66, mode="highpass")
@@ -19,6 +19,7 @@ import logging
 import os
 
 # Import targets to be tested
+from NanoVNASaver.SweepData import SweepSeries
 from NanoVNASaver.Touchstone import Options, Touchstone
 from NanoVNASaver.RFTools import Datapoint
 
@@ -112,6 +113,19 @@ class TestTouchstoneTouchstone(unittest.TestCase):
         for dps_db, dps_ma in zip(ts_db.s11data, ts_ma.s11data):
             self.assertAlmostEqual(dps_db.z, dps_ma.z, places=5)
 
+    def test_load_twice(self):
+        # The first load is vectorised, the second appends line by line
+        ts = Touchstone("./test/data/attenuator-0643_DB.s2p")
+        ts.load()
+        self.assertIsInstance(ts.s11data, SweepSeries)
+        ts.load()
+        self.assertIsInstance(ts.s11data, list)
+        for data in ts.sdata:
+            self.assertEqual(len(data), 2 * 1601)
+            for dp_block, dp_line in zip(data[:1601], data[1601:]):
+                self.assertEqual(dp_block.freq, dp_line.freq)
+                self.assertAlmostEqual(dp_block.z, dp_line.z, places=12)
+
     def test_load_scikit(self):
         ts = Touchstone("./test/data/scikit_unordered.s2p")
         with self.assertLogs(level=logging.WARNING) as cm:
@@ -150,3 +164,33 @@ class TestTouchstoneTouchstone(unittest.TestCase):
         ts.s11data[0] = Datapoint(100, 0.1, 0.1)
         self.assertRaisesRegex(
             LookupError, "Frequencies of sdata not correlated", ts.saves, 4)
+
+    def test_save_formats(self):
+        ts = Touchstone("./test/data/valid.s2p")
+        ts.load()
+        lines = ts.saves(1, precision=3).splitlines()
+        self.assertEqual(lines[1], "500000 -0.333 0.00018")
+        lines = ts.saves(1, "ma", 4).splitlines()
+        self.assertEqual(lines[0], "# HZ S MA R 50")
+        self.assertEqual(lines[1], "500000 0.3332 180")
+        for t_format in ("ma", "db"):
+            ts_out = Touchstone("")
+            ts_out.loads(ts.saves(4, t_format))
+            self.assertEqual(ts_out.opts.format, t_format)
+            for data, data_out in zip(ts.sdata, ts_out.sdata):
+                self.assertEqual(len(data), len(data_out))
+                for dp, dp_out in zip(data, data_out):
+                    self.assertEqual(dp.freq, dp_out.freq)
+                    self.assertAlmostEqual(dp.z, dp_out.z, places=12)
+
+    def test_save_gzip(self):
+        ts = Touchstone("./test/data/valid.s2p")
+        ts.load()
+        ts.filename = "./test/data/output.s2p.gz"
+        ts.save(4)
+        with open(ts.filename, "rb") as infile:
+            self.assertEqual(infile.read(2), b"\x1f\x8b")
+        ts_gz = Touchstone(ts.filename)
+        ts_gz.load()
+        os.remove(ts.filename)
+        self.assertEqual(ts_gz.saves(4), ts.saves(4))
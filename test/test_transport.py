@@ -0,0 +1,77 @@
+#  NanoVNASaver
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019.  Rune B. Broberg
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import unittest
+import threading
+
+import serial
+
+# Import targets to be tested
+from NanoVNASaver.Hardware.Transport import SerialTransport
+
+
+class FakeSerial:
+    """Answers each written command with a canned reply, in small chunks"""
+    def __init__(self, replies):
+        self.replies = replies
+        self.pending = b""
+        self.written = []
+
+    @property
+    def in_waiting(self):
+        return min(len(self.pending), 7)
+
+    def read(self, size=1):
+        data, self.pending = self.pending[:size], self.pending[size:]
+        return data
+
+    def write(self, data):
+        self.written.append(data)
+        if self.replies:
+            self.pending += self.replies.pop(0)
+
+
+class TestSerialTransport(unittest.TestCase):
+
+    def test_command(self):
+        port = FakeSerial([b"info\r\nNanoVNA\r\nch> "])
+        port.pending = b"stale data\r\nch> "
+        transport = SerialTransport(port, threading.Lock())
+        self.assertEqual(transport.command("info"), "info\r\nNanoVNA\r\nch> ")
+        self.assertEqual(port.written, [b"info\r"])
+        self.assertEqual(transport.stats["info"].count, 1)
+        self.assertEqual(transport.stats["info"].timeouts, 0)
+
+    def test_leftover_prompt(self):
+        port = FakeSerial([b"ch> version\r\n0.2.3\r\nch> "])
+        transport = SerialTransport(port, threading.Lock())
+        self.assertEqual(transport.command("version"), "version\r\n0.2.3\r\nch> ")
+
+    def test_binary(self):
+        port = FakeSerial([b"scan 1 2 3 135\r\n" + bytes(range(20)) + b"ch> "])
+        transport = SerialTransport(port, threading.Lock())
+        transport.writeCommand("scan 1 2 3 135")
+        self.assertEqual(transport.readLine(), b"scan 1 2 3 135\r\n")
+        self.assertEqual(transport.readBytes(20), bytes(range(20)))
+        self.assertEqual(transport.readUntil(), b"ch> ")
+
+    def test_timeout(self):
+        port = FakeSerial([b"info\r\nNanoV"])
+        transport = SerialTransport(port, threading.Lock())
+        self.assertRaises(serial.SerialTimeoutException,
+                          transport.command, "info", 0.01)
+        self.assertEqual(transport.stats["info"].timeouts, 1)
+        self.assertEqual(transport.readBytes(20, 0.01), b"info\r\nNanoV")